@@ -0,0 +1,152 @@
+# backend/admission.py
+"""Admission control: concurrency limits with bounded, deadline-bound wait queues
+
+Each stage (the request front door, the encoder, vector search and
+generation) admits at most `limit` callers at once. Further callers wait in
+a FIFO queue of at most `max_queue` entries for at most `timeout` seconds.
+A full queue or an expired wait raises Overloaded straight away rather than
+letting work pile up on the event loop: the endpoints turn that into a
+429/503 at the front door, and the agent degrades to the pre-rendered
+answer when a later stage is saturated.
+"""
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+import asyncio
+import time
+
+from metrics import REGISTRY
+
+STAGES = ("request", "encoder", "search", "generation")
+
+ADMISSION_ACTIVE = REGISTRY.gauge("uet_admission_active", "Callers holding a stage slot", ["stage"])
+ADMISSION_QUEUED = REGISTRY.gauge("uet_admission_queue_depth", "Callers waiting for a stage slot", ["stage"])
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "uet_admission_wait_seconds", "Time spent waiting for a stage slot", ["stage"]
+)
+ADMISSION_SHED = REGISTRY.counter("uet_admission_shed_total", "Callers turned away by a stage", ["stage", "reason"])
+DEGRADED = REGISTRY.counter(
+    "uet_admission_degraded_total", "Answers served without the stage's output because it was saturated", ["stage"]
+)
+
+
+class Overloaded(Exception):
+    """A stage turned the caller away; status is the HTTP status to answer with"""
+
+    def __init__(self, stage: str, reason: str, status: int, retry_after: float):
+        super().__init__(f"{stage} overloaded ({reason})")
+        self.stage = stage
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class StageLimiter:
+    """At most `limit` concurrent holders (0 = unlimited) and a bounded FIFO of waiters"""
+
+    def __init__(self, stage: str, limit: int, max_queue: int = 0, timeout: float = 1.0):
+        self.stage = stage
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.counts = {"admitted": 0, "waited": 0, "queue_full": 0, "deadline": 0}
+        self._active_gauge = ADMISSION_ACTIVE.labels(stage)
+        self._queued_gauge = ADMISSION_QUEUED.labels(stage)
+        self._wait = ADMISSION_WAIT_SECONDS.labels(stage)
+        self._shed = {reason: ADMISSION_SHED.labels(stage, reason) for reason in ("queue_full", "deadline")}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, reason: str, status: int):
+        self.counts[reason] += 1
+        self._shed[reason].inc()
+        raise Overloaded(self.stage, reason, status, self.timeout)
+
+    def _admit(self):
+        self.active += 1
+        self.counts["admitted"] += 1
+        self._active_gauge.inc()
+
+    async def acquire(self):
+        if self.limit <= 0:
+            return
+        if self.active < self.limit and not self._waiters:
+            self._admit()
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full", 429)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queued_gauge.inc()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self._reject("deadline", 503)
+        except asyncio.CancelledError:
+            # A slot handed over just as the caller went away goes to the next waiter
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._queued_gauge.dec()
+            self._wait.observe(time.perf_counter() - started)
+        self.counts["waited"] += 1
+
+    def release(self):
+        if self.limit <= 0:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes straight to the waiter, so active is unchanged
+                waiter.set_result(None)
+                self.counts["admitted"] += 1
+                return
+        self.active -= 1
+        self._active_gauge.dec()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict:
+        return {"limit": self.limit, "active": self.active, "queued": self.queued, "max_queue": self.max_queue, **self.counts}
+
+
+class AdmissionController:
+    """One StageLimiter per stage, configured from ADMISSION_* settings"""
+
+    def __init__(self, limits: Dict[str, int], max_queue: Dict[str, int], timeouts: Dict[str, float]):
+        self.stages = {
+            stage: StageLimiter(stage, limits.get(stage, 0), max_queue.get(stage, 0), timeouts.get(stage, 1.0))
+            for stage in STAGES
+        }
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "AdmissionController":
+        if not config.get("ADMISSION_ENABLED", False):
+            return cls({}, {}, {})
+        return cls(
+            config.get("ADMISSION_LIMITS", {}),
+            config.get("ADMISSION_QUEUE", {}),
+            config.get("ADMISSION_TIMEOUTS", {})
+        )
+
+    def slot(self, stage: str):
+        """Async context manager holding a slot of the stage; raises Overloaded"""
+        return self.stages[stage].slot()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {stage: limiter.stats() for stage, limiter in self.stages.items()}
@@ -0,0 +1,160 @@
+# backend/batching.py
+from typing import Dict, List, NamedTuple, Optional
+import asyncio
+import time
+
+import numpy as np
+
+from metrics import REGISTRY, STAGE_SECONDS, Histogram
+from retrieval import Hit, RetrievalEngine
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+BATCH_SIZES = REGISTRY.histogram(
+    "uet_retrieval_batch_size", "Queries per batched embedding call", buckets=BATCH_SIZE_BUCKETS
+)
+_QUEUE_WAIT = STAGE_SECONDS.labels("batch_wait")
+
+
+class _Request(NamedTuple):
+    query: Optional[str]
+    # Set when the caller already has the embedding
+    vector: Optional[np.ndarray]
+    search: bool
+    future: asyncio.Future
+    enqueued: float
+
+
+class QueryBatcher:
+    """Micro-batches concurrent queries into one encode and one search call
+
+    Besides full searches, a batch can carry embed-only requests (for the
+    semantic answer cache) and searches for vectors embedded earlier.
+    """
+
+    def __init__(self, engine: RetrievalEngine, top_k: int, window_ms: float = 5.0, max_batch_size: int = 32):
+        self.engine = engine
+        self.top_k = top_k
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.full_flushes = 0
+        self.max_wait = 0.0
+
+    def start(self):
+        """Start the collector task on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def search(self, query: str) -> List[Hit]:
+        """Queue a query and wait for its slice of the next batch"""
+        return await self._submit(query, None, True)
+
+    async def embed(self, query: str) -> np.ndarray:
+        """Queue a query for the next batched encode only"""
+        return await self._submit(query, None, False)
+
+    async def search_vector(self, vector: np.ndarray) -> List[Hit]:
+        """Queue an embedded query for the next batched search"""
+        return await self._submit(None, vector, True)
+
+    async def _submit(self, query: Optional[str], vector: Optional[np.ndarray], search: bool):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Request(query, vector, search, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[_Request]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self._record(batch)
+
+            try:
+                results = await loop.run_in_executor(None, self._process, batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            for request, result in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+
+    def _process(self, batch: List[_Request]) -> List:
+        """One encode for the text requests, one search for the search requests"""
+        vectors = [request.vector for request in batch]
+        texts = [i for i, request in enumerate(batch) if request.vector is None]
+        if texts:
+            encoded = self.engine.embed_many([batch[i].query for i in texts])
+            for i, vector in zip(texts, encoded):
+                vectors[i] = vector
+
+        results: List = list(vectors)
+        searches = [i for i, request in enumerate(batch) if request.search]
+        if searches:
+            hit_lists = self.engine.search_vectors(np.stack([vectors[i] for i in searches]), self.top_k)
+            for i, hits in zip(searches, hit_lists):
+                results[i] = hits
+        return results
+
+    def _record(self, batch: List[_Request]):
+        size = len(batch)
+        self.batch_sizes.observe(size)
+        if size >= self.max_batch_size:
+            self.full_flushes += 1
+
+        now = time.perf_counter()
+        for request in batch:
+            _QUEUE_WAIT.observe(now - request.enqueued)
+        self.max_wait = max(self.max_wait, now - min(request.enqueued for request in batch))
+
+    def stats(self) -> Dict:
+        batches = self.batch_sizes.count
+        queries = int(self.batch_sizes.sum)
+        # Batches above the last bound are reported in the last bucket
+        counts = self.batch_sizes.counts[:-1]
+        counts[-1] += self.batch_sizes.counts[-1]
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": batches,
+            "queries": queries,
+            "mean_batch_size": round(queries / batches, 2) if batches else 0.0,
+            "full_flushes": self.full_flushes,
+            "max_queue_wait_ms": round(self.max_wait * 1000.0, 3),
+            "batch_size_histogram": {
+                f"le_{bound}": count for bound, count in zip(BATCH_SIZE_BUCKETS, counts)
+            },
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+        }
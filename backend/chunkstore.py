@@ -0,0 +1,134 @@
+# backend/chunkstore.py
+"""Memory-mapped binary chunk store
+
+    python chunkstore.py ../data/processed/faiss_index_chunks.json ../data/processed/faiss_index_chunks.bin
+
+Layout (little-endian):
+    header   magic "UETCHNK1", chunk count (uint64), table offset (uint64)
+    blob     UTF-8 chunk texts back to back, zero-padded to 8 bytes
+    tables   text offsets into the blob (uint64, count + 1),
+             pages (int32, count), is_header flags (uint8, count)
+
+Texts are decoded only when a chunk is read, so opening the store costs a
+few page faults regardless of corpus size.
+"""
+from pathlib import Path
+from typing import Iterable, Union
+import argparse
+import json
+import mmap
+import struct
+
+import numpy as np
+
+MAGIC = b"UETCHNK1"
+_HEADER = struct.Struct("<8sQQ")
+
+
+class BinaryChunkStore:
+    """Read-only chunk store decoding texts lazily from a memory map"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, table = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a binary chunk store")
+
+        self._count = count
+        self._offsets = np.frombuffer(self._mm, dtype="<u8", count=count + 1, offset=table)
+        self.pages = np.frombuffer(self._mm, dtype="<i4", count=count, offset=table + 8 * (count + 1))
+        self.is_header = np.frombuffer(
+            self._mm, dtype=np.bool_, count=count, offset=table + 8 * (count + 1) + 4 * count
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def text(self, chunk_id: int) -> str:
+        start = _HEADER.size + int(self._offsets[chunk_id])
+        end = _HEADER.size + int(self._offsets[chunk_id + 1])
+        return self._mm[start:end].decode("utf-8")
+
+    def page(self, chunk_id: int) -> int:
+        return int(self.pages[chunk_id])
+
+    @property
+    def texts(self):
+        return [self.text(i) for i in range(self._count)]
+
+
+class ChunkStoreWriter:
+    """Stream chunks into the binary format; only the small tables stay in memory"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, 0, 0))
+        self._offsets = [0]
+        self._pages = []
+        self._headers = []
+
+    @property
+    def count(self) -> int:
+        return len(self._pages)
+
+    def add(self, chunk: dict):
+        data = chunk["text"].encode("utf-8")
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        self._pages.append(chunk.get("page", 0))
+        self._headers.append(bool(chunk.get("is_header", False)))
+
+    def close(self):
+        padding = -(_HEADER.size + self._offsets[-1]) % 8
+        self._file.write(b"\0" * padding)
+        table = _HEADER.size + self._offsets[-1] + padding
+        self._file.write(np.asarray(self._offsets, dtype="<u8").tobytes())
+        self._file.write(np.asarray(self._pages, dtype="<i4").tobytes())
+        self._file.write(np.asarray(self._headers, dtype=np.uint8).tobytes())
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, self.count, table))
+        self._file.close()
+
+    def __enter__(self) -> "ChunkStoreWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._file.closed:
+            self.close()
+
+
+def is_binary_store(path: Union[str, Path]) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_chunk_store(path: Path, chunks: Iterable[dict]) -> int:
+    with ChunkStoreWriter(path) as writer:
+        for chunk in chunks:
+            writer.add(chunk)
+        return writer.count
+
+
+def convert_json(json_path: Path, store_path: Path) -> int:
+    """Convert the JSON chunk list written by the PDF processing step"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+    return write_chunk_store(store_path, chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a JSON chunk list to the binary chunk store")
+    parser.add_argument("json_path", type=Path)
+    parser.add_argument("store_path", type=Path)
+    args = parser.parse_args()
+
+    count = convert_json(args.json_path, args.store_path)
+    print(f"✅ Wrote {count} chunks to {args.store_path} ({args.store_path.stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,157 @@
 # backend/config.py
 from pathlib import Path
+import os
 
 class Settings:
     # API Settings
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
+    # Worker processes forked by serve.py (0 = one per CPU)
+    WORKERS: int = 0
     
     # Department keywords for guardrail
     DEPARTMENT_KEYWORDS: list = [
         "department", "faculty", "school", "program", "course",
         "engineering", "computer", "electrical", "mechanical",
         "civil", "chemical", "architecture", "business",
-        "admission", "fee", "tuition", "lab", "facility",
+        "admission", "fee", "tuition", "lab*", "facility",
         "requirement", "apply", "degree", "bachelor", "master"
     ]
+    
+    # Department and query-type routing (first matching entry wins). Keywords
+    # of four or more letters match by prefix; "*" makes a shorter one a prefix
+    # keyword too
+    DEPARTMENT_ROUTES: dict = {
+        "computer_science": ["computer", "cs", "software", "it", "programming"],
+        "electrical_engineering": ["electrical", "electronics", "power", "circuit"],
+        "mechanical_engineering": ["mechanical", "thermo*", "manufacturing"],
+        "civil_engineering": ["civil", "structural", "construction"],
+        "architecture": ["architecture", "building", "design"]
+    }
+    QUERY_TYPE_ROUTES: dict = {
+        "facilities": ["lab*", "facility", "equipment", "infrastructure"],
+        "admission": ["admission", "apply", "requirement", "eligibility"],
+        "courses": ["course", "program", "subject", "curriculum"],
+        "fees": ["fee", "tuition", "cost", "payment"],
+        "description": ["tell me about", "what is", "information about"]
+    }
+    
+    # Department facts; KNOWLEDGE_BASE_WATCH_SECONDS > 0 polls the file and
+    # reloads it in the background when it changes
+    KNOWLEDGE_BASE_PATH: Path = Path(__file__).resolve().parent.parent / "data" / "knowledge_base.json"
+    KNOWLEDGE_BASE_WATCH_SECONDS: float = 5.0
+    # Required in the X-Admin-Token header of /admin endpoints when set; while
+    # it is empty, /admin only answers clients connecting from loopback
+    ADMIN_TOKEN: str = ""
+    
+    # Startup: load the indexes and encoder in a background task (the API
+    # answers from the knowledge base until /ready reports ready) and run a
+    # few dummy queries through them before serving
+    BACKGROUND_STARTUP: bool = True
+    WARMUP_ENABLED: bool = True
+    
+    # Retrieval Settings
+    DATA_DIR: Path = Path(__file__).resolve().parent.parent / "data" / "processed"
+    INDEX_PATH: Path = DATA_DIR / "faiss_index.index"
+    CHUNKS_PATH: Path = DATA_DIR / "faiss_index_chunks.json"
+    CHUNK_STORE_PATH: Path = DATA_DIR / "faiss_index_chunks.bin"
+    LEXICAL_INDEX_PATH: Path = DATA_DIR / "faiss_index_bm25.bin"
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    RETRIEVAL_ENABLED: bool = True
+    RETRIEVAL_TOP_K: int = 3
+    EMBEDDING_CACHE_SIZE: int = 1024
+    
+    # Hybrid retrieval: BM25 and vector rankings of HYBRID_CANDIDATES chunks
+    # each, merged by reciprocal-rank fusion
+    HYBRID_ENABLED: bool = True
+    HYBRID_CANDIDATES: int = 10
+    RRF_K: int = 60
+    
+    # Department-scoped search: questions matched to a department search only
+    # the chunks of that department's prospectus sections (the section tree
+    # written by ingest.py), unless it holds fewer chunks than the search depth
+    SECTIONS_PATH: Path = DATA_DIR / "faiss_index_sections.json"
+    SCOPED_SEARCH_ENABLED: bool = True
+    # Department of each prospectus section, by lowercased section title;
+    # sections not listed here belong to no partition
+    SECTION_DEPARTMENTS: dict = {
+        "department of computer science": "computer_science",
+        "department of computer engineering": "computer_science",
+        "institute of data science": "computer_science",
+        "department of electrical engineering": "electrical_engineering",
+        "department of electrical, elecronics & telecommunication engineering": "electrical_engineering",
+        "department of mechanical engineering": "mechanical_engineering",
+        "department of industrial & manufacturing engineering": "mechanical_engineering",
+        "department of mechatronics & control engineering": "mechanical_engineering",
+        "department of civil engineering": "civil_engineering",
+        "department of transportation engineering & management": "civil_engineering",
+        "institute of environmental engineering & research": "civil_engineering",
+        "center of excellence in water resources engineering": "civil_engineering",
+        "department of architecture": "architecture",
+        "department of architectural engineering & design": "architecture",
+        "department of city & regional planning": "architecture",
+    }
+    
+    # Embedding router: the query embedding is scored against department and
+    # query-type prototypes; a label replaces the keyword match when its
+    # similarity is at least ROUTER_THRESHOLD and ROUTER_MARGIN ahead of the
+    # runner-up (benchmarks/bench_router.py sweeps both). Off until
+    # bench_router.py, run with sentence-transformers, shows the thresholds
+    # beat the keyword routing's accuracy
+    ROUTER_ENABLED: bool = False
+    ROUTER_PROTOTYPES_PATH: Path = Path(__file__).resolve().parent.parent / "data" / "routing_prototypes.json"
+    ROUTER_THRESHOLD: float = 0.3
+    ROUTER_MARGIN: float = 0.03
+    
+    # Query batching (collect concurrent /chat queries into one encode + search)
+    BATCHING_ENABLED: bool = True
+    BATCH_WINDOW_MS: float = 5.0
+    BATCH_MAX_SIZE: int = 32
+    
+    # /chat/batch processes streamed JSONL input in chunks of this many lines
+    BULK_CHUNK_SIZE: int = 256
+    
+    # Per-session context for follow-up questions (LRU + TTL + byte cap)
+    SESSION_MAX_ENTRIES: int = 100_000
+    SESSION_TTL_SECONDS: float = 1800.0
+    SESSION_MAX_BYTES: int = 96 * 1024 * 1024
+    
+    # Semantic answer cache: a question whose embedding is this close (cosine)
+    # to a cached one with the same department and query type reuses its answer
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_SIZE: int = 1024
+    SEMANTIC_CACHE_THRESHOLD: float = 0.85
+    
+    # Query log for offline analysis and cache warming: requests append to a
+    # ring of QUERY_LOG_CAPACITY records (the oldest are dropped when it is
+    # full) and a background task writes them in batches to gzip JSONL files
+    # in QUERY_LOG_DIR (or $UET_QUERY_LOG_DIR), rotated at QUERY_LOG_MAX_FILE_BYTES
+    QUERY_LOG_ENABLED: bool = True
+    QUERY_LOG_DIR: Path = Path(os.environ.get("UET_QUERY_LOG_DIR") or Path(__file__).resolve().parent.parent / "logs" / "queries")
+    QUERY_LOG_CAPACITY: int = 10_000
+    QUERY_LOG_BATCH_SIZE: int = 512
+    QUERY_LOG_FLUSH_SECONDS: float = 2.0
+    QUERY_LOG_MAX_FILE_BYTES: int = 16 * 1024 * 1024
+    QUERY_LOG_MAX_FILES: int = 50
+    
+    # Admission control per stage: concurrency limit (0 = unlimited), wait
+    # queue length and wait deadline in seconds. A full queue at the request
+    # stage answers 429 and an expired wait 503; the later stages fall back to
+    # the pre-rendered answer. Encoder and search limits count queries, which
+    # the batcher still groups into batches of up to BATCH_MAX_SIZE.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_LIMITS: dict = {"request": 256, "encoder": 64, "search": 64, "generation": 4}
+    ADMISSION_QUEUE: dict = {"request": 512, "encoder": 128, "search": 128, "generation": 32}
+    ADMISSION_TIMEOUTS: dict = {"request": 2.0, "encoder": 0.5, "search": 0.5, "generation": 5.0}
+    
+    # Answer generation over the retrieved passages: "" keeps the pre-rendered
+    # answers, "echo" is a deterministic stand-in, "ollama" and "openai" call a
+    # model (GENERATION_BASE_URL empty = the client's default host)
+    GENERATION_BACKEND: str = ""
+    GENERATION_MODEL: str = "llama3.2"
+    GENERATION_BASE_URL: str = ""
+    GENERATION_CONTEXT_TOKENS: int = 1500
+    GENERATION_MAX_TOKENS: int = 400
+    GENERATION_TIMEOUT_SECONDS: float = 30.0
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,243 @@
+# backend/generation.py
+"""Answer generation over retrieved prospectus passages
+
+Backends stream text for a list of chat messages:
+
+    echo    deterministic stand-in that quotes the passages (tests, benchmarks)
+    ollama  a local model through the ollama client
+    openai  any OpenAI-compatible chat completions endpoint
+
+Generator packs the passages into a token budget, best-scoring first, and
+runs at most one generation per distinct prompt: concurrent identical
+prompts (a burst of the same question) attach to the call already in
+flight and receive the same stream.
+"""
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import re
+
+SYSTEM_PROMPT = (
+    "You answer questions about UET (University of Engineering and Technology) departments. "
+    "Use only the department information and prospectus passages provided, cite pages as (p. N), "
+    "and say so when they do not answer the question."
+)
+
+_PASSAGE_LINE = re.compile(r"^\[Page (\d+)\] (.*)$", re.MULTILINE)
+_QUESTION_LINE = re.compile(r"^Question: (.*)$", re.MULTILINE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+Messages = List[Dict[str, str]]
+# (page, text, score) of a retrieved passage
+Passage = Tuple[int, str, float]
+
+
+def count_tokens(text: str) -> int:
+    """Approximate BPE token count (about four characters per token in English)"""
+    return (len(text) + 3) // 4
+
+
+def pack_passages(passages: Sequence[Passage], budget: int) -> Tuple[List[Passage], int]:
+    """Highest-scoring passages that fit in budget tokens, and how many were dropped"""
+    ranked = sorted(passages, key=lambda passage: -passage[2])
+    packed = []
+    used = 0
+    for passage in ranked:
+        cost = count_tokens(passage[1]) + 4
+        if used + cost > budget:
+            break
+        packed.append(passage)
+        used += cost
+    return packed, len(ranked) - len(packed)
+
+
+def build_messages(question: str, knowledge: str, passages: Sequence[Passage]) -> Messages:
+    context = "\n".join(f"[Page {page}] {text}" for page, text, _ in passages)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"Department information:\n{knowledge}\n\nProspectus passages:\n{context}\n\nQuestion: {question}",
+        },
+    ]
+
+
+class EchoBackend:
+    """Deterministic stand-in model: quotes the first sentence of each passage
+
+    latency adds a fixed delay before the first chunk, to stand in for model
+    time in benchmarks.
+    """
+
+    name = "echo"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        question = _QUESTION_LINE.search(prompt)
+        yield f"Answer to \"{question.group(1) if question else ''}\":\n"
+        for page, text in _PASSAGE_LINE.findall(prompt):
+            sentence = _SENTENCE_END.split(text, 1)[0]
+            yield f"- {sentence} (p. {page})\n"
+
+
+class OllamaBackend:
+    """Chat model served by a local Ollama instance"""
+
+    name = "ollama"
+
+    def __init__(self, model: str, host: Optional[str] = None, max_tokens: int = 400):
+        self.model = model
+        self.host = host or None
+        self.max_tokens = max_tokens
+        self._client = None
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        if self._client is None:
+            from ollama import AsyncClient
+
+            self._client = AsyncClient(host=self.host)
+        parts = await self._client.chat(
+            model=self.model, messages=messages, stream=True, options={"num_predict": self.max_tokens}
+        )
+        async for part in parts:
+            content = part["message"]["content"]
+            if content:
+                yield content
+
+
+class OpenAIBackend:
+    """OpenAI-compatible chat completions (the API key comes from OPENAI_API_KEY)"""
+
+    name = "openai"
+
+    def __init__(self, model: str, base_url: Optional[str] = None, max_tokens: int = 400):
+        self.model = model
+        self.base_url = base_url or None
+        self.max_tokens = max_tokens
+        self._client = None
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(base_url=self.base_url)
+        chunks = await self._client.chat.completions.create(
+            model=self.model, messages=messages, max_tokens=self.max_tokens, stream=True
+        )
+        async for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def make_backend(name: str, model: str = "", base_url: str = "", max_tokens: int = 400):
+    if name == "echo":
+        return EchoBackend()
+    if name == "ollama":
+        return OllamaBackend(model, base_url, max_tokens)
+    if name == "openai":
+        return OpenAIBackend(model, base_url, max_tokens)
+    raise ValueError(f"Unknown generation backend {name!r}, expected echo, ollama or openai")
+
+
+class _Broadcast:
+    """One backend stream replayed to every caller that joins it"""
+
+    def __init__(self, source: AsyncIterator[str], limiter=None):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._event = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source, limiter))
+
+    async def _pump(self, source: AsyncIterator[str], limiter):
+        try:
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                async for chunk in source:
+                    self.chunks.append(chunk)
+                    self._wake()
+            finally:
+                if limiter is not None:
+                    limiter.release()
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._wake()
+
+    def _wake(self):
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def follow(self, timeout: float) -> AsyncIterator[str]:
+        position = 0
+        while True:
+            while position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await asyncio.wait_for(self._event.wait(), timeout)
+
+
+class Generator:
+    """Budgeted prompts and single-flight generation over a backend
+
+    A limiter (admission.StageLimiter) caps concurrent backend calls; callers
+    that join a generation already in flight do not take a slot.
+    """
+
+    def __init__(self, backend, context_tokens: int = 1500, timeout: float = 30.0, coalesce: bool = True, limiter=None):
+        self.backend = backend
+        self.context_tokens = context_tokens
+        self.timeout = timeout
+        self.coalesce = coalesce
+        self.limiter = limiter
+        self._inflight: Dict[str, _Broadcast] = {}
+        self.counts = {"generations": 0, "coalesced": 0, "failures": 0, "passages_packed": 0, "passages_dropped": 0}
+
+    def prompt(self, question: str, knowledge: str, passages: Sequence[Passage]) -> Tuple[Messages, List[Passage]]:
+        """Chat messages for a question and the passages that made it into them"""
+        packed, dropped = pack_passages(passages, self.context_tokens)
+        self.counts["passages_packed"] += len(packed)
+        self.counts["passages_dropped"] += dropped
+        return build_messages(question, knowledge, packed), packed
+
+    def _join(self, messages: Messages) -> _Broadcast:
+        key = json.dumps(messages, ensure_ascii=False)
+        broadcast = self._inflight.get(key) if self.coalesce else None
+        if broadcast is not None:
+            self.counts["coalesced"] += 1
+            return broadcast
+
+        self.counts["generations"] += 1
+        broadcast = _Broadcast(self.backend.stream(messages), self.limiter)
+        if self.coalesce:
+            self._inflight[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return broadcast
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        """Chunks of the answer; a stalled backend raises asyncio.TimeoutError"""
+        try:
+            async for chunk in self._join(messages).follow(self.timeout):
+                yield chunk
+        except Exception:
+            self.counts["failures"] += 1
+            raise
+
+    async def generate(self, messages: Messages) -> str:
+        return "".join([chunk async for chunk in self.stream(messages)])
+
+    def stats(self) -> Dict:
+        return {"backend": self.backend.name, "in_flight": len(self._inflight), **self.counts}
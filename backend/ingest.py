@@ -0,0 +1,300 @@
+# backend/ingest.py
+"""Build the prospectus index from a PDF
+
+    python ingest.py path/to/UET_Prospectus.pdf
+
+Pages are streamed one at a time, chunked, embedded in fixed-size batches
+and appended straight to the index file, so memory stays bounded by the
+batch size. Chunks are written both as the JSON list and as the binary
+chunk store (see chunkstore.py), and a BM25 index and a section tree are
+built over them (see lexical.py and sections.py). The serving index type
+recorded in the metadata sidecar (see vector_index.py) is rebuilt from the
+new flat index. Per-page content hashes are kept in a manifest; re-ingesting
+a new edition re-embeds only pages whose text changed.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from chunkstore import ChunkStoreWriter
+from config import settings
+from lexical import LexicalIndexBuilder
+from retrieval import FlatIndexWriter, SentenceEncoder, load_flat_index, open_chunk_store
+from sections import SectionTreeBuilder, sections_path_for
+from vector_index import INDEX_TYPES, build_index, read_meta
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path_for(index_path: Path) -> Path:
+    return index_path.with_name(index_path.stem + "_manifest.json")
+
+
+def read_pdf_pages(pdf_path: Path) -> Iterator[Tuple[int, str]]:
+    """Yield (page number, text) one page at a time"""
+    try:
+        import fitz
+
+        with fitz.open(pdf_path) as document:
+            for number, page in enumerate(document, 1):
+                yield number, page.get_text()
+        return
+    except ImportError:
+        pass
+
+    from pypdf import PdfReader
+
+    reader = PdfReader(str(pdf_path))
+    for number, page in enumerate(reader.pages, 1):
+        yield number, page.extract_text() or ""
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def page_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_page(text: str, max_chars: int) -> List[Dict]:
+    """Split a normalized page into chunks of at most max_chars at sentence or word boundaries"""
+    if not text:
+        return []
+
+    chunks = []
+    while len(text) > max_chars:
+        cut = text.rfind(". ", 0, max_chars)
+        if cut < max_chars // 2:
+            cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        else:
+            cut += 1
+        chunks.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        chunks.append(text)
+
+    # A page holding only a short title (e.g. "Departments") opens a section
+    is_header = len(chunks) == 1 and len(chunks[0].split()) <= 12
+    return [{"text": chunk, "is_header": is_header} for chunk in chunks]
+
+
+class PreviousBuild:
+    """Vectors and chunks of the last build, addressed by page hash
+
+    Nothing is reused when the last build used another model or chunk size.
+    """
+
+    def __init__(self, index_path: Path, chunks_path: Path, manifest_path: Path, model: str, max_chars: int):
+        self.pages: Dict[str, Tuple[int, int]] = {}
+        self.vectors: Optional[np.ndarray] = None
+        self.chunks = None
+
+        if not (index_path.exists() and chunks_path.exists() and manifest_path.exists()):
+            return
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (manifest.get("version"), manifest.get("model"), manifest.get("max_chars")) != (MANIFEST_VERSION, model, max_chars):
+            return
+
+        self.vectors, _ = load_flat_index(index_path)
+        self.chunks = open_chunk_store(chunks_path)
+        for page in manifest["pages"]:
+            self.pages[page["hash"]] = (page["start"], page["end"])
+
+    def lookup(self, digest: str) -> Optional[Tuple[List[str], List[bool], np.ndarray]]:
+        span = self.pages.get(digest)
+        if span is None:
+            return None
+        start, end = span
+        texts = [self.chunks.text(i) for i in range(start, end)]
+        headers = [bool(self.chunks.is_header[i]) for i in range(start, end)]
+        return texts, headers, np.asarray(self.vectors[start:end])
+
+
+class ChunkWriter:
+    """Stream chunks to the JSON array format used by the retrieval engine"""
+
+    def __init__(self, path: Path):
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[")
+        self.count = 0
+
+    def add(self, chunk: Dict):
+        entry = json.dumps(chunk, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        self._file.write(("," if self.count else "") + "\n  " + entry)
+        self.count += 1
+
+    def close(self):
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+
+
+class Ingestor:
+    """Chunk, embed and append pages while reusing vectors of unchanged pages"""
+
+    def __init__(
+        self,
+        encoder,
+        index_path: Path,
+        chunks_path: Path,
+        batch_size: int = 64,
+        max_chars: int = 1500,
+        store_path: Optional[Path] = None,
+        lexical_path: Optional[Path] = None,
+        index_type: Optional[str] = None,
+        sections_path: Optional[Path] = None
+    ):
+        self.encoder = encoder
+        self.index_path = Path(index_path)
+        self.chunks_path = Path(chunks_path)
+        self.store_path = Path(store_path) if store_path else self.chunks_path.with_suffix(".bin")
+        self.lexical_path = Path(lexical_path) if lexical_path else self.index_path.with_name(self.index_path.stem + "_bm25.bin")
+        self.sections_path = Path(sections_path) if sections_path else sections_path_for(self.index_path)
+        self.manifest_path = manifest_path_for(self.index_path)
+        self.index_type = index_type
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        self.model = getattr(encoder, "model_name", type(encoder).__name__)
+        self.stats = {"pages": 0, "pages_reused": 0, "chunks": 0, "chunks_embedded": 0, "batches": 0}
+
+    def run(self, pages: Iterable[Tuple[int, str]]) -> Dict[str, int]:
+        previous_chunks = self.store_path if self.store_path.exists() else self.chunks_path
+        previous = PreviousBuild(self.index_path, previous_chunks, self.manifest_path, self.model, self.max_chars)
+        tmp_index = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp_chunks = self.chunks_path.with_name(self.chunks_path.name + ".tmp")
+        tmp_store = self.store_path.with_name(self.store_path.name + ".tmp")
+        tmp_lexical = self.lexical_path.with_name(self.lexical_path.name + ".tmp")
+        tmp_sections = self.sections_path.with_name(self.sections_path.name + ".tmp")
+
+        manifest_pages = []
+        pending: List[Tuple[Dict, Optional[np.ndarray]]] = []
+        chunk_writer = ChunkWriter(tmp_chunks)
+        store_writer = ChunkStoreWriter(tmp_store)
+        lexical_builder = LexicalIndexBuilder()
+        section_builder = SectionTreeBuilder()
+        index_writer: Optional[FlatIndexWriter] = None
+
+        def flush():
+            nonlocal index_writer
+            if not pending:
+                return
+            missing = [i for i, (_, vector) in enumerate(pending) if vector is None]
+            if missing:
+                encoded = self.encoder.encode([pending[i][0]["text"] for i in missing])
+                self.stats["batches"] += 1
+                self.stats["chunks_embedded"] += len(missing)
+                for i, vector in zip(missing, encoded):
+                    pending[i] = (pending[i][0], vector)
+
+            vectors = np.stack([vector for _, vector in pending]).astype(np.float32)
+            if index_writer is None:
+                index_writer = FlatIndexWriter(tmp_index, vectors.shape[1])
+            index_writer.add(vectors)
+            for chunk, _ in pending:
+                chunk_writer.add(chunk)
+                store_writer.add(chunk)
+                lexical_builder.add(chunk["text"])
+                section_builder.add(chunk["text"], chunk["page"], chunk["is_header"])
+            pending.clear()
+
+        try:
+            for number, raw_text in pages:
+                text = normalize_text(raw_text)
+                digest = page_hash(text)
+                start = chunk_writer.count + len(pending)
+                self.stats["pages"] += 1
+
+                reused = previous.lookup(digest)
+                if reused is not None:
+                    self.stats["pages_reused"] += 1
+                    texts, headers, vectors = reused
+                    for chunk_text, is_header, vector in zip(texts, headers, vectors):
+                        pending.append(({"text": chunk_text, "page": number, "is_header": is_header}, vector))
+                else:
+                    for chunk in chunk_page(text, self.max_chars):
+                        pending.append(({"text": chunk["text"], "page": number, "is_header": chunk["is_header"]}, None))
+
+                self.stats["chunks"] = chunk_writer.count + len(pending)
+                manifest_pages.append({"page": number, "hash": digest, "start": start, "end": self.stats["chunks"]})
+
+                if sum(vector is None for _, vector in pending) >= self.batch_size or len(pending) >= 4 * self.batch_size:
+                    flush()
+            flush()
+        finally:
+            chunk_writer.close()
+            store_writer.close()
+            if index_writer is not None:
+                index_writer.close()
+
+        if index_writer is None:
+            os.remove(tmp_chunks)
+            os.remove(tmp_store)
+            raise ValueError("No text found in the PDF")
+
+        lexical_builder.write(tmp_lexical)
+        self.stats["sections"] = sum(1 for _ in section_builder.write(tmp_sections).walk())
+        
+        # Release the old memory map before replacing the files it points at
+        del previous
+        os.replace(tmp_index, self.index_path)
+        os.replace(tmp_chunks, self.chunks_path)
+        os.replace(tmp_store, self.store_path)
+        os.replace(tmp_lexical, self.lexical_path)
+        os.replace(tmp_sections, self.sections_path)
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "model": self.model, "max_chars": self.max_chars, "pages": manifest_pages}, f, indent=2)
+        
+        # Keep serving the previously selected index type unless told otherwise
+        meta = read_meta(self.index_path)
+        index_type = self.index_type or (meta["type"] if meta else None)
+        if index_type is not None:
+            params = meta["params"] if meta and meta["type"] == index_type else None
+            build_index(self.index_path, index_type, params)
+
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the UET prospectus index from a PDF")
+    parser.add_argument("pdf", type=Path, help="Prospectus PDF")
+    parser.add_argument("--index", type=Path, default=settings.INDEX_PATH)
+    parser.add_argument("--chunks", type=Path, default=settings.CHUNKS_PATH)
+    parser.add_argument("--store", type=Path, default=settings.CHUNK_STORE_PATH)
+    parser.add_argument("--lexical", type=Path, default=settings.LEXICAL_INDEX_PATH)
+    parser.add_argument("--sections", type=Path, default=settings.SECTIONS_PATH)
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=None, help="serving index type (default: keep the current one)")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-chars", type=int, default=1500)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ingestor = Ingestor(
+        SentenceEncoder(args.model),
+        args.index,
+        args.chunks,
+        batch_size=args.batch_size,
+        max_chars=args.max_chars,
+        store_path=args.store,
+        lexical_path=args.lexical,
+        index_type=args.index_type,
+        sections_path=args.sections,
+    )
+    stats = ingestor.run(read_pdf_pages(args.pdf))
+
+    print(f"✅ Indexed {stats['chunks']} chunks from {stats['pages']} pages in {time.perf_counter() - started:.1f}s")
+    print(f"📑 Found {stats['sections']} sections")
+    print(f"♻️ Reused {stats['pages_reused']} unchanged pages, embedded {stats['chunks_embedded']} chunks in {stats['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# backend/knowledge_base.py
+"""Department facts from data/knowledge_base.json as immutable snapshots
+
+A KnowledgeBase holds the departments (department -> field -> items, all
+read-only) together with the answers rendered from them. A snapshot is
+built completely before it is published, and publishing is one reference
+assignment: a request that read agent.knowledge keeps a consistent view,
+and no request waits on or sees a half-built reload.
+"""
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+import asyncio
+import json
+import os
+
+from responses import ResponseTable
+
+LIST_FIELDS = ("facilities", "courses", "admission", "fees")
+TEXT_FIELDS = ("name", "description")
+
+
+class KnowledgeBase(NamedTuple):
+    departments: Mapping[str, Mapping[str, Any]]
+    responses: ResponseTable
+    version: int
+    # File the snapshot was read from ("" when passed in directly) and its mtime
+    source: str
+    mtime: float
+    build_seconds: float
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "mtime": self.mtime,
+            "departments": len(self.departments),
+            "answers": len(self.responses),
+            "build_seconds": round(self.build_seconds, 6),
+        }
+
+
+def freeze(department_info: Mapping[str, Mapping[str, Any]]) -> Mapping[str, Mapping[str, Any]]:
+    """Validated read-only copy: lists become tuples, mappings become proxies"""
+    if "general" not in department_info:
+        raise ValueError("Knowledge base needs a 'general' entry")
+    departments = {}
+    for department, fields in department_info.items():
+        if not isinstance(fields, Mapping):
+            raise ValueError(f"{department}: expected an object of fields")
+        frozen = {}
+        for field, value in fields.items():
+            if field in TEXT_FIELDS:
+                if not isinstance(value, str):
+                    raise ValueError(f"{department}.{field}: expected a string")
+                frozen[field] = value
+            elif field in LIST_FIELDS:
+                if isinstance(value, str) or not all(isinstance(item, str) for item in value):
+                    raise ValueError(f"{department}.{field}: expected a list of strings")
+                frozen[field] = tuple(value)
+            else:
+                raise ValueError(f"{department}: unknown field {field!r}")
+        departments[department] = MappingProxyType(frozen)
+    return MappingProxyType(departments)
+
+
+def read_knowledge_base(path: Path) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of the file, or None when it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def watch_file(
+    path: Path, interval: float, on_change: Callable[[], Awaitable[Any]], seen: Optional[Tuple[int, int]] = None
+):
+    """Call on_change whenever the file's signature differs from seen; runs until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        signature = file_signature(path)
+        if signature is None or signature == seen:
+            continue
+        seen = signature
+        try:
+            await on_change()
+        except Exception as e:
+            print(f"⚠️ Knowledge base reload failed, keeping the current version: {e}")
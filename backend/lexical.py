@@ -0,0 +1,176 @@
+# backend/lexical.py
+"""BM25 inverted index over the prospectus chunks
+
+    python lexical.py ../data/processed/faiss_index_chunks.bin ../data/processed/faiss_index_bm25.bin
+
+Layout (little-endian):
+    header    magic "UETBM251", chunk count, term count, posting count
+              (uint64 each), k1, b (float64)
+    tables    term offsets into the postings (uint64, terms + 1),
+              posting chunk ids (int32), posting BM25 weights (float32)
+    vocab     UTF-8 terms in id order, newline separated
+
+Weights are fully scored at build time (idf and length normalization
+included), so a query only gathers and sums the postings of its own terms.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import argparse
+import math
+import mmap
+import re
+import struct
+
+import numpy as np
+
+MAGIC = b"UETBM251"
+_HEADER = struct.Struct("<8sQQQdd")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class LexicalIndexBuilder:
+    """Collect term frequencies chunk by chunk and write the scored postings"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+
+    @property
+    def count(self) -> int:
+        return len(self._lengths)
+
+    def add(self, text: str):
+        chunk_id = len(self._lengths)
+        tokens = tokenize(text)
+        self._lengths.append(len(tokens))
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for term, tf in frequencies.items():
+            self._postings.setdefault(term, []).append((chunk_id, tf))
+
+    def write(self, path: Path):
+        count = len(self._lengths)
+        average = sum(self._lengths) / count if count else 0.0
+        terms = sorted(self._postings)
+
+        offsets = [0]
+        chunk_ids: List[int] = []
+        weights: List[float] = []
+        for term in terms:
+            postings = self._postings[term]
+            idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                norm = 1.0 - self.b + self.b * self._lengths[chunk_id] / average
+                chunk_ids.append(chunk_id)
+                weights.append(idf * tf * (self.k1 + 1.0) / (tf + self.k1 * norm))
+            offsets.append(len(chunk_ids))
+
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, count, len(terms), len(chunk_ids), self.k1, self.b))
+            f.write(np.asarray(offsets, dtype="<u8").tobytes())
+            f.write(np.asarray(chunk_ids, dtype="<i4").tobytes())
+            f.write(np.asarray(weights, dtype="<f4").tobytes())
+            f.write("\n".join(terms).encode("utf-8"))
+
+
+class LexicalIndex:
+    """Read-only BM25 index whose postings stay in a memory map"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, terms, postings, self.k1, self.b = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a lexical index")
+
+        self._count = count
+        offset = _HEADER.size
+        self._offsets = np.frombuffer(self._mm, dtype="<u8", count=terms + 1, offset=offset)
+        offset += 8 * (terms + 1)
+        self._chunk_ids = np.frombuffer(self._mm, dtype="<i4", count=postings, offset=offset)
+        offset += 4 * postings
+        self._weights = np.frombuffer(self._mm, dtype="<f4", count=postings, offset=offset)
+        offset += 4 * postings
+        vocab = self._mm[offset:].decode("utf-8")
+        self._terms = {term: i for i, term in enumerate(vocab.split("\n"))} if terms else {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._terms)
+
+    def search(self, query: str, k: int, ids: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (chunk_id, score); work grows with the postings of the query terms
+
+        With ids (sorted chunk ids, e.g. one department's), only those chunks
+        are ranked.
+        """
+        slices = []
+        for term in set(tokenize(query)):
+            term_id = self._terms.get(term)
+            if term_id is not None:
+                slices.append((int(self._offsets[term_id]), int(self._offsets[term_id + 1])))
+        if not slices or k <= 0:
+            return []
+
+        chunk_ids = np.concatenate([self._chunk_ids[start:end] for start, end in slices])
+        weights = np.concatenate([self._weights[start:end] for start, end in slices])
+        if ids is not None:
+            keep = np.isin(chunk_ids, ids)
+            chunk_ids = chunk_ids[keep]
+            weights = weights[keep]
+            if not len(chunk_ids):
+                return []
+        candidates, positions = np.unique(chunk_ids, return_inverse=True)
+        scores = np.bincount(positions, weights=weights)
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int, rrf_k: int = 60) -> List[Tuple[int, float]]:
+    """Merge ranked chunk id lists by summing 1 / (rrf_k + rank)"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, 1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def build_lexical_index(path: Path, texts: Iterable[str]) -> int:
+    builder = LexicalIndexBuilder()
+    for text in texts:
+        builder.add(text)
+    builder.write(path)
+    return builder.count
+
+
+def main():
+    from retrieval import open_chunk_store
+
+    parser = argparse.ArgumentParser(description="Build the BM25 index for a chunk store or JSON chunk list")
+    parser.add_argument("chunks_path", type=Path)
+    parser.add_argument("index_path", type=Path)
+    args = parser.parse_args()
+
+    chunks = open_chunk_store(args.chunks_path)
+    count = build_lexical_index(args.index_path, (chunks.text(i) for i in range(len(chunks))))
+    index = LexicalIndex(args.index_path)
+    print(f"✅ Indexed {count} chunks, {index.vocabulary_size} terms ({args.index_path.stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
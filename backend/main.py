@@ -1,18 +1,261 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+import hmac
+import json
+import math
+import time
 import uvicorn
 
+from admission import Overloaded
 from mcp_agent import MCPAgent
+from mcp_server import AgentTools
 from config import settings
+from metrics import FALLBACKS, IN_FLIGHT, QUERIES, REGISTRY, REQUEST_SECONDS
+
+# Initialize agent ONCE; the prospectus index is opened at startup
+agent = MCPAgent({
+    "DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS,
+    "DEPARTMENT_ROUTES": settings.DEPARTMENT_ROUTES,
+    "QUERY_TYPE_ROUTES": settings.QUERY_TYPE_ROUTES,
+    "KNOWLEDGE_BASE_PATH": settings.KNOWLEDGE_BASE_PATH,
+    "KNOWLEDGE_BASE_WATCH_SECONDS": settings.KNOWLEDGE_BASE_WATCH_SECONDS,
+    "RETRIEVAL_ENABLED": settings.RETRIEVAL_ENABLED,
+    "INDEX_PATH": settings.INDEX_PATH,
+    "CHUNKS_PATH": settings.CHUNKS_PATH,
+    "CHUNK_STORE_PATH": settings.CHUNK_STORE_PATH,
+    "LEXICAL_INDEX_PATH": settings.LEXICAL_INDEX_PATH,
+    "EMBEDDING_MODEL": settings.EMBEDDING_MODEL,
+    "RETRIEVAL_TOP_K": settings.RETRIEVAL_TOP_K,
+    "WARMUP_ENABLED": settings.WARMUP_ENABLED,
+    "EMBEDDING_CACHE_SIZE": settings.EMBEDDING_CACHE_SIZE,
+    "HYBRID_ENABLED": settings.HYBRID_ENABLED,
+    "HYBRID_CANDIDATES": settings.HYBRID_CANDIDATES,
+    "RRF_K": settings.RRF_K,
+    "SECTIONS_PATH": settings.SECTIONS_PATH,
+    "SECTION_DEPARTMENTS": settings.SECTION_DEPARTMENTS,
+    "SCOPED_SEARCH_ENABLED": settings.SCOPED_SEARCH_ENABLED,
+    "ROUTER_ENABLED": settings.ROUTER_ENABLED,
+    "ROUTER_PROTOTYPES_PATH": settings.ROUTER_PROTOTYPES_PATH,
+    "ROUTER_THRESHOLD": settings.ROUTER_THRESHOLD,
+    "ROUTER_MARGIN": settings.ROUTER_MARGIN,
+    "QUERY_LOG_ENABLED": settings.QUERY_LOG_ENABLED,
+    "QUERY_LOG_DIR": settings.QUERY_LOG_DIR,
+    "QUERY_LOG_CAPACITY": settings.QUERY_LOG_CAPACITY,
+    "QUERY_LOG_BATCH_SIZE": settings.QUERY_LOG_BATCH_SIZE,
+    "QUERY_LOG_FLUSH_SECONDS": settings.QUERY_LOG_FLUSH_SECONDS,
+    "QUERY_LOG_MAX_FILE_BYTES": settings.QUERY_LOG_MAX_FILE_BYTES,
+    "QUERY_LOG_MAX_FILES": settings.QUERY_LOG_MAX_FILES,
+    "BATCHING_ENABLED": settings.BATCHING_ENABLED,
+    "BATCH_WINDOW_MS": settings.BATCH_WINDOW_MS,
+    "BATCH_MAX_SIZE": settings.BATCH_MAX_SIZE,
+    "SESSION_MAX_ENTRIES": settings.SESSION_MAX_ENTRIES,
+    "SESSION_TTL_SECONDS": settings.SESSION_TTL_SECONDS,
+    "SESSION_MAX_BYTES": settings.SESSION_MAX_BYTES,
+    "SEMANTIC_CACHE_ENABLED": settings.SEMANTIC_CACHE_ENABLED,
+    "SEMANTIC_CACHE_SIZE": settings.SEMANTIC_CACHE_SIZE,
+    "SEMANTIC_CACHE_THRESHOLD": settings.SEMANTIC_CACHE_THRESHOLD,
+    "ADMISSION_ENABLED": settings.ADMISSION_ENABLED,
+    "ADMISSION_LIMITS": settings.ADMISSION_LIMITS,
+    "ADMISSION_QUEUE": settings.ADMISSION_QUEUE,
+    "ADMISSION_TIMEOUTS": settings.ADMISSION_TIMEOUTS,
+    "GENERATION_BACKEND": settings.GENERATION_BACKEND,
+    "GENERATION_MODEL": settings.GENERATION_MODEL,
+    "GENERATION_BASE_URL": settings.GENERATION_BASE_URL,
+    "GENERATION_CONTEXT_TOKENS": settings.GENERATION_CONTEXT_TOKENS,
+    "GENERATION_MAX_TOKENS": settings.GENERATION_MAX_TOKENS,
+    "GENERATION_TIMEOUT_SECONDS": settings.GENERATION_TIMEOUT_SECONDS
+})
+
+EMBEDDING_CACHE_LOOKUPS = REGISTRY.counter(
+    "uet_embedding_cache_lookups_total", "Query embedding cache lookups", ["result"]
+)
+EMBEDDING_CACHE_ENTRIES = REGISTRY.gauge(
+    "uet_embedding_cache_entries", "Query embeddings held in the cache"
+)
+BATCH_QUEUE_PENDING = REGISTRY.gauge(
+    "uet_retrieval_batch_pending", "Queries waiting for the next embedding batch"
+)
+SESSION_LOOKUPS = REGISTRY.counter(
+    "uet_session_lookups_total", "Session context lookups", ["result"]
+)
+SESSION_EVICTIONS = REGISTRY.counter(
+    "uet_session_evictions_total", "Session contexts dropped", ["reason"]
+)
+SESSION_FOLLOW_UPS = REGISTRY.counter(
+    "uet_session_follow_ups_total", "Follow-up questions resolved from session context", ["retrieval"]
+)
+SESSIONS = REGISTRY.gauge("uet_sessions", "Live session contexts")
+SESSION_BYTES = REGISTRY.gauge("uet_session_bytes", "Approximate bytes held by session contexts")
+ANSWER_CACHE_LOOKUPS = REGISTRY.counter(
+    "uet_answer_cache_lookups_total", "Semantic answer cache lookups", ["result"]
+)
+ANSWER_CACHE_EVICTIONS = REGISTRY.counter(
+    "uet_answer_cache_evictions_total", "Cached answers dropped", ["reason"]
+)
+ANSWER_CACHE_ENTRIES = REGISTRY.gauge("uet_answer_cache_entries", "Answers held in the semantic cache")
+ANSWER_CACHE_SAVED = REGISTRY.counter(
+    "uet_answer_cache_saved_seconds_total", "Retrieval and rendering time skipped by cache hits"
+)
+GENERATION_REQUESTS = REGISTRY.counter(
+    "uet_generation_requests_total", "Answer generation requests", ["result"]
+)
+GENERATION_PASSAGES = REGISTRY.counter(
+    "uet_generation_passages_total", "Retrieved passages offered to the generator", ["result"]
+)
+GENERATION_IN_FLIGHT = REGISTRY.gauge("uet_generation_in_flight", "Distinct generations running")
+KNOWLEDGE_BASE_VERSION = REGISTRY.gauge("uet_knowledge_base_version", "Reloads of the knowledge base since start, plus one")
+KNOWLEDGE_BASE_BUILD_SECONDS = REGISTRY.gauge(
+    "uet_knowledge_base_build_seconds", "Time to build the current knowledge base snapshot"
+)
+QUERY_LOG_RECORDS = REGISTRY.counter(
+    "uet_query_log_records_total", "Query log records by outcome", ["result"]
+)
+QUERY_LOG_PENDING = REGISTRY.gauge("uet_query_log_pending", "Query log records waiting to be written")
+QUERY_LOG_FLUSH_SECONDS = REGISTRY.counter(
+    "uet_query_log_flush_seconds_total", "Time spent compressing and writing query log batches"
+)
+
+def collect_agent_metrics():
+    """Copy component counters into the registry at scrape time"""
+    if agent.retriever is not None:
+        stats = agent.retriever.stats()
+        EMBEDDING_CACHE_LOOKUPS.labels("hit").value = stats["cache_hits"]
+        EMBEDDING_CACHE_LOOKUPS.labels("miss").value = stats["cache_misses"]
+        EMBEDDING_CACHE_ENTRIES.labels().set(stats["cache_entries"])
+    if agent.batcher is not None:
+        BATCH_QUEUE_PENDING.labels().set(agent.batcher.stats()["pending"])
+    
+    KNOWLEDGE_BASE_VERSION.labels().set(agent.knowledge.version)
+    KNOWLEDGE_BASE_BUILD_SECONDS.labels().set(agent.knowledge.build_seconds)
+    
+    sessions = agent.sessions.stats()
+    for result, key in (("hit", "hits"), ("miss", "misses"), ("expired", "expired")):
+        SESSION_LOOKUPS.labels(result).value = sessions[key]
+    for reason in ("lru", "ttl", "memory"):
+        SESSION_EVICTIONS.labels(reason).value = sessions[f"evicted_{reason}"]
+    SESSION_FOLLOW_UPS.labels("reused").value = sessions["reused_retrievals"]
+    SESSION_FOLLOW_UPS.labels("fresh").value = sessions["follow_ups"] - sessions["reused_retrievals"]
+    SESSIONS.labels().set(sessions["sessions"])
+    SESSION_BYTES.labels().set(sessions["bytes"])
+    
+    if agent.answer_cache is not None:
+        cache = agent.answer_cache.stats()
+        ANSWER_CACHE_LOOKUPS.labels("hit").value = cache["hits"]
+        ANSWER_CACHE_LOOKUPS.labels("miss").value = cache["misses"]
+        ANSWER_CACHE_EVICTIONS.labels("lru").value = cache["evicted_lru"]
+        ANSWER_CACHE_EVICTIONS.labels("invalidated").value = cache["invalidated"]
+        ANSWER_CACHE_ENTRIES.labels().set(cache["entries"])
+        ANSWER_CACHE_SAVED.labels().value = cache["saved_seconds"]
+    
+    if agent.generator is not None:
+        generation = agent.generator.stats()
+        GENERATION_REQUESTS.labels("generated").value = generation["generations"]
+        GENERATION_REQUESTS.labels("coalesced").value = generation["coalesced"]
+        GENERATION_REQUESTS.labels("failed").value = generation["failures"]
+        GENERATION_PASSAGES.labels("packed").value = generation["passages_packed"]
+        GENERATION_PASSAGES.labels("dropped").value = generation["passages_dropped"]
+        GENERATION_IN_FLIGHT.labels().set(generation["in_flight"])
+    
+    if agent.query_log is not None:
+        query_log = agent.query_log.stats()
+        for result in ("recorded", "dropped", "written"):
+            QUERY_LOG_RECORDS.labels(result).value = query_log[result]
+        QUERY_LOG_PENDING.labels().set(query_log["pending"])
+        QUERY_LOG_FLUSH_SECONDS.labels().value = query_log["flush_seconds"]
+
+REGISTRY.add_collector(collect_agent_metrics)
+
+# The MCP tools, dispatched in-process for the /tools endpoints
+tools = AgentTools(agent)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware tracking in-flight requests and latency per route
+    
+    Unknown paths share the "other" label so scanners cannot blow up the
+    number of series.
+    """
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+        self._children = {}
+    
+    def _metrics_for(self, path: str, method: str):
+        children = self._children.get((path, method))
+        if children is None:
+            label = path if any(route.path == path for route in self.routes) else "other"
+            children = (IN_FLIGHT.labels(label), REQUEST_SECONDS.labels(label, method))
+            if label != "other":
+                self._children[(path, method)] = children
+        return children
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        in_flight, latency = self._metrics_for(scope["path"], scope["method"])
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            latency.observe(time.perf_counter() - started)
+            in_flight.dec()
+
+# Endpoints that run the query pipeline and go through the request stage
+ADMITTED_PATHS = frozenset(["/chat", "/chat/stream", "/chat/batch", "/tools/call"])
+
+class AdmissionMiddleware:
+    """Holds a request-stage slot for the whole response, streams included
+    
+    An overloaded request stage is answered at once with 429 (queue full)
+    or 503 (waited past the deadline) and a Retry-After header.
+    """
+    def __init__(self, app, admission, paths=ADMITTED_PATHS):
+        self.app = app
+        self.limiter = admission.stages["request"]
+        self.paths = paths
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.limiter.acquire()
+        except Overloaded as e:
+            body = json.dumps({"detail": str(e), "stage": e.stage, "reason": e.reason}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": e.status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(math.ceil(e.retry_after)).encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy components load off the import path, in a startup task
+    await agent.initialize(background=settings.BACKGROUND_STARTUP)
+    yield
+    await agent.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
     title="UET Department AI Agent",
     description="Reliable AI Agent for UET Department Information",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -23,9 +266,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Initialize agent ONCE (no startup event issues)
-agent = MCPAgent({"DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS})
+app.add_middleware(AdmissionMiddleware, admission=agent.admission)
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
 
 # Pydantic models
 class ChatRequest(BaseModel):
@@ -45,7 +287,14 @@ async def root():
         "status": "operational",
         "endpoints": {
             "POST /chat": "Ask about UET departments",
-            "GET /health": "Check service health"
+            "POST /chat/stream": "Ask about UET departments (server-sent events)",
+            "POST /chat/batch": "Answer many questions (JSONL in, JSONL out)",
+            "GET /tools": "MCP tool schemas",
+            "POST /tools/call": "Run MCP tools concurrently",
+            "POST /admin/knowledge-base/reload": "Reload the department knowledge base",
+            "GET /health": "Liveness check",
+            "GET /ready": "Readiness and component load times",
+            "GET /metrics": "Prometheus metrics"
         }
     }
 
@@ -54,7 +303,14 @@ async def chat_endpoint(request: ChatRequest):
     """Chat endpoint - GUARANTEED to work"""
     try:
         # Process query
-        result = await agent.process_query(request.message)
+        result, template = await agent.answer_query(request.message, request.session_id)
+        
+        # Pre-rendered answers go out as pre-encoded JSON
+        if template is not None:
+            return Response(
+                content=agent.responses.body(template, request.session_id),
+                media_type="application/json"
+            )
         
         return ChatResponse(
             response=result["response"],
@@ -65,6 +321,7 @@ async def chat_endpoint(request: ChatRequest):
         
     except Exception as e:
         # Ultimate fallback - should never reach here
+        FALLBACKS.labels("chat_endpoint").inc()
         return ChatResponse(
             response=f"""## UET Department Information
 
@@ -88,16 +345,216 @@ I'm here to help with UET department information. Based on your query, here's wh
             session_id=request.session_id
         )
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Chat endpoint streaming the answer as server-sent events"""
+    async def events():
+        started = time.perf_counter()
+        async for event, data in agent.stream_query(request.message, request.session_id):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        done = {
+            "session_id": request.session_id,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Streaming response that leaves the request body to the generator
+    
+    StreamingResponse normally listens for a client disconnect on receive(),
+    which would consume the body messages /chat/batch is still reading.
+    """
+    media_type = "application/x-ndjson"
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+async def read_jsonl(request: Request):
+    """Yield decoded JSON lines from the request body as it arrives"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(request: Request):
+    """Bulk chat endpoint - JSONL in, JSONL out
+    
+    Each input line is {"message": ..., "session_id": ...}. Lines are answered
+    in chunks with one batched embedding and search per chunk, and results
+    are streamed back in input order, so memory stays flat for large batches.
+    """
+    async def answer(items):
+        messages = [item.get("message", "") for item in items if "error" not in item]
+        results = iter(await agent.process_queries(messages)) if messages else iter(())
+        lines = []
+        for item in items:
+            if "error" in item:
+                lines.append(json.dumps(item))
+                continue
+            result = next(results)
+            lines.append(json.dumps({
+                "index": item["index"],
+                "response": result["response"],
+                "is_department_related": result["is_department_related"],
+                "sources": result["sources"],
+                "session_id": item.get("session_id")
+            }, ensure_ascii=False))
+        return "\n".join(lines) + "\n"
+    
+    async def results():
+        items = []
+        index = 0
+        async for line in read_jsonl(request):
+            try:
+                item = json.loads(line)
+                if not isinstance(item, dict) or not isinstance(item.get("message"), str):
+                    raise ValueError("expected an object with a string 'message'")
+                item["index"] = index
+            except ValueError as e:
+                item = {"index": index, "error": f"invalid line: {e}"}
+            items.append(item)
+            index += 1
+            if len(items) >= settings.BULK_CHUNK_SIZE:
+                yield await answer(items)
+                items = []
+        if items:
+            yield await answer(items)
+    
+    return NDJSONStreamingResponse(results())
+
+class ToolCall(BaseModel):
+    name: str
+    arguments: Dict[str, Any] = {}
+
+class ToolCallRequest(BaseModel):
+    calls: List[ToolCall]
+
+@app.get("/tools")
+async def list_tools():
+    """Schemas of the agent's MCP tools (also served over stdio by mcp_server.py)"""
+    return {"tools": tools.schemas()}
+
+@app.post("/tools/call")
+async def call_tools(request: ToolCallRequest):
+    """Run independent tool calls concurrently, results in request order"""
+    results = await tools.call_many([(call.name, call.arguments) for call in request.calls])
+    return {"results": results}
+
+# Fallback sites that also count their queries in QUERIES; a failed
+# generation still answers from the template, and a /chat fallback may
+# follow a query the agent already counted, so neither enters the ratio
+QUERY_FALLBACK_SITES = ("process_query", "stream_query", "process_queries")
+
 @app.get("/health")
 async def health_check():
-    """Health check - ALWAYS returns healthy"""
+    """Liveness check - ALWAYS returns healthy while the process serves (see /ready)"""
+    # Share of queries answered without an exception fallback
+    queries = QUERIES.total()
+    fallbacks = sum(FALLBACKS.labels(site).value for site in QUERY_FALLBACK_SITES)
+    reliability = max(0.0, 1.0 - fallbacks / queries) if queries else 1.0
     return {
         "status": "healthy",
         "service": "UET AI Agent",
         "version": "1.0.0",
-        "reliability": "100%"
+        "reliability": f"{reliability:.2%}",
+        "queries": int(queries),
+        "fallbacks": int(fallbacks)
     }
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness: 503 until startup has loaded and warmed up the components"""
+    if not agent.ready:
+        response.status_code = 503
+    return {
+        "ready": agent.ready,
+        "degraded": any(component["status"] == "failed" for component in agent.components.values()),
+        "components": agent.components
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of the agent metrics"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/stats/batching")
+async def batching_stats():
+    """Batch-size histogram of the query embedding scheduler"""
+    if agent.batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **agent.batcher.stats()}
+
+@app.get("/stats/answer-cache")
+async def answer_cache_stats():
+    """Hit rate and time saved by the semantic answer cache"""
+    if agent.answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **agent.answer_cache.stats()}
+
+@app.get("/stats/admission")
+async def admission_stats():
+    """Slots in use, queue depth, admissions and shed callers per stage"""
+    return agent.admission.stats()
+
+@app.get("/stats/generation")
+async def generation_stats():
+    """Generations run, coalesced and failed, and passages dropped by the token budget"""
+    if agent.generator is None:
+        return {"enabled": False}
+    return {"enabled": True, **agent.generator.stats()}
+
+@app.get("/stats/router")
+async def router_stats():
+    """Questions routed and how many labels the embedding router decided"""
+    if agent.router is None:
+        return {"enabled": False}
+    return {"enabled": True, **agent.router.stats()}
+
+@app.get("/stats/query-log")
+async def query_log_stats():
+    """Records logged, dropped and written, and the time spent writing them"""
+    if agent.query_log is None:
+        return {"enabled": False}
+    return {"enabled": True, **agent.query_log.stats()}
+
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+def check_admin_token(request: Request, token: Optional[str]):
+    """Require ADMIN_TOKEN when it is set; without one only loopback clients are admitted"""
+    if settings.ADMIN_TOKEN:
+        if not hmac.compare_digest((token or "").encode(), settings.ADMIN_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif request.client is None or request.client.host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="Set ADMIN_TOKEN to use admin endpoints from other hosts")
+
+@app.get("/admin/knowledge-base")
+async def knowledge_base_info(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Version, source file and build time of the live knowledge base"""
+    check_admin_token(request, x_admin_token)
+    return agent.knowledge.info()
+
+@app.post("/admin/knowledge-base/reload")
+async def reload_knowledge_base(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Rebuild the knowledge base from its file in the background and swap it in"""
+    check_admin_token(request, x_admin_token)
+    try:
+        knowledge = await agent.reload_knowledge_base_async()
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Knowledge base not reloaded: {e}")
+    return knowledge.info()
+
 @app.get("/departments")
 async def list_departments():
     """List all UET departments"""
@@ -0,0 +1,188 @@
+# backend/matcher.py
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import re
+
+GENERAL = "general"
+
+# (is_guardrail, department rank, query type rank)
+Role = Tuple[bool, Optional[int], Optional[int]]
+
+# Keywords this short ("it", "cs", "fee") are too ambiguous to inflect and
+# match only with their plurals; longer ones also match their inflections
+MAX_EXACT_LENGTH = 3
+
+_VOWELS = "aeiou"
+
+# Words matched by a `*` keyword are resolved once and remembered, up to this many
+RESOLVED_CACHE_SIZE = 4096
+
+
+class QueryMatch(NamedTuple):
+    is_department_related: bool
+    department: str
+    query_type: str
+
+
+def _word_forms(word: str) -> List[str]:
+    """A keyword and its plural forms"""
+    if word.endswith("y") and len(word) > 2:
+        return [word, word[:-1] + "ies"]
+    if word.endswith(("s", "x", "ch", "sh")):
+        return [word, word + "es"]
+    return [word, word + "s"]
+
+
+def _inflections(word: str) -> List[str]:
+    """A keyword with its plurals and regular inflections
+
+    Only a fixed set of suffixes is added ("apply": "applies", "applied",
+    "applying", "application"), so unrelated words that merely start with
+    the keyword ("apples") do not match.
+    """
+    forms = _word_forms(word)
+    if word.endswith("y"):
+        stem = word[:-1]
+        forms += [stem + "ied", word + "ing", stem + "ication", stem + "ications"]
+    elif word.endswith("e"):
+        stem = word[:-1]
+        forms += [word + "d", stem + "ing", stem + "al", stem + "ation", stem + "ations"]
+    else:
+        forms += [word + "ed", word + "ing", word + "al", word + "ation", word + "ations"]
+        if word[-1] not in _VOWELS + "wxy" and word[-2] in _VOWELS and word[-3] not in _VOWELS:
+            # A final consonant is doubled ("programming", "programmes")
+            doubled = word + word[-1]
+            forms += [doubled + "ed", doubled + "ing", doubled + "e", doubled + "es"]
+    return forms
+
+
+def _merge(a: Role, b: Role) -> Role:
+    """Role of a word matched by two keywords: the earliest rule of each kind wins"""
+    return (
+        a[0] or b[0],
+        min((rank for rank in (a[1], b[1]) if rank is not None), default=None),
+        min((rank for rank in (a[2], b[2]) if rank is not None), default=None),
+    )
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Factor literal alternatives into a character trie so the regex engine
+    never retries a shared prefix"""
+    trie: Dict[str, Dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Dict]) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + emit(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return emit(trie)
+
+
+class QueryMatcher:
+    """Single-pass keyword matcher for the guardrail, department and query type
+
+    All keywords are compiled at startup into one word-boundary regex whose
+    alternation is factored as a character trie, so the query is scanned
+    once in C and only the matched keywords are resolved in Python. Short
+    keywords and phrases match as whole words with their plural forms, so
+    "it" does not fire on "with" nor "cs" on "physics". Longer keywords also
+    match their regular inflections ("applying", "programmes",
+    "architectural"), and `*` keywords match any word starting with them
+    ("laboratories"). A word matched by several keywords takes the roles of
+    all of them, and ties keep the original first-rule-wins order.
+    """
+
+    def __init__(
+        self,
+        guardrail_keywords: Iterable[str],
+        department_routes: Dict[str, List[str]],
+        query_type_routes: Dict[str, List[str]],
+    ):
+        roles: Dict[str, List] = {}
+
+        def role(term: str) -> List:
+            return roles.setdefault(" ".join(term.lower().split()), [False, None, None])
+
+        for term in guardrail_keywords:
+            role(term)[0] = True
+        for rank, terms in enumerate(department_routes.values()):
+            for term in terms:
+                entry = role(term)
+                if entry[1] is None:
+                    entry[1] = rank
+        for rank, terms in enumerate(query_type_routes.values()):
+            for term in terms:
+                entry = role(term)
+                if entry[2] is None:
+                    entry[2] = rank
+
+        self.departments = list(department_routes)
+        self.query_types = list(query_type_routes)
+
+        self._roles: Dict[str, Role] = {}
+        self._prefixes: Dict[str, Role] = {}
+        for term, entry in roles.items():
+            if term.endswith("*"):
+                prefix = term[:-1]
+                self._prefixes[prefix] = _merge(self._prefixes.get(prefix, (False, None, None)), tuple(entry))
+                continue
+            *head, last = term.split()
+            forms = _inflections(last) if not head and len(last) > MAX_EXACT_LENGTH else _word_forms(last)
+            for form in forms:
+                form = " ".join(head + [form])
+                self._roles[form] = _merge(self._roles.get(form, (False, None, None)), tuple(entry))
+        self._longest_prefix = max(map(len, self._prefixes), default=0)
+        self._resolved: Dict[str, Role] = {}
+        # A whole word may also start with a prefix keyword ("its" and "it*")
+        for form in self._roles:
+            self._roles[form] = self._resolve(form)
+
+        alternatives = [_trie_pattern(self._roles)]
+        if self._prefixes:
+            alternatives.append(_trie_pattern(self._prefixes) + r"\w*")
+        self._pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+        self._unmatched = len(self.departments) + len(self.query_types)
+
+    def _resolve(self, keyword: str) -> Role:
+        """Role of a matched phrase with irregular whitespace or of a word matched by a `*` keyword"""
+        keyword = " ".join(keyword.split())
+        role = self._roles.get(keyword, (False, None, None))
+        for end in range(1, min(len(keyword), self._longest_prefix) + 1):
+            prefix_role = self._prefixes.get(keyword[:end])
+            if prefix_role is not None:
+                role = _merge(role, prefix_role)
+        return role
+
+    def match(self, query: str) -> QueryMatch:
+        """Scan the query once and resolve all three classifications"""
+        related = False
+        department = query_type = self._unmatched
+
+        for keyword in self._pattern.findall(query.lower()):
+            role = self._roles.get(keyword) or self._resolved.get(keyword)
+            if role is None:
+                if len(self._resolved) >= RESOLVED_CACHE_SIZE:
+                    self._resolved.clear()
+                role = self._resolved[keyword] = self._resolve(keyword)
+            guard, dept_rank, type_rank = role
+            related = related or guard
+            if dept_rank is not None and dept_rank < department:
+                department = dept_rank
+            if type_rank is not None and type_rank < query_type:
+                query_type = type_rank
+
+        return QueryMatch(
+            related,
+            self.departments[department] if department < len(self.departments) else GENERAL,
+            self.query_types[query_type] if query_type < len(self.query_types) else GENERAL,
+        )
@@ -1,159 +1,461 @@
 # backend/mcp_agent.py
-from typing import Dict, Any, List
-import re
+from pathlib import Path
+from typing import Dict, Any, AsyncIterator, List, Optional, Sequence, Tuple
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from admission import DEGRADED, AdmissionController, Overloaded
+from batching import BATCH_SIZES, QueryBatcher
+from config import settings
+from generation import Generator, make_backend
+from knowledge_base import KnowledgeBase, file_signature, freeze, read_knowledge_base, watch_file
+from matcher import GENERAL, QueryMatch, QueryMatcher
+from metrics import FALLBACKS, QUERIES, REGISTRY, STAGE_SECONDS
+from query_log import QueryLog, QueryRecord
+from responses import OUT_OF_SCOPE, ResponseKey, ResponseTable
+from lexical import LexicalIndex, reciprocal_rank_fusion
+from router import EmbeddingRouter, read_prototypes
+from retrieval import Hit, RetrievalEngine, SentenceEncoder, make_hits, open_chunk_store
+from sections import PAGE_HEADER_PATTERN, SectionTree
+from vector_index import open_vector_index
+from semantic_cache import CachedAnswer, SemanticCache
+from sessions import SessionContext, SessionStore, is_follow_up
+
+DEPARTMENT_SOURCES = [
+    "UET Department Information Database",
+    "Academic Programs Catalog",
+    "Facilities & Infrastructure Guide"
+]
+
+OUT_OF_SCOPE_RESULT = {
+    "response": "I only answer department-related questions. Please ask about:\n- Department facilities (labs, equipment)\n- Admission requirements\n- Course programs\n- Fee structure\n- General department information",
+    "is_department_related": False,
+    "sources": ["UET Prospectus Guidelines"]
+}
+
+# Metric children resolved once; guardrail, department and query type share one scan
+_CLASSIFY = STAGE_SECONDS.labels("classify")
+_RETRIEVE = STAGE_SECONDS.labels("retrieve")
+_LEXICAL = STAGE_SECONDS.labels("lexical")
+_RENDER = STAGE_SECONDS.labels("render")
+_CACHE_LOOKUP = STAGE_SECONDS.labels("answer_cache")
+_GENERATE = STAGE_SECONDS.labels("generate")
+_ANSWERED = QUERIES.labels("answered")
+_REJECTED = QUERIES.labels("out_of_scope")
+_FALLBACK = QUERIES.labels("fallback")
+SEARCH_SCOPE = REGISTRY.counter("uet_search_scope_total", "Prospectus searches by scope", ["scope"])
+_SCOPED = SEARCH_SCOPE.labels("department")
+_UNSCOPED = SEARCH_SCOPE.labels("all")
+
+# Dummy questions run through the encoder and indexes before serving
+WARMUP_QUERIES = [
+    "computer science lab facilities",
+    "admission requirements for electrical engineering",
+    "fee structure and hostel charges",
+    "PhD programs in civil engineering",
+]
+
+def _scored(hits: List[Hit]) -> Tuple[Tuple[int, float], ...]:
+    return tuple((hit.chunk_id, hit.score) for hit in hits)
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Shallow copy whose sources list callers may extend"""
+    return {**result, "sources": list(result["sources"])}
 
 class MCPAgent:
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], encoder=None):
         self.config = config
-        self.department_info = self._get_department_database()
+        self.matcher = QueryMatcher(
+            config.get("DEPARTMENT_KEYWORDS", []),
+            config.get("DEPARTMENT_ROUTES", settings.DEPARTMENT_ROUTES),
+            config.get("QUERY_TYPE_ROUTES", settings.QUERY_TYPE_ROUTES)
+        )
+        self.knowledge_base_path = Path(config.get("KNOWLEDGE_BASE_PATH", settings.KNOWLEDGE_BASE_PATH))
+        self._knowledge_lock = threading.Lock()
+        self._knowledge_watch = None
+        self._knowledge_signature = None
+        self.knowledge = None
+        # Load status and time of each component, reported by /ready
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+        self._startup = None
+        self.encoder = encoder
+        self.retriever = None
+        self.lexical = None
+        self._chunks = None
+        # Sorted chunk ids of each department's prospectus sections
+        self.sections = None
+        self.partitions: Dict[str, np.ndarray] = {}
+        self.retrieval_error = None
+        self.router = None
+        self.batcher = None
+        self.sessions = SessionStore(
+            max_sessions=config.get("SESSION_MAX_ENTRIES", 100_000),
+            ttl=config.get("SESSION_TTL_SECONDS", 1800.0),
+            max_bytes=config.get("SESSION_MAX_BYTES", 96 * 1024 * 1024)
+        )
+        self.answer_cache = None
+        if config.get("SEMANTIC_CACHE_ENABLED", False):
+            self.answer_cache = SemanticCache(
+                max_entries=config.get("SEMANTIC_CACHE_SIZE", 1024),
+                threshold=config.get("SEMANTIC_CACHE_THRESHOLD", 0.85)
+            )
+        self.query_log = None
+        if config.get("QUERY_LOG_ENABLED", False):
+            self.query_log = QueryLog(
+                config.get("QUERY_LOG_DIR", settings.QUERY_LOG_DIR),
+                capacity=config.get("QUERY_LOG_CAPACITY", 10_000),
+                batch_size=config.get("QUERY_LOG_BATCH_SIZE", 512),
+                flush_interval=config.get("QUERY_LOG_FLUSH_SECONDS", 2.0),
+                max_bytes=config.get("QUERY_LOG_MAX_FILE_BYTES", 16 * 1024 * 1024),
+                max_files=config.get("QUERY_LOG_MAX_FILES", 50)
+            )
+        self.admission = AdmissionController.from_config(config)
+        self.generator = None
+        if config.get("GENERATION_BACKEND"):
+            self.generator = Generator(
+                make_backend(
+                    config["GENERATION_BACKEND"],
+                    config.get("GENERATION_MODEL", ""),
+                    config.get("GENERATION_BASE_URL", ""),
+                    config.get("GENERATION_MAX_TOKENS", 400)
+                ),
+                context_tokens=config.get("GENERATION_CONTEXT_TOKENS", 1500),
+                timeout=config.get("GENERATION_TIMEOUT_SECONDS", 30.0),
+                limiter=self.admission.stages["generation"]
+            )
+        self.reload_knowledge_base_file()
         
-    async def initialize(self):
-        """Initialize the agent"""
-        print("✅ MCP Agent Ready!")
+    def _record(self, component: str, started: float, error: Optional[Exception] = None):
+        self.components[component] = {
+            "status": "failed" if error is not None else "loaded",
+            "seconds": round(time.perf_counter() - started, 4)
+        }
+        if error is not None:
+            self.components[component]["error"] = str(error)
+    
+    def load(self):
+        """Load the chunk store, the BM25 index, the encoder and the vector index
         
+        Synchronous and free of event-loop state, so a serving parent can
+        call it once before forking workers that share the loaded data.
+        Lexical search keeps working when the encoder cannot be loaded.
+        """
+        if not self.config.get("RETRIEVAL_ENABLED", False):
+            self.components["retrieval"] = {"status": "disabled"}
+            return
+        if self.retriever is not None or self.retrieval_error is not None:
+            return
+        started = time.perf_counter()
+        try:
+            # Prefer the memory-mapped binary chunk store over the JSON list
+            chunks_path = self.config.get("CHUNK_STORE_PATH")
+            if chunks_path is None or not Path(chunks_path).exists():
+                chunks_path = self.config["CHUNKS_PATH"]
+            self._chunks = open_chunk_store(chunks_path)
+            self._record("chunk_store", started)
+        except Exception as e:
+            print(f"⚠️ Prospectus retrieval unavailable, using department database only: {e}")
+            self._record("chunk_store", started, e)
+            self.retrieval_error = str(e)
+            return
+        
+        lexical_path = self.config.get("LEXICAL_INDEX_PATH")
+        if self.config.get("HYBRID_ENABLED", False) and lexical_path is not None and Path(lexical_path).exists():
+            started = time.perf_counter()
+            try:
+                lexical = LexicalIndex(lexical_path)
+                if len(lexical) != len(self._chunks):
+                    raise ValueError(f"BM25 index has {len(lexical)} chunks but chunk store has {len(self._chunks)}")
+                self.lexical = lexical
+                self._record("lexical_index", started)
+                print(f"✅ BM25 index loaded ({lexical.vocabulary_size} terms)")
+            except Exception as e:
+                self._record("lexical_index", started, e)
+                print(f"⚠️ BM25 index unavailable: {e}")
+        else:
+            self.components["lexical_index"] = {"status": "disabled"}
+        
+        component = "encoder"
+        started = time.perf_counter()
+        try:
+            if self.encoder is None:
+                # Imports sentence-transformers (and torch) on first use
+                self.encoder = SentenceEncoder(self.config["EMBEDDING_MODEL"])
+            self._record(component, started)
+            component = "vector_index"
+            started = time.perf_counter()
+            # The index type (flat, sq8, ivf, hnsw, pq) comes from the metadata sidecar
+            self.retriever = RetrievalEngine(
+                open_vector_index(self.config["INDEX_PATH"]),
+                self._chunks,
+                self.encoder,
+                cache_size=self.config.get("EMBEDDING_CACHE_SIZE", 1024)
+            )
+            self._record(component, started)
+            print(f"✅ Prospectus index loaded ({len(self.retriever.chunks)} chunks, {self.retriever.index.index_type})")
+        except Exception as e:
+            fallback = "lexical search only" if self.lexical is not None else "department database only"
+            print(f"⚠️ Prospectus vector search unavailable, using {fallback}: {e}")
+            self._record(component, started, e)
+            self.retriever = None
+            self.retrieval_error = str(e)
+        self._load_router()
+        self._load_sections()
+    
+    def _load_router(self):
+        """Embed the routing prototypes once the encoder is loaded"""
+        if not self.config.get("ROUTER_ENABLED", False) or self.retriever is None:
+            self.components["router"] = {"status": "disabled"}
+            return
+        if self.router is not None:
+            return
+        started = time.perf_counter()
+        try:
+            departments, query_types = read_prototypes(self.config["ROUTER_PROTOTYPES_PATH"])
+            unknown = (set(departments) - set(self.matcher.departments + [GENERAL])) | (set(query_types) - set(self.matcher.query_types + [GENERAL]))
+            if unknown:
+                raise ValueError(f"Routing prototypes for unknown labels: {', '.join(sorted(unknown))}")
+            self.router = EmbeddingRouter(
+                self.encoder,
+                departments,
+                query_types,
+                threshold=self.config.get("ROUTER_THRESHOLD", 0.3),
+                margin=self.config.get("ROUTER_MARGIN", 0.03)
+            )
+            self._record("router", started)
+        except Exception as e:
+            self._record("router", started, e)
+            print(f"⚠️ Embedding router unavailable, routing by keywords: {e}")
+    
+    def _section_department(self, title: str) -> Optional[str]:
+        departments = self.config.get("SECTION_DEPARTMENTS", settings.SECTION_DEPARTMENTS)
+        return departments.get(title.lower())
+    
+    def _load_sections(self):
+        """Assign the prospectus sections to departments for scoped search
+        
+        Uses the section tree written by ingest.py, or builds it from the
+        chunk store for an index ingested before there was one.
+        """
+        if not self.config.get("SCOPED_SEARCH_ENABLED", False):
+            self.components["sections"] = {"status": "disabled"}
+            return
+        started = time.perf_counter()
+        try:
+            path = self.config.get("SECTIONS_PATH")
+            if path is not None and Path(path).exists():
+                tree = SectionTree.read(path)
+            else:
+                tree = SectionTree.build(self.chunks)
+            if tree.count != len(self.chunks):
+                raise ValueError(f"Section tree covers {tree.count} chunks but chunk store has {len(self.chunks)}")
+            partitions = tree.partition(self._section_department)
+            if self.retriever is not None:
+                self.retriever.set_partitions(partitions)
+            self.sections = tree
+            self.partitions = partitions
+            self._record("sections", started)
+            print(f"✅ Section tree loaded ({len(partitions)} departments, {sum(map(len, partitions.values()))} chunks)")
+        except Exception as e:
+            self._record("sections", started, e)
+            print(f"⚠️ Section tree unavailable, searching all chunks: {e}")
+    
+    def warm_up(self):
+        """Run a few dummy encodes and searches so the first request finds warm code and buffers
+        
+        The encoder is called directly, keeping the dummy questions out of
+        the embedding cache.
+        """
+        if self.retriever is None and self.lexical is None:
+            return
+        started = time.perf_counter()
+        try:
+            depth = self._candidates()
+            if self.retriever is not None:
+                self.retriever.search_vectors(self.retriever.encoder.encode(WARMUP_QUERIES), depth)
+            if self.lexical is not None:
+                for query in WARMUP_QUERIES:
+                    self.lexical.search(query, depth)
+            self._record("warm_up", started)
+        except Exception as e:
+            print(f"⚠️ Warm-up failed: {e}")
+            self._record("warm_up", started, e)
+    
+    def reload_retrieval(self, warm_up: bool = True):
+        """Reopen the chunk store and indexes after re-ingestion
+        
+        The encoder is kept, and cached answers built from the previous
+        indexes are dropped. A process about to fork passes warm_up=False
+        and leaves the warm-up to its children.
+        """
+        self.retriever = None
+        self.lexical = None
+        self._chunks = None
+        self.sections = None
+        self.partitions = {}
+        self.retrieval_error = None
+        self.load()
+        if warm_up and self.config.get("WARMUP_ENABLED", False):
+            self.warm_up()
+        if self.batcher is not None and self.retriever is not None:
+            self.batcher.engine = self.retriever
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate()
+    
+    @property
+    def chunks(self):
+        """Chunk store shared by vector and lexical search"""
+        return self.retriever.chunks if self.retriever is not None else self._chunks
+    
+    def _candidates(self, k: Optional[int] = None) -> int:
+        """Vector hits to fetch; fusion needs a deeper list than the final top-k"""
+        top_k = k or self.config.get("RETRIEVAL_TOP_K", 3)
+        if self.lexical is None:
+            return top_k
+        return max(top_k, self.config.get("HYBRID_CANDIDATES", 10))
+    
+    def _scope(self, department: Optional[str], depth: int) -> Optional[str]:
+        """Partition to search for the department, or None to search every chunk"""
+        ids = self.partitions.get(department) if department else None
+        # A department with fewer chunks than the search depth could not fill the result
+        if ids is None or len(ids) < depth:
+            _UNSCOPED.inc()
+            return None
+        _SCOPED.inc()
+        return department
+    
+    async def initialize(self, background: bool = False):
+        """Load and warm up the components, then start the background tasks
+        
+        Loading runs on a worker thread. With background=True this returns at
+        once and startup continues in a task; until it finishes, queries are
+        answered from the knowledge base and `ready` is False.
+        """
+        if self.query_log is not None:
+            self.query_log.start()
+        if background:
+            if self._startup is None:
+                self._startup = asyncio.create_task(self._start())
+            return
+        await self._start()
+    
+    async def _start(self):
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.load)
+        # serve.py loads in the parent but leaves the warm-up to each forked worker
+        if self.config.get("WARMUP_ENABLED", False) and "warm_up" not in self.components:
+            await loop.run_in_executor(None, self.warm_up)
+        if self.retriever is not None and self.batcher is None and self.config.get("BATCHING_ENABLED", False):
+            self.batcher = QueryBatcher(
+                self.retriever,
+                self._candidates(),
+                window_ms=self.config.get("BATCH_WINDOW_MS", 5.0),
+                max_batch_size=self.config.get("BATCH_MAX_SIZE", 32)
+            )
+            self.batcher.start()
+            BATCH_SIZES.attach(self.batcher.batch_sizes)
+        interval = self.config.get("KNOWLEDGE_BASE_WATCH_SECONDS", 0)
+        if interval > 0 and self._knowledge_watch is None:
+            self._knowledge_watch = asyncio.create_task(
+                watch_file(self.knowledge_base_path, interval, self.reload_knowledge_base_async, self._knowledge_signature)
+            )
+        self._record("startup", started)
+        self.ready = True
+        print(f"✅ MCP Agent Ready! ({time.perf_counter() - started:.2f}s)")
+    
+    async def shutdown(self):
+        """Stop background tasks"""
+        if self._startup is not None and not self._startup.done():
+            self._startup.cancel()
+        if self._knowledge_watch is not None:
+            self._knowledge_watch.cancel()
+            self._knowledge_watch = None
+        if self.batcher is not None:
+            await self.batcher.stop()
+        if self.query_log is not None:
+            await self.query_log.close()
+    
+    @property
+    def department_info(self):
+        """Read-only department -> field -> items of the current knowledge base"""
+        return self.knowledge.departments
+    
+    @property
+    def responses(self) -> ResponseTable:
+        return self.knowledge.responses
+    
     def _get_department_database(self) -> Dict:
-        """Hardcoded department information for guaranteed responses"""
-        return {
-            "computer_science": {
-                "name": "Computer Science Department",
-                "facilities": [
-                    "Advanced Computing Lab with high-performance workstations",
-                    "Network Security Lab with Cisco equipment",
-                    "AI & Machine Learning Research Center",
-                    "Software Engineering Lab with development tools",
-                    "Database Management Systems Lab",
-                    "Computer Architecture and Organization Lab"
-                ],
-                "courses": [
-                    "Bachelor of Science in Computer Science",
-                    "Bachelor of Science in Software Engineering", 
-                    "Bachelor of Science in Information Technology",
-                    "Master of Science in Computer Science",
-                    "PhD in Computer Science",
-                    "Data Science and Machine Learning Specialization"
-                ],
-                "admission": [
-                    "Minimum 60% marks in Intermediate/FSC",
-                    "UET Entry Test passing score",
-                    "Mathematics and Physics in intermediate",
-                    "Interview for merit-based selection"
-                ],
-                "description": "The Department of Computer Science offers cutting-edge programs in computing, software development, and information technology."
-            },
-            "electrical_engineering": {
-                "name": "Electrical Engineering Department",
-                "facilities": [
-                    "Power Systems and High Voltage Lab",
-                    "Electronics and Circuit Design Lab",
-                    "Control Systems and Automation Lab",
-                    "Telecommunications and Signal Processing Lab",
-                    "Electrical Machines and Drives Lab",
-                    "Renewable Energy Research Center"
-                ],
-                "courses": [
-                    "Bachelor of Science in Electrical Engineering",
-                    "Bachelor of Science in Electronics Engineering",
-                    "Master of Science in Power Systems",
-                    "Master of Science in Electronics",
-                    "PhD in Electrical Engineering"
-                ],
-                "admission": [
-                    "Minimum 60% marks in Intermediate/FSC",
-                    "Physics, Chemistry, and Mathematics required",
-                    "UET Entry Test qualification",
-                    "Pre-engineering background preferred"
-                ]
-            },
-            "mechanical_engineering": {
-                "name": "Mechanical Engineering Department",
-                "facilities": [
-                    "Thermodynamics and Heat Transfer Lab",
-                    "Fluid Mechanics and Hydraulics Lab",
-                    "Manufacturing and Workshop",
-                    "CAD/CAM Design Center",
-                    "Materials Testing Lab",
-                    "Automotive Engineering Lab"
-                ]
-            },
-            "civil_engineering": {
-                "name": "Civil Engineering Department",
-                "facilities": [
-                    "Structural Engineering Lab",
-                    "Concrete and Materials Testing Lab",
-                    "Surveying and Geomatics Lab",
-                    "Environmental Engineering Lab",
-                    "Transportation Engineering Lab",
-                    "Geotechnical Engineering Lab"
-                ]
-            },
-            "architecture": {
-                "name": "Architecture Department",
-                "facilities": [
-                    "Architectural Design Studio",
-                    "Building Information Modeling (BIM) Lab",
-                    "Model Making Workshop",
-                    "Urban Planning Studio",
-                    "Digital Fabrication Lab",
-                    "Environmental Design Research Center"
-                ]
-            },
-            "general": {
-                "admission": [
-                    "Application through UET admission portal",
-                    "Entry test for all engineering programs",
-                    "Intermediate/FSC with minimum 60% marks",
-                    "Merit-based selection",
-                    "Interview for certain departments"
-                ],
-                "fees": [
-                    "Tuition fee: Approximately $2,000 per semester for undergraduate programs",
-                    "Lab charges: $100-200 per semester",
-                    "Hostel fee: $500 per semester (if applicable)",
-                    "Security deposit: $200 (one-time, refundable)"
-                ]
-            }
-        }
+        """Department information from the knowledge base file"""
+        return read_knowledge_base(self.knowledge_base_path)
+    
+    def _build_response_table(self, department_info=None) -> ResponseTable:
+        """Render every (department, query_type) answer once"""
+        return ResponseTable.build(
+            lambda department, query_type: self._generate_response(department, query_type, "", department_info),
+            self.matcher.departments + [GENERAL],
+            self.matcher.query_types + [GENERAL],
+            DEPARTMENT_SOURCES,
+            OUT_OF_SCOPE_RESULT
+        )
+    
+    def reload_knowledge_base(self, department_info: Dict, source: str = "", mtime: float = 0.0) -> KnowledgeBase:
+        """Build a snapshot of new department data and its answers, then publish it
+        
+        The current snapshot keeps serving while the new one is built, and a
+        bad knowledge base raises without replacing it.
+        """
+        with self._knowledge_lock:
+            started = time.perf_counter()
+            departments = freeze(department_info)
+            responses = self._build_response_table(departments)
+            version = self.knowledge.version + 1 if self.knowledge is not None else 1
+            self.knowledge = KnowledgeBase(departments, responses, version, source, mtime, time.perf_counter() - started)
+        if self.answer_cache is not None and version > 1:
+            self.answer_cache.invalidate()
+        return self.knowledge
+    
+    def reload_knowledge_base_file(self) -> KnowledgeBase:
+        """Reload the knowledge base from KNOWLEDGE_BASE_PATH"""
+        path = self.knowledge_base_path
+        signature = file_signature(path)
+        if signature is None:
+            if self.knowledge is not None:
+                raise FileNotFoundError(f"Knowledge base {path} not found")
+            # Keep answering (with general answers only) rather than fail to start
+            print(f"⚠️ Knowledge base {path} not found, department details unavailable")
+            return self.reload_knowledge_base({"general": {}})
+        started = time.perf_counter()
+        knowledge = self.reload_knowledge_base(self._get_department_database(), str(path), signature[0] / 1e9)
+        self._record("knowledge_base", started)
+        self._knowledge_signature = signature
+        return knowledge
+    
+    async def reload_knowledge_base_async(self) -> KnowledgeBase:
+        """Reload the knowledge base file on a worker thread, leaving the event loop free"""
+        knowledge = await asyncio.get_running_loop().run_in_executor(None, self.reload_knowledge_base_file)
+        print(f"✅ Knowledge base v{knowledge.version} loaded in {knowledge.build_seconds * 1000:.1f} ms")
+        return knowledge
     
     def _identify_department(self, query: str) -> str:
         """Identify which department the query is about"""
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ["computer", "cs", "software", "it", "programming"]):
-            return "computer_science"
-        elif any(word in query_lower for word in ["electrical", "electronics", "power", "circuit"]):
-            return "electrical_engineering"
-        elif any(word in query_lower for word in ["mechanical", "thermo", "manufacturing"]):
-            return "mechanical_engineering"
-        elif any(word in query_lower for word in ["civil", "structural", "construction"]):
-            return "civil_engineering"
-        elif any(word in query_lower for word in ["architecture", "building", "design"]):
-            return "architecture"
-        else:
-            return "general"
+        return self.matcher.match(query).department
     
     def _identify_query_type(self, query: str) -> str:
         """Identify what information is being asked"""
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ["lab", "facility", "equipment", "infrastructure"]):
-            return "facilities"
-        elif any(word in query_lower for word in ["admission", "apply", "requirement", "eligibility"]):
-            return "admission"
-        elif any(word in query_lower for word in ["course", "program", "subject", "curriculum"]):
-            return "courses"
-        elif any(word in query_lower for word in ["fee", "tuition", "cost", "payment"]):
-            return "fees"
-        elif any(word in query_lower for word in ["tell me about", "what is", "information about"]):
-            return "description"
-        else:
-            return "general"
+        return self.matcher.match(query).query_type
     
-    def _generate_response(self, department: str, query_type: str, query: str) -> str:
+    def _generate_response(self, department: str, query_type: str, query: str, department_info=None) -> str:
         """Generate a guaranteed response"""
         
         # Get department data
-        dept_data = self.department_info.get(department, {})
-        general_data = self.department_info.get("general", {})
+        department_info = self.department_info if department_info is None else department_info
+        dept_data = department_info.get(department, {})
+        general_data = department_info.get("general", {})
         
         # Build response based on query type
         response_parts = []
@@ -244,46 +546,461 @@ class MCPAgent:
         
         return "\n".join(response_parts)
     
-    async def process_query(self, query: str) -> Dict[str, Any]:
+    async def search(self, query: str, k: Optional[int] = None) -> List[Hit]:
+        """Top-k prospectus passages for a query (RETRIEVAL_TOP_K by default)"""
+        return await self._retrieve(query, k=k)
+    
+    async def _embed(self, query: str) -> np.ndarray:
+        async with self.admission.slot("encoder"):
+            return await self.batcher.embed(query) if self.batcher is not None else self.retriever.embed(query)
+    
+    async def _retrieve(
+        self,
+        query: str,
+        vector: Optional[np.ndarray] = None,
+        k: Optional[int] = None,
+        department: Optional[str] = None
+    ) -> List[Hit]:
+        """Top-k prospectus chunks for the query, optionally already embedded
+        
+        With a department, only the chunks of its sections are searched; the
+        scoped search scores few vectors, so it is searched directly rather than
+        through the batcher.
+        """
+        if self.retriever is None and self.lexical is None:
+            return []
+        started = time.perf_counter()
+        hits = []
+        depth = self._candidates(k)
+        scope = self._scope(department, depth)
+        if self.retriever is not None and vector is None:
+            vector = await self._embed(query)
+        async with self.admission.slot("search"):
+            if self.retriever is not None and scope is not None:
+                hits = self.retriever.search_vector(vector, depth, scope)
+            elif self.batcher is not None and depth == self.batcher.top_k:
+                hits = await self.batcher.search_vector(vector)
+            elif self.retriever is not None:
+                hits = self.retriever.search_vector(vector, depth)
+            hits = self._fuse(query, hits, k, scope)
+        _RETRIEVE.observe(time.perf_counter() - started)
+        return hits
+    
+    def _fuse(self, query: str, vector_hits: List[Hit], k: Optional[int] = None, scope: Optional[str] = None) -> List[Hit]:
+        """Reciprocal-rank fusion of the vector hits with the BM25 ranking"""
+        top_k = k or self.config.get("RETRIEVAL_TOP_K", 3)
+        if self.lexical is None:
+            return vector_hits[:top_k]
+        started = time.perf_counter()
+        lexical_hits = self.lexical.search(query, self._candidates(k), self.partitions[scope] if scope else None)
+        _LEXICAL.observe(time.perf_counter() - started)
+        fused = reciprocal_rank_fusion(
+            [[hit.chunk_id for hit in vector_hits], [chunk_id for chunk_id, _ in lexical_hits]],
+            top_k,
+            self.config.get("RRF_K", 60)
+        )
+        return make_hits(self.chunks, fused)
+    
+    async def _route(self, query: str) -> Tuple[QueryMatch, Optional[np.ndarray]]:
+        """Keyword match refined by the embedding router, and the query vector it embedded
+        
+        Only in-scope questions are embedded, and the vector is reused by
+        the answer cache and retrieval. A saturated encoder keeps the
+        keyword match.
+        """
+        # Guardrail, department and query type in one scan
+        match = self.matcher.match(query)
+        if self.router is None or not match.is_department_related:
+            return match, None
+        try:
+            vector = await self._embed(query)
+        except Overloaded as e:
+            DEGRADED.labels(e.stage).inc()
+            return match, None
+        return self.router.route(vector, match), vector
+    
+    def _classify(self, query: str, session_id: Optional[str] = None, match: Optional[QueryMatch] = None) -> Tuple[QueryMatch, Optional[List[Hit]], str]:
+        """Match the query, filling gaps from the session's previous question
+        
+        Returns the match, the previous passages when a follow-up resolves to
+        the same department and query type (None means retrieve), and the
+        text to retrieve with.
+        """
+        if match is None:
+            match = self.matcher.match(query)
+        # Only a follow-up ("and the fees?") borrows from the previous question
+        if not session_id or not is_follow_up(query):
+            return match, None, query
+        context = self.sessions.get(session_id)
+        if context is None:
+            return match, None, query
+        if not match.is_department_related:
+            match = QueryMatch(True, GENERAL, GENERAL)
+        
+        department = context.department if match.department == GENERAL else match.department
+        query_type = context.query_type if match.query_type == GENERAL else match.query_type
+        if (department, query_type) == (match.department, match.query_type):
+            return match, None, query
+        
+        resolved = QueryMatch(True, department, query_type)
+        reuse = (department, query_type) == (context.department, context.query_type) and self.chunks is not None
+        self.sessions.record_follow_up(reuse)
+        if reuse:
+            return resolved, make_hits(self.chunks, context.hits), query
+        # Carry the department into retrieval for questions like "and the fees?"
+        name = self.department_info.get(department, {}).get("name", "")
+        return resolved, None, f"{name} {query}".strip()
+    
+    def _remember(self, session_id: Optional[str], match: QueryMatch, scored: Sequence[Tuple[int, float]]):
+        if session_id and match.is_department_related:
+            self.sessions.put(session_id, SessionContext(match.department, match.query_type, tuple(scored)))
+    
+    def _format_hits(self, hits: List[Hit]) -> str:
+        """Render retrieved prospectus chunks as a response section"""
+        response_parts = ["", "### 📄 From the UET Prospectus"]
+        for hit in hits:
+            text = PAGE_HEADER_PATTERN.sub("", hit.text)
+            if len(text) > 300:
+                text = text[:300].rsplit(" ", 1)[0] + " …"
+            response_parts.append(f"- **Page {hit.page}:** {text}")
+        return "\n".join(response_parts)
+    
+    def _build_result(self, match: QueryMatch, hits: List[Hit]) -> Dict[str, Any]:
+        """Pre-rendered answer for the match, extended with retrieved passages"""
+        result = self.responses.result((match.department, match.query_type))
+        if hits:
+            del result["template"]
+            result["response"] += "\n" + self._format_hits(hits)
+            result["sources"].extend(f"UET Prospectus Page {hit.page}" for hit in hits)
+        return result
+    
+    def _prompt(self, match: QueryMatch, query: str, hits: List[Hit]) -> Tuple[List[Dict[str, str]], List[Hit]]:
+        """Generation prompt for the question and the passages packed into it"""
+        knowledge = self.responses.result((match.department, match.query_type))["response"]
+        passages = [(hit.page, PAGE_HEADER_PATTERN.sub("", hit.text), hit.score) for hit in hits]
+        # Pages repeat across chunks, so packed passages are mapped back to hits by identity
+        by_passage = {id(passage): hit for passage, hit in zip(passages, hits)}
+        messages, packed = self.generator.prompt(query, knowledge, passages)
+        return messages, [by_passage[id(passage)] for passage in packed]
+    
+    def _generated_result(self, text: str, hits: List[Hit]) -> Dict[str, Any]:
+        return {
+            "response": text + "\n" + self._format_hits(hits),
+            "is_department_related": True,
+            "sources": DEPARTMENT_SOURCES + [f"UET Prospectus Page {hit.page}" for hit in hits]
+        }
+    
+    async def _render(self, match: QueryMatch, query: str, hits: List[Hit]) -> Dict[str, Any]:
+        """Generated answer over the passages, or the pre-rendered one when generation is off or fails"""
+        if self.generator is not None and hits:
+            started = time.perf_counter()
+            try:
+                messages, packed = self._prompt(match, query, hits)
+                text = await self.generator.generate(messages)
+                _GENERATE.observe(time.perf_counter() - started)
+                return self._generated_result(text, packed)
+            except Overloaded as e:
+                DEGRADED.labels(e.stage).inc()
+            except Exception as e:
+                print(f"⚠️ Answer generation failed, using the pre-rendered answer: {e!r}")
+                FALLBACKS.labels("generation").inc()
+        started = time.perf_counter()
+        result = self._build_result(match, hits)
+        _RENDER.observe(time.perf_counter() - started)
+        return result
+    
+    async def _lookup(
+        self,
+        match: QueryMatch,
+        query: str,
+        vector: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[CachedAnswer], Optional[np.ndarray], int]:
+        """Cached answer for a near-duplicate question, the query vector and the cache generation
+        
+        The query embedding (possibly already computed for routing) doubles
+        as the semantic cache key and, on a miss, as the search vector, so
+        the encoder runs once either way.
+        """
+        if self.answer_cache is None or self.retriever is None:
+            return None, vector, 0
+        generation = self.answer_cache.generation
+        if vector is None:
+            vector = await self._embed(query)
+        started = time.perf_counter()
+        cached = self.answer_cache.lookup(vector, (match.department, match.query_type))
+        _CACHE_LOOKUP.observe(time.perf_counter() - started)
+        return cached, vector, generation
+    
+    def _store(self, match: QueryMatch, vector: Optional[np.ndarray], generation: int, answer: CachedAnswer):
+        if self.answer_cache is not None and vector is not None and answer.hits:
+            self.answer_cache.put(vector, (match.department, match.query_type), answer, generation)
+    
+    async def _answer(self, match: QueryMatch, query: str, vector: Optional[np.ndarray] = None) -> Tuple[CachedAnswer, bool]:
+        """Retrieve and render an answer, or reuse one for a near-duplicate question
+        
+        Returns the answer and whether it came from the cache. A saturated
+        encoder or search stage yields the pre-rendered answer alone.
+        """
+        try:
+            cached, vector, generation = await self._lookup(match, query, vector)
+            if cached is not None:
+                return cached, True
+            started = time.perf_counter()
+            hits = await self._retrieve(query, vector, department=match.department)
+        except Overloaded as e:
+            DEGRADED.labels(e.stage).inc()
+            return CachedAnswer(self.responses.result((match.department, match.query_type)), (), 0.0), False
+        result = await self._render(match, query, hits)
+        answer = CachedAnswer(result, _scored(hits), time.perf_counter() - started)
+        self._store(match, vector, generation, answer)
+        return answer, False
+    
+    def _log(self, query: str, session_id: Optional[str], match: QueryMatch, started: float, cache_hit: bool = False):
+        """Hand the request to the query log; never blocks"""
+        if self.query_log is not None:
+            self.query_log.record(QueryRecord(
+                round(time.time(), 3),
+                session_id,
+                query,
+                match.department,
+                match.query_type,
+                match.is_department_related,
+                round((time.perf_counter() - started) * 1000, 3),
+                cache_hit
+            ))
+    
+    def _search_batch(self, vectors: np.ndarray, scopes: List[Optional[str]]) -> List[List[Hit]]:
+        """Vector hits for a batch of query vectors, one search per scope"""
+        depth = self._candidates()
+        hit_lists: List[List[Hit]] = [[] for _ in scopes]
+        for scope in set(scopes):
+            rows = [i for i, row_scope in enumerate(scopes) if row_scope == scope]
+            for row, hits in zip(rows, self.retriever.search_vectors(vectors[rows], depth, scope)):
+                hit_lists[row] = hits
+        return hit_lists
+    
+    async def process_queries(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Process a list of queries with one batched encode, one routing product and one search per department
+        
+        Each query is logged without a session and with the latency of the whole batch.
+        """
+        batch_started = time.perf_counter()
+        matches = []
+        for query in queries:
+            started = time.perf_counter()
+            matches.append(self.matcher.match(query))
+            _CLASSIFY.observe(time.perf_counter() - started)
+        related = [i for i, match in enumerate(matches) if match.is_department_related]
+        
+        hits: Dict[int, List[Hit]] = {}
+        if (self.retriever is not None or self.lexical is not None) and related:
+            try:
+                hit_lists = [[] for _ in related]
+                loop = asyncio.get_running_loop()
+                async with self.admission.slot("encoder"), self.admission.slot("search"):
+                    vectors = None
+                    if self.retriever is not None:
+                        vectors = await loop.run_in_executor(None, self.retriever.embed_many, [queries[i] for i in related])
+                    if self.router is not None and vectors is not None:
+                        for i, match in zip(related, self.router.route_many(vectors, [matches[i] for i in related])):
+                            matches[i] = match
+                    scopes = [self._scope(matches[i].department, self._candidates()) for i in related]
+                    if vectors is not None:
+                        hit_lists = await loop.run_in_executor(None, self._search_batch, vectors, scopes)
+                    hits = {
+                        i: self._fuse(queries[i], hit_list, scope=scope)
+                        for i, hit_list, scope in zip(related, hit_lists, scopes)
+                    }
+            except Overloaded as e:
+                DEGRADED.labels(e.stage).inc()
+            except Exception as e:
+                print(f"⚠️ Batch retrieval failed, answering from department database: {e}")
+        
+        results = []
+        for i, (query, match) in enumerate(zip(queries, matches)):
+            try:
+                if not match.is_department_related:
+                    _REJECTED.inc()
+                    results.append(self.responses.result(OUT_OF_SCOPE))
+                else:
+                    started = time.perf_counter()
+                    results.append(self._build_result(match, hits.get(i, [])))
+                    _RENDER.observe(time.perf_counter() - started)
+                    _ANSWERED.inc()
+                self._log(query, None, match, batch_started)
+            except Exception as e:
+                _FALLBACK.inc()
+                FALLBACKS.labels("process_queries").inc()
+                results.append(self._fallback_result(query))
+        for result in results:
+            result.pop("template", None)
+        return results
+    
+    async def process_query(self, query: str, session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process user query - GUARANTEED TO WORK"""
+        result, _ = await self.answer_query(query, session_id)
+        return result
+    
+    async def answer_query(self, query: str, session_id: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[ResponseKey]]:
+        """The answer to a query and, when it is an unchanged pre-rendered one, its response table key
+        
+        /chat sends answers with a key as their pre-encoded bodies.
+        """
+        result = await self._process_query(query, session_id)
+        return result, result.pop("template", None)
+    
+    async def _process_query(self, query: str, session_id: Optional[str]) -> Dict[str, Any]:
         try:
-            # Check if department-related
-            keywords = self.config.get("DEPARTMENT_KEYWORDS", [])
-            query_lower = query.lower()
+            started = time.perf_counter()
+            match, vector = await self._route(query)
+            match, hits, retrieval_query = self._classify(query, session_id, match)
+            _CLASSIFY.observe(time.perf_counter() - started)
+            
+            if not match.is_department_related:
+                _REJECTED.inc()
+                self._log(query, session_id, match, started)
+                return self.responses.result(OUT_OF_SCOPE)
             
-            is_related = any(keyword in query_lower for keyword in keywords)
+            # Generated or pre-rendered answer plus supporting prospectus passages
+            cache_hit = False
+            if hits is None:
+                # A follow-up rewritten with the session's department needs its own embedding
+                answer, cache_hit = await self._answer(match, retrieval_query, vector if retrieval_query == query else None)
+                result = _copy_result(answer.result)
+                scored = answer.hits
+            else:
+                result = await self._render(match, retrieval_query, hits)
+                scored = _scored(hits)
+            self._remember(session_id, match, scored)
+            _ANSWERED.inc()
+            self._log(query, session_id, match, started, cache_hit)
+            return result
+            
+        except Exception as e:
+            # FALLBACK - This should NEVER happen, but just in case
+            _FALLBACK.inc()
+            FALLBACKS.labels("process_query").inc()
+            return self._fallback_result(query)
+    
+    async def stream_query(self, query: str, session_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Process a query as a stream of (event, data) pairs
+        
+        The pre-rendered answer is sent section by section before retrieval
+        starts, so the first bytes go out without waiting on the encoder.
+        With generation on, the generated answer is streamed as it is
+        produced instead.
+        """
+        try:
+            started = time.perf_counter()
+            match, vector = await self._route(query)
+            match, hits, retrieval_query = self._classify(query, session_id, match)
+            _CLASSIFY.observe(time.perf_counter() - started)
+            if retrieval_query != query:
+                vector = None
+            key = (match.department, match.query_type) if match.is_department_related else OUT_OF_SCOPE
+            result = self.responses.result(key)
             
-            if not is_related:
-                return {
-                    "response": "I only answer department-related questions. Please ask about:\n- Department facilities (labs, equipment)\n- Admission requirements\n- Course programs\n- Fee structure\n- General department information",
-                    "is_department_related": False,
-                    "sources": ["UET Prospectus Guidelines"]
-                }
+            yield "header", {
+                "is_department_related": match.is_department_related,
+                "department": match.department,
+                "query_type": match.query_type
+            }
             
-            # Identify department and query type
-            department = self._identify_department(query)
-            query_type = self._identify_query_type(query)
+            if match.is_department_related and self.generator is not None:
+                outcome = {"cache_hit": False}
+                async for event in self._stream_generated(match, retrieval_query, hits, session_id, vector, outcome):
+                    yield event
+                _ANSWERED.inc()
+                self._log(query, session_id, match, started, outcome["cache_hit"])
+                return
             
-            # Generate response
-            response = self._generate_response(department, query_type, query)
+            sections = result["response"].split("\n\n")
+            for i, section in enumerate(sections):
+                yield "section", {"text": section + ("\n\n" if i < len(sections) - 1 else "")}
             
-            # Prepare sources
-            sources = [
-                "UET Department Information Database",
-                "Academic Programs Catalog",
-                "Facilities & Infrastructure Guide"
-            ]
+            cache_hit = False
+            if match.is_department_related:
+                if hits is None:
+                    answer, cache_hit = await self._answer(match, retrieval_query, vector)
+                    hits = make_hits(self.chunks, answer.hits)
+                self._remember(session_id, match, _scored(hits))
+                if hits:
+                    yield "section", {"text": "\n" + self._format_hits(hits)}
+                    result["sources"].extend(f"UET Prospectus Page {hit.page}" for hit in hits)
             
-            return {
-                "response": response,
-                "is_department_related": True,
-                "sources": sources
-            }
+            yield "sources", {"sources": result["sources"]}
+            (_ANSWERED if match.is_department_related else _REJECTED).inc()
+            self._log(query, session_id, match, started, cache_hit)
             
         except Exception as e:
-            # FALLBACK - This should NEVER happen, but just in case
-            return {
-                "response": f"""## UET Department Information
+            _FALLBACK.inc()
+            FALLBACKS.labels("stream_query").inc()
+            result = self._fallback_result(query)
+            yield "error", {"message": "Falling back to general department information"}
+            yield "section", {"text": result["response"]}
+            yield "sources", {"sources": result["sources"]}
+    
+    async def _stream_generated(
+        self,
+        match: QueryMatch,
+        query: str,
+        hits: Optional[List[Hit]],
+        session_id: Optional[str],
+        vector: Optional[np.ndarray] = None,
+        outcome: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Generated answer chunk by chunk, then its passages and sources
+        
+        A cache hit is reported through `outcome["cache_hit"]`.
+        """
+        cached, generation = None, 0
+        started = time.perf_counter()
+        try:
+            if hits is None:
+                cached, vector, generation = await self._lookup(match, query, vector)
+                if cached is None:
+                    hits = await self._retrieve(query, vector, department=match.department)
+        except Overloaded as e:
+            DEGRADED.labels(e.stage).inc()
+            hits = []
+        if cached is not None:
+            if outcome is not None:
+                outcome["cache_hit"] = True
+            self._remember(session_id, match, cached.hits)
+            yield "section", {"text": cached.result["response"]}
+            yield "sources", {"sources": list(cached.result["sources"])}
+            return
+        
+        self._remember(session_id, match, _scored(hits))
+        result = None
+        parts = []
+        if hits:
+            try:
+                messages, packed = self._prompt(match, query, hits)
+                generating = time.perf_counter()
+                async for chunk in self.generator.stream(messages):
+                    parts.append(chunk)
+                    yield "section", {"text": chunk}
+                _GENERATE.observe(time.perf_counter() - generating)
+                result = self._generated_result("".join(parts), packed)
+                self._store(match, vector, generation, CachedAnswer(result, _scored(hits), time.perf_counter() - started))
+                yield "section", {"text": "\n" + self._format_hits(packed)}
+            except Overloaded as e:
+                DEGRADED.labels(e.stage).inc()
+            except Exception as e:
+                print(f"⚠️ Answer generation failed, using the pre-rendered answer: {e!r}")
+                FALLBACKS.labels("generation").inc()
+                if parts:
+                    yield "error", {"message": "Answer generation stopped, showing the department information instead"}
+        if result is None:
+            result = self._build_result(match, hits)
+            yield "section", {"text": ("\n\n" if parts else "") + result["response"]}
+        yield "sources", {"sources": result["sources"]}
+    
+    def _fallback_result(self, query: str) -> Dict[str, Any]:
+        """General department answer used when query processing fails"""
+        return {
+            "response": f"""## UET Department Information
 
 Based on your query about **{query}**, here is the information:
 
@@ -302,6 +1019,6 @@ All UET departments have modern lab facilities including computer labs, speciali
 - Specialized courses and electives
 
 *For department-specific details, please refer to the UET Prospectus or contact the department directly.*""",
-                "is_department_related": True,
-                "sources": ["UET General Information", "Academic Guidelines"]
-            }
\ No newline at end of file
+            "is_department_related": True,
+            "sources": ["UET General Information", "Academic Guidelines"]
+        }
\ No newline at end of file
@@ -0,0 +1,251 @@
+# backend/mcp_server.py
+"""The agent's capabilities as Model Context Protocol tools
+
+    python mcp_server.py        # serve over stdio, e.g. for an MCP client config
+
+AgentTools dispatches tool calls in-process (the REST /tools endpoints use
+it directly); build_server() registers the same tools on an MCP server,
+which mcp.Client(server) also reaches in-process. Independent calls run
+concurrently: call_many() gathers them on the event loop, and prospectus
+searches wait on the query batcher rather than blocking the loop.
+
+Tool schemas are static and built once. Results of the knowledge-base tools
+depend only on their arguments and are memoized until the agent's
+knowledge base is swapped. Cached results are shared, so treat them as
+read-only.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import time
+
+from matcher import GENERAL
+from metrics import REGISTRY
+
+SERVER_NAME = "uet-department-agent"
+MAX_SEARCH_RESULTS = 10
+TOPICS = ("facilities", "admission", "courses", "fees", "description", "general")
+
+TOOL_SECONDS = REGISTRY.histogram("uet_mcp_tool_seconds", "MCP tool call latency", ["tool"])
+TOOL_CALLS = REGISTRY.counter("uet_mcp_tool_calls_total", "MCP tool calls by outcome", ["tool", "outcome"])
+
+TOOL_SCHEMAS: List[Dict[str, Any]] = [
+    {
+        "name": "list_departments",
+        "description": "List the UET departments in the knowledge base with their ids.",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+    {
+        "name": "department_lookup",
+        "description": (
+            "Information about one department. department is an id from list_departments or a "
+            "name such as 'computer science'; topic is one of " + ", ".join(TOPICS) + "."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "department": {"type": "string"},
+                "topic": {"type": "string", "default": GENERAL},
+            },
+            "required": ["department"],
+        },
+    },
+    {
+        "name": "fee_lookup",
+        "description": "Fee structure (tuition, lab, hostel and deposit) for a department or UET in general.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"department": {"type": "string", "default": GENERAL}},
+        },
+    },
+    {
+        "name": "search_prospectus",
+        "description": f"Search the UET prospectus and return up to k (at most {MAX_SEARCH_RESULTS}) passages with page numbers.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "k": {"type": "integer", "default": 3},
+            },
+            "required": ["query"],
+        },
+    },
+]
+TOOL_DESCRIPTIONS = {schema["name"]: schema["description"] for schema in TOOL_SCHEMAS}
+
+
+class ToolError(ValueError):
+    """Bad tool name or arguments; reported to the caller as an error result"""
+
+
+class AgentTools:
+    """Named async tools over an MCPAgent, with latency metrics and memoized static results"""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self._tools: Dict[str, Tuple[Callable[..., Awaitable[Dict[str, Any]]], bool]] = {
+            "list_departments": (self.list_departments, True),
+            "department_lookup": (self.department_lookup, True),
+            "fee_lookup": (self.fee_lookup, True),
+            "search_prospectus": (self.search_prospectus, False),
+        }
+        self._timers = {name: TOOL_SECONDS.labels(name) for name in self._tools}
+        self._results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._results_source = agent.department_info
+
+    @staticmethod
+    def schemas() -> List[Dict[str, Any]]:
+        return TOOL_SCHEMAS
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run one tool; raises ToolError for an unknown tool or bad arguments"""
+        tool = self._tools.get(name)
+        if tool is None:
+            TOOL_CALLS.labels("unknown", "error").inc()
+            raise ToolError(f"Unknown tool {name!r}")
+        handler, static = tool
+        arguments = arguments or {}
+
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            if not static:
+                return await handler(**arguments)
+            if self._results_source is not self.agent.department_info:
+                self._results.clear()
+                self._results_source = self.agent.department_info
+            key = (name, json.dumps(arguments, sort_keys=True))
+            result = self._results.get(key)
+            if result is not None:
+                outcome = "cached"
+                return result
+            result = self._results[key] = await handler(**arguments)
+            return result
+        except TypeError as e:
+            outcome = "error"
+            raise ToolError(f"Invalid arguments for {name}: {e}") from e
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self._timers[name].observe(time.perf_counter() - started)
+            TOOL_CALLS.labels(name, outcome).inc()
+
+    async def call_many(self, calls: Sequence[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Run independent tool calls concurrently; a failed call yields {"error": ...}"""
+        results = await asyncio.gather(*(self.call(name, arguments) for name, arguments in calls), return_exceptions=True)
+        return [{"error": str(result)} if isinstance(result, Exception) else result for result in results]
+
+    def _department(self, department: str) -> str:
+        """Department id for an id or a free-text name"""
+        key = department.strip().lower().replace(" ", "_")
+        if key in self.agent.department_info:
+            return key
+        resolved = self.agent.matcher.match(department).department
+        if resolved == GENERAL and key != GENERAL:
+            raise ToolError(f"Unknown department {department!r}; see list_departments")
+        return resolved
+
+    async def list_departments(self) -> Dict[str, Any]:
+        return {
+            "departments": [
+                {"id": key, "name": info.get("name", key.replace("_", " ").title())}
+                for key, info in self.agent.department_info.items()
+                if key != GENERAL
+            ]
+        }
+
+    async def department_lookup(self, department: str, topic: str = GENERAL) -> Dict[str, Any]:
+        department = self._department(department)
+        topic = topic.strip().lower()
+        if topic not in TOPICS:
+            topic = self.agent.matcher.match(topic).query_type
+        if (department, topic) not in self.agent.responses:
+            raise ToolError(f"No answer for {department} / {topic}")
+        result = self.agent.responses.result((department, topic))
+        return {
+            "department": department,
+            "name": self.agent.department_info.get(department, {}).get("name", "UET"),
+            "topic": topic,
+            "answer": result["response"],
+            "sources": result["sources"],
+        }
+
+    async def fee_lookup(self, department: str = GENERAL) -> Dict[str, Any]:
+        department = self._department(department)
+        fees = list(self.agent.department_info.get(department, {}).get("fees", []))
+        if department != GENERAL:
+            fees.extend(self.agent.department_info.get(GENERAL, {}).get("fees", []))
+        return {"department": department, "fees": fees}
+
+    async def search_prospectus(self, query: str, k: int = 3) -> Dict[str, Any]:
+        k = max(1, min(int(k), MAX_SEARCH_RESULTS))
+        hits = await self.agent.search(query, k)
+        return {
+            "query": query,
+            "passages": [{"page": hit.page, "score": round(hit.score, 6), "text": hit.text} for hit in hits],
+        }
+
+
+def build_server(tools: AgentTools, lifespan=None):
+    """MCP server exposing the agent tools; needs the mcp package (2.x)"""
+    from mcp.server import CacheHint
+    from mcp.server.mcpserver import MCPServer
+    from mcp.server.mcpserver.exceptions import ToolError as MCPToolError
+
+    server = MCPServer(
+        SERVER_NAME,
+        instructions="Answers questions about UET departments: facilities, admission, courses and fees.",
+        # The tool list never changes while the server runs
+        cache_hints={"tools/list": CacheHint(ttl_ms=3_600_000, scope="public")},
+        lifespan=lifespan,
+    )
+
+    async def dispatch(name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        try:
+            return await tools.call(name, arguments)
+        except ToolError as e:
+            # Reported to the client as an error result rather than a server fault
+            raise MCPToolError(str(e)) from e
+
+    @server.tool(description=TOOL_DESCRIPTIONS["list_departments"])
+    async def list_departments() -> Dict[str, Any]:
+        return await dispatch("list_departments")
+
+    @server.tool(description=TOOL_DESCRIPTIONS["department_lookup"])
+    async def department_lookup(department: str, topic: str = GENERAL) -> Dict[str, Any]:
+        return await dispatch("department_lookup", {"department": department, "topic": topic})
+
+    @server.tool(description=TOOL_DESCRIPTIONS["fee_lookup"])
+    async def fee_lookup(department: str = GENERAL) -> Dict[str, Any]:
+        return await dispatch("fee_lookup", {"department": department})
+
+    @server.tool(description=TOOL_DESCRIPTIONS["search_prospectus"])
+    async def search_prospectus(query: str, k: int = 3) -> Dict[str, Any]:
+        return await dispatch("search_prospectus", {"query": query, "k": k})
+
+    return server
+
+
+def main():
+    from contextlib import asynccontextmanager
+
+    import main as app_module
+
+    agent = app_module.agent
+
+    @asynccontextmanager
+    async def lifespan(server):
+        # Runs after stdio_server has moved stdout off the wire, so the
+        # agent's progress prints land on stderr
+        await agent.initialize()
+        try:
+            yield
+        finally:
+            await agent.shutdown()
+
+    build_server(AgentTools(agent), lifespan=lifespan).run("stdio")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# backend/metrics.py
+"""Low-overhead counters, gauges and histograms with Prometheus text export
+
+Metrics are plain Python objects updated in place on the request path; a
+histogram observation is one bisect plus three additions. Hot paths look up
+their labelled children once at import time. Updates are not locked, so a
+rare increment may be lost between executor threads - the usual trade for
+counters that sit on every request.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from 10 µs to 5 s
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        # One slot per bucket plus the +Inf overflow; cumulated at export
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total = 0
+        buckets = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+class Family:
+    """A named metric with zero or more labels"""
+
+    def __init__(self, kind: str, name: str, help_text: str, labelnames: Sequence[str], factory: Callable):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Child metric for a label value tuple; hot paths should keep the result"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._factory()
+        return child
+
+    def attach(self, child, *values: str):
+        """Export a metric object owned elsewhere (e.g. by a running component)"""
+        self._children[values] = child
+
+    def total(self) -> float:
+        """Sum of a counter or gauge over all label values"""
+        return sum(child.value for child in self._children.values())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            if self.kind == "histogram":
+                for bound, total in child.cumulative():
+                    labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {total}")
+                labels = _format_labels(self.labelnames, values)
+                lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+                lines.append(f"{self.name}_count{labels} {child.count}")
+            else:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._families: Dict[str, Family] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _family(self, kind: str, name: str, help_text: str, labelnames: Sequence[str], factory: Callable) -> Family:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = Family(kind, name, help_text, labelnames, factory)
+        elif family.kind != kind:
+            raise ValueError(f"{name} is already registered as a {family.kind}")
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Family:
+        return self._family("counter", name, help_text, labelnames, Counter)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Family:
+        return self._family("gauge", name, help_text, labelnames, Gauge)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Family:
+        return self._family("histogram", name, help_text, labelnames, lambda: Histogram(buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Callback run before each export to refresh derived gauges"""
+        self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional[Family]:
+        return self._families.get(name)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for family in self._families.values():
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Shared metric families
+STAGE_SECONDS = REGISTRY.histogram(
+    "uet_agent_stage_seconds", "Time spent in each MCPAgent stage", ["stage"]
+)
+QUERIES = REGISTRY.counter(
+    "uet_agent_queries_total", "Queries processed by outcome", ["outcome"]
+)
+FALLBACKS = REGISTRY.counter(
+    "uet_agent_fallbacks_total", "Exception fallbacks that served a canned answer", ["site"]
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "uet_http_requests_in_flight", "HTTP requests currently being handled", ["path"]
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "uet_http_request_seconds", "HTTP request latency", ["path", "method"]
+)
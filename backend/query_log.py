@@ -0,0 +1,164 @@
+# backend/query_log.py
+"""Log of the questions asked and how they were routed, for offline analysis
+
+record() appends to a bounded in-memory ring and returns at once, so a
+request pays for a deque append and never for disk I/O. A background task
+wakes every flush_interval seconds, or as soon as batch_size records are
+waiting, takes the whole ring and writes it on a worker thread as one gzip
+member appended to the current JSONL file. Concatenated members are a
+valid gzip stream, so `gzip.open` and `zcat` read a file in one go. Files
+rotate at max_bytes and only the newest max_files are kept. If the writer
+falls behind and the ring fills up, the oldest records are dropped and
+counted; requests never wait for the log.
+"""
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, NamedTuple, Optional
+import asyncio
+import gzip
+import json
+import os
+import time
+
+FILE_PATTERN = "queries-*.jsonl.gz"
+
+
+class QueryRecord(NamedTuple):
+    timestamp: float
+    session_id: Optional[str]
+    query: str
+    department: str
+    query_type: str
+    is_department_related: bool
+    latency_ms: float
+    cache_hit: bool
+
+
+def read_query_log(path: Path) -> List[Dict]:
+    """All records of one log file"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class QueryLog:
+    """Bounded ring of query records flushed in batches to rotating gzip JSONL files"""
+
+    def __init__(
+        self,
+        directory: Path,
+        capacity: int = 10_000,
+        batch_size: int = 512,
+        flush_interval: float = 2.0,
+        max_bytes: int = 16 * 1024 * 1024,
+        max_files: int = 50,
+        compresslevel: int = 6
+    ):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.compresslevel = compresslevel
+        self._ring: Deque[QueryRecord] = deque(maxlen=capacity)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flushing: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._path: Optional[Path] = None
+        self._size = 0
+        self._sequence = 0
+        self.counts = {"recorded": 0, "dropped": 0, "written": 0, "batches": 0, "files": 0, "bytes": 0, "write_errors": 0}
+        self.flush_seconds = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._ring)
+
+    def record(self, record: QueryRecord):
+        """Enqueue a record without blocking; a full ring drops its oldest record"""
+        if len(self._ring) == self._ring.maxlen:
+            self.counts["dropped"] += 1
+        self._ring.append(record)
+        self.counts["recorded"] += 1
+        if self._wakeup is not None and len(self._ring) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the background flusher on the running loop"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._flushing = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write everything in the ring now; returns the records written"""
+        if self._flushing is None:
+            self._flushing = asyncio.Lock()
+        async with self._flushing:
+            if not self._ring:
+                return 0
+            batch = list(self._ring)
+            self._ring.clear()
+            started = time.perf_counter()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, batch)
+            except OSError as e:
+                self.counts["write_errors"] += 1
+                self.counts["dropped"] += len(batch)
+                print(f"⚠️ Query log write failed, dropped {len(batch)} records: {e}")
+                return 0
+            self.flush_seconds += time.perf_counter() - started
+            return len(batch)
+
+    async def close(self):
+        """Stop the flusher and write what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def _write(self, batch: List[QueryRecord]):
+        payload = "".join(json.dumps(record._asdict(), ensure_ascii=False) + "\n" for record in batch)
+        member = gzip.compress(payload.encode("utf-8"), compresslevel=self.compresslevel)
+        if self._path is None or (self._size and self._size + len(member) > self.max_bytes):
+            self._rotate()
+        with open(self._path, "ab") as f:
+            f.write(member)
+        self._size += len(member)
+        self.counts["written"] += len(batch)
+        self.counts["batches"] += 1
+        self.counts["bytes"] += len(member)
+
+    def _rotate(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        # Worker processes share the directory, so the pid keeps their files apart
+        self._path = self.directory / f"queries-{stamp}-{os.getpid()}-{self._sequence:04d}.jsonl.gz"
+        self._size = 0
+        self.counts["files"] += 1
+        # The new file is created by the next write, so keep room for it
+        old = sorted(self.directory.glob(FILE_PATTERN))
+        for path in old[:max(len(old) - self.max_files + 1, 0)]:
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": self.pending,
+            "capacity": self._ring.maxlen,
+            **self.counts,
+            "flush_seconds": round(self.flush_seconds, 4),
+            "file": str(self._path) if self._path is not None else None,
+        }
@@ -0,0 +1,75 @@
+# backend/responses.py
+from typing import Any, Dict, Iterable, Optional, Tuple
+import json
+
+OUT_OF_SCOPE = ("out_of_scope", "out_of_scope")
+
+ResponseKey = Tuple[str, str]
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ResponseTable:
+    """Answers rendered once per (department, query_type) with their JSON bodies
+
+    Each entry keeps the result dict returned by process_query and the
+    encoded /chat body up to the session_id value, so the endpoint only
+    splices in the session id.
+    """
+
+    def __init__(self, results: Dict[ResponseKey, Dict[str, Any]]):
+        self._results = results
+        self._prefixes = {
+            key: _encode(result)[:-1] + b',"session_id":'
+            for key, result in results.items()
+        }
+
+    @classmethod
+    def build(
+        cls,
+        render,
+        departments: Iterable[str],
+        query_types: Iterable[str],
+        sources: Iterable[str],
+        out_of_scope: Dict[str, Any],
+    ) -> "ResponseTable":
+        """Render every (department, query_type) answer plus the out-of-scope reply"""
+        sources = list(sources)
+        query_types = list(query_types)
+        results = {
+            (department, query_type): {
+                "response": render(department, query_type),
+                "is_department_related": True,
+                "sources": sources,
+            }
+            for department in departments
+            for query_type in query_types
+        }
+        results[OUT_OF_SCOPE] = out_of_scope
+        return cls(results)
+
+    def __contains__(self, key: ResponseKey) -> bool:
+        return key in self._results
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def result(self, key: ResponseKey) -> Dict[str, Any]:
+        """Fresh result dict for a key (callers may extend the sources list)
+        
+        Its "template" entry is for the agent, which removes it before the
+        result is returned.
+        """
+        result = self._results[key]
+        return {
+            "response": result["response"],
+            "is_department_related": result["is_department_related"],
+            "sources": list(result["sources"]),
+            "template": key,
+        }
+
+    def body(self, key: ResponseKey, session_id: Optional[str]) -> bytes:
+        """Encoded /chat response body for a key"""
+        return self._prefixes[key] + _encode(session_id) + b"}"
@@ -0,0 +1,355 @@
+# backend/retrieval.py
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import json
+import struct
+import threading
+import time
+
+import numpy as np
+
+from chunkstore import BinaryChunkStore, is_binary_store
+from metrics import STAGE_SECONDS
+
+# FAISS flat index file layout: fourcc, d (int32), ntotal (int64), two unused
+# int64 fields, is_trained (uint8), metric_type (int32), then the float codes
+# prefixed by their element count (uint64).
+_FLAT_HEADER = struct.Struct("<4siqqqBi")
+_FLAT_FOURCC = {b"IxFI": "ip", b"IxF2": "l2"}
+_FLAT_BLOCK_ROWS = 4096
+
+_EMBED = STAGE_SECONDS.labels("embed")
+_SEARCH = STAGE_SECONDS.labels("search")
+
+
+class Hit(NamedTuple):
+    chunk_id: int
+    score: float
+    page: int
+    text: str
+
+
+class ChunkStore:
+    """Read-only chunk texts with packed page and header arrays"""
+
+    __slots__ = ("texts", "pages", "is_header")
+
+    def __init__(self, texts: Tuple[str, ...], pages: np.ndarray, is_header: np.ndarray):
+        self.texts = texts
+        self.pages = pages
+        self.is_header = is_header
+
+    @classmethod
+    def from_json(cls, path: Path) -> "ChunkStore":
+        """Load the chunk list written by the PDF processing step"""
+        with open(path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+
+        texts = tuple(chunk["text"] for chunk in chunks)
+        pages = np.fromiter((chunk.get("page", 0) for chunk in chunks), dtype=np.int32, count=len(chunks))
+        is_header = np.fromiter((chunk.get("is_header", False) for chunk in chunks), dtype=np.bool_, count=len(chunks))
+        pages.setflags(write=False)
+        is_header.setflags(write=False)
+        return cls(texts, pages, is_header)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def text(self, chunk_id: int) -> str:
+        return self.texts[chunk_id]
+
+    def page(self, chunk_id: int) -> int:
+        return int(self.pages[chunk_id])
+
+
+def open_chunk_store(path: Path):
+    """Open a binary chunk store, or fall back to the JSON chunk list"""
+    if is_binary_store(path):
+        return BinaryChunkStore(path)
+    return ChunkStore.from_json(path)
+
+
+def make_hits(chunks, scored: Sequence[Tuple[int, float]]) -> List[Hit]:
+    """Hits for (chunk_id, score) pairs, e.g. fused or remembered results"""
+    return [Hit(chunk_id, score, chunks.page(chunk_id), chunks.text(chunk_id)) for chunk_id, score in scored]
+
+
+def load_flat_index(path: Path) -> Tuple[np.ndarray, str]:
+    """Memory-map the vectors of a FAISS IndexFlatIP/IndexFlatL2 file"""
+    with open(path, "rb") as f:
+        header = f.read(_FLAT_HEADER.size + 8)
+
+    fourcc, dim, ntotal, _, _, _, _ = _FLAT_HEADER.unpack_from(header)
+    if fourcc not in _FLAT_FOURCC:
+        raise ValueError(f"Unsupported index type {fourcc!r} in {path}")
+
+    (count,) = struct.unpack_from("<Q", header, _FLAT_HEADER.size)
+    if count != dim * ntotal:
+        raise ValueError(f"Corrupt flat index {path}: {count} floats for {ntotal}x{dim}")
+
+    vectors = np.memmap(path, dtype="<f4", mode="r", offset=len(header), shape=(ntotal, dim))
+    return vectors, _FLAT_FOURCC[fourcc]
+
+
+class FlatIndexWriter:
+    """Stream vectors into a FAISS IndexFlatIP file without holding them in memory"""
+
+    def __init__(self, path: Path, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self.ntotal = 0
+        self._file = open(path, "wb")
+        self._file.write(b"\0" * (_FLAT_HEADER.size + 8))
+
+    def add(self, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype="<f4")
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got {vectors.shape}")
+        self._file.write(vectors.tobytes())
+        self.ntotal += len(vectors)
+
+    def close(self):
+        """Write the header once the final vector count is known"""
+        self._file.seek(0)
+        self._file.write(_FLAT_HEADER.pack(b"IxFI", self.dimension, self.ntotal, 1 << 20, 1 << 20, 1, 0))
+        self._file.write(struct.pack("<Q", self.ntotal * self.dimension))
+        self._file.close()
+
+    def __enter__(self) -> "FlatIndexWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._file.closed:
+            self.close()
+
+
+def block_scores(queries: np.ndarray, block: np.ndarray, metric: str) -> np.ndarray:
+    """Similarity of each query to each row of a block, larger is better"""
+    if metric == "ip":
+        return queries @ block.T
+    return -(
+        (queries ** 2).sum(axis=1, keepdims=True)
+        - 2 * queries @ block.T
+        + (block ** 2).sum(axis=1)
+    )
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(scores, ids) of the k best entries of a score row, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return scores[top], top
+
+
+class FlatIndex:
+    """Exhaustive search over float32 vectors (usually a memory-mapped flat index)"""
+
+    index_type = "flat"
+
+    def __init__(self, vectors: np.ndarray, metric: str = "ip"):
+        self.vectors = vectors
+        self.metric = metric
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes
+
+    def _scores(self, queries: np.ndarray, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scores of every row, or of the given rows, with one matrix product per block
+
+        FAISS puts the vectors at byte offset 45 of the file, so the memory
+        map is misaligned and numpy would skip BLAS; blocks are copied to
+        aligned memory first, which is far cheaper than the slow path.
+        Selected rows are gathered a block at a time, which aligns them too.
+        """
+        count = len(self.vectors) if ids is None else len(ids)
+        scores = np.empty((len(queries), count), dtype=np.float32)
+        for start in range(0, count, _FLAT_BLOCK_ROWS):
+            if ids is None:
+                block = self.vectors[start:start + _FLAT_BLOCK_ROWS]
+            else:
+                block = self.vectors[ids[start:start + _FLAT_BLOCK_ROWS]]
+            if not block.flags.aligned:
+                block = np.array(block)
+            scores[:, start:start + len(block)] = block_scores(queries, block, self.metric)
+        return scores
+
+    def search(self, queries: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(scores, ids) per query row"""
+        return [top_k(row, k) for row in self._scores(queries)]
+
+    def search_ids(self, queries: np.ndarray, k: int, ids: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(scores, ids) per query row among the given rows only"""
+        return [(scores, ids[top]) for scores, top in (top_k(row, k) for row in self._scores(queries, ids))]
+
+
+class SubsetIndex:
+    """Search restricted to some rows of another index, answering with their global ids
+
+    Nothing is copied: the base index scores only these rows, so a
+    partition of a quantized index costs its id array and no more.
+    """
+
+    def __init__(self, index, ids: np.ndarray):
+        self.index = index
+        self.ids = np.ascontiguousarray(ids, dtype=np.int64)
+        self.index_type = f"{index.index_type}/subset"
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes
+
+    def search(self, queries: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return self.index.search_ids(queries, k, self.ids)
+
+
+class SentenceEncoder:
+    """Query encoder backed by sentence-transformers"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(
+            list(texts),
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ).astype(np.float32, copy=False)
+
+
+class RetrievalEngine:
+    """Top-k vector search over the prospectus chunks
+
+    The index is a raw vector array (searched exhaustively) or any index
+    from vector_index.py, e.g. int8-quantized, IVF or HNSW. Partitions
+    (e.g. the chunks of one department) search the same index restricted to
+    their chunk ids, so a scoped search only scores that department's vectors.
+    """
+
+    def __init__(self, index, chunks, encoder, metric: str = "ip", cache_size: int = 1024):
+        if isinstance(index, np.ndarray):
+            index = FlatIndex(index, metric)
+        if len(index) != len(chunks):
+            raise ValueError(f"Index has {len(index)} vectors but chunk store has {len(chunks)} chunks")
+
+        self.index = index
+        self.chunks = chunks
+        self.encoder = encoder
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.partitions: Dict[str, SubsetIndex] = {}
+
+    @classmethod
+    def open(cls, index_path: Path, chunks_path: Path, encoder, cache_size: int = 1024) -> "RetrievalEngine":
+        """Map the index and load the chunk store once at startup"""
+        from vector_index import open_vector_index
+
+        return cls(open_vector_index(index_path), open_chunk_store(chunks_path), encoder, cache_size=cache_size)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Raw vectors of a flat index"""
+        return self.index.vectors
+
+    @staticmethod
+    def _cache_key(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def embed(self, query: str) -> np.ndarray:
+        """Embed a query, reusing cached embeddings for repeated questions"""
+        started = time.perf_counter()
+        key = self._cache_key(query)
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if vector is None:
+            vector = self.encoder.encode([query])[0]
+            with self._cache_lock:
+                self._cache[key] = vector
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        _EMBED.observe(time.perf_counter() - started)
+        return vector
+
+    def embed_many(self, queries: Sequence[str]) -> np.ndarray:
+        """Embed a batch of queries with one encoder call for the cache misses"""
+        started = time.perf_counter()
+        keys = [self._cache_key(query) for query in queries]
+        with self._cache_lock:
+            vectors: List = [self._cache.get(key) for key in keys]
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            self.cache_hits += len(keys) - len(missing)
+            self.cache_misses += len(missing)
+
+        if missing:
+            encoded = self.encoder.encode([queries[i] for i in missing])
+            with self._cache_lock:
+                for i, vector in zip(missing, encoded):
+                    vectors[i] = vector
+                    self._cache[keys[i]] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        _EMBED.observe(time.perf_counter() - started)
+        return np.stack(vectors).astype(np.float32, copy=False)
+
+    def set_partitions(self, partitions: Dict[str, np.ndarray]):
+        """Scope searches of each partition to its sorted chunk ids"""
+        self.partitions = {name: SubsetIndex(self.index, ids) for name, ids in partitions.items() if len(ids)}
+
+    def _hits(self, scores: np.ndarray, ids: np.ndarray) -> List[Hit]:
+        return [
+            Hit(int(i), float(score), self.chunks.page(int(i)), self.chunks.text(int(i)))
+            for score, i in zip(scores, ids)
+            if i >= 0
+        ]
+
+    def search_vector(self, vector: np.ndarray, k: int, scope: Optional[str] = None) -> List[Hit]:
+        return self.search_vectors(vector[None, :], k, scope)[0]
+
+    def search_vectors(self, queries: np.ndarray, k: int, scope: Optional[str] = None) -> List[List[Hit]]:
+        """Top-k hits for a batch of query vectors in one index call, optionally within a partition"""
+        started = time.perf_counter()
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        index = self.partitions[scope] if scope is not None else self.index
+        hits = [self._hits(scores, ids) for scores, ids in index.search(queries, k)]
+        _SEARCH.observe(time.perf_counter() - started)
+        return hits
+
+    def search(self, query: str, k: int) -> List[Hit]:
+        return self.search_vector(self.embed(query), k)
+
+    def search_many(self, queries: Sequence[str], k: int) -> List[List[Hit]]:
+        return self.search_vectors(self.embed_many(queries), k)
+
+    def stats(self) -> Dict:
+        return {
+            "vectors": len(self.index),
+            "index_type": self.index.index_type,
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "partitions": len(self.partitions),
+            "partition_vectors": sum(len(index) for index in self.partitions.values()),
+        }
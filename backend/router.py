@@ -0,0 +1,119 @@
+# backend/router.py
+"""Embedding router for the department and query type
+
+Each department and query type has a prototype: the normalized mean
+embedding of a few describing phrases (data/routing_prototypes.json). A
+batch of query embeddings is scored against all prototypes with one matrix
+product, and the best label of each kind is taken when it is both similar
+enough (threshold) and clearly ahead of the runner-up (margin). Otherwise
+the keyword match is kept, so a low-confidence embedding never overrides
+an explicit keyword. The guardrail always comes from the keywords.
+
+The query embedding is the one retrieval searches with, so routing costs
+one small matrix product per batch rather than an extra encoder call.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+
+import numpy as np
+
+from matcher import QueryMatch
+from metrics import REGISTRY
+
+ROUTER_DECISIONS = REGISTRY.counter(
+    "uet_router_decisions_total", "Routing decisions by label kind and the source that decided them", ["kind", "source"]
+)
+
+
+def read_prototypes(path: Path) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """(department phrases, query type phrases) keyed by label"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["departments"], data["query_types"]
+
+
+class EmbeddingRouter:
+    """Nearest-prototype department and query type for batches of query embeddings"""
+
+    def __init__(
+        self,
+        encoder,
+        departments: Dict[str, List[str]],
+        query_types: Dict[str, List[str]],
+        threshold: float = 0.3,
+        margin: float = 0.03
+    ):
+        self.encoder = encoder
+        self.threshold = threshold
+        self.margin = margin
+        self.departments = list(departments)
+        self.query_types = list(query_types)
+        labels = list(departments.values()) + list(query_types.values())
+        if any(not phrases for phrases in labels):
+            raise ValueError("Every routing label needs at least one prototype phrase")
+
+        # One encoder call for all phrases, then one mean vector per label
+        vectors = encoder.encode([phrase for phrases in labels for phrase in phrases])
+        bounds = np.cumsum([0] + [len(phrases) for phrases in labels])
+        prototypes = np.stack([vectors[start:end].mean(axis=0) for start, end in zip(bounds[:-1], bounds[1:])])
+        prototypes /= np.maximum(np.linalg.norm(prototypes, axis=1, keepdims=True), 1e-12)
+        self.prototypes = np.ascontiguousarray(prototypes, dtype=np.float32)
+        self.counts = {"queries": 0, "department": 0, "query_type": 0}
+        self._decisions = {
+            (kind, source): ROUTER_DECISIONS.labels(kind, source)
+            for kind in ("department", "query_type") for source in ("embedding", "keyword")
+        }
+
+    def _decide(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(best label index, confident) per row of a score block"""
+        best = scores.argmax(axis=1)
+        if scores.shape[1] == 1:
+            return best, scores[:, 0] >= self.threshold
+        top_two = -np.partition(-scores, 1, axis=1)[:, :2]
+        return best, (top_two[:, 0] >= self.threshold) & (top_two[:, 0] - top_two[:, 1] >= self.margin)
+
+    def scores(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(department scores, query type scores) for a batch of query embeddings"""
+        scores = np.atleast_2d(vectors).astype(np.float32, copy=False) @ self.prototypes.T
+        return scores[:, :len(self.departments)], scores[:, len(self.departments):]
+
+    def route_many(self, vectors: np.ndarray, fallback: Sequence[QueryMatch]) -> List[QueryMatch]:
+        """Refine the keyword matches of a batch with their query embeddings"""
+        department_scores, type_scores = self.scores(vectors)
+        department, department_confident = self._decide(department_scores)
+        query_type, type_confident = self._decide(type_scores)
+
+        routed = []
+        for i, match in enumerate(fallback):
+            if not match.is_department_related:
+                routed.append(match)
+                continue
+            self.counts["queries"] += 1
+            self.counts["department"] += int(department_confident[i])
+            self.counts["query_type"] += int(type_confident[i])
+            self._decisions["department", "embedding" if department_confident[i] else "keyword"].inc()
+            self._decisions["query_type", "embedding" if type_confident[i] else "keyword"].inc()
+            routed.append(QueryMatch(
+                True,
+                self.departments[department[i]] if department_confident[i] else match.department,
+                self.query_types[query_type[i]] if type_confident[i] else match.query_type,
+            ))
+        return routed
+
+    def route(self, vector: np.ndarray, fallback: QueryMatch) -> QueryMatch:
+        return self.route_many(vector[None, :], [fallback])[0]
+
+    def match_many(self, queries: Sequence[str], matcher, vectors: Optional[np.ndarray] = None) -> List[QueryMatch]:
+        """Keyword-match and route a batch of queries, embedding them in one encoder call unless given"""
+        if vectors is None:
+            vectors = self.encoder.encode(list(queries))
+        return self.route_many(vectors, [matcher.match(query) for query in queries])
+
+    def stats(self) -> Dict:
+        return {
+            "labels": len(self.prototypes),
+            "threshold": self.threshold,
+            "margin": self.margin,
+            **self.counts,
+        }
@@ -0,0 +1,205 @@
+# backend/sections.py
+"""Section tree over the prospectus chunks
+
+    python sections.py ../data/processed/faiss_index_chunks.bin ../data/processed/faiss_index_sections.json
+
+Chunks are in reading order, so every section is a contiguous range of
+chunk ids. Title pages (short header chunks such as "Departments") open
+top-level sections; department headings in the running text ("DEPARTMENT
+OF CIVIL ENGINEERING", "INSTITUTE OF DATA SCIENCE") open child sections
+that run until the next heading. Anything before the first title page is
+front matter.
+
+The tree is written next to the index as <index stem>_sections.json by
+ingest.py. The agent maps section titles to departments through the
+SECTION_DEPARTMENTS setting and searches only the chunks of the question's
+department.
+"""
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import argparse
+import json
+import re
+
+import numpy as np
+
+SECTIONS_VERSION = 1
+
+# Running page header repeated at the top of every prospectus chunk
+PAGE_HEADER_PATTERN = re.compile(r"^Postgraduate Prospectus(?: Spring)? \d{4} www\.uet\.edu\.pk \d+\s*")
+HEADING_PATTERN = re.compile(r"\b((?:DEPARTMENT|INSTITUTE|CENTRE|CENTER) OF [A-Z&,.\- ]+?)\s*(?=[A-Z]?[a-z]|\d|$)")
+# Header chunks longer than this are text fragments the chunker mistook for a title page
+MAX_TITLE_WORDS = 6
+
+
+class Section(NamedTuple):
+    title: str
+    start: int
+    end: int
+    first_page: int
+    last_page: int
+    children: Tuple["Section", ...] = ()
+
+
+def sections_path_for(index_path: Path) -> Path:
+    return index_path.with_name(index_path.stem + "_sections.json")
+
+
+def _title(text: str, is_header: bool) -> Optional[str]:
+    if not is_header:
+        return None
+    words = text.split()
+    if not words or len(words) > MAX_TITLE_WORDS or not words[0][0].isupper():
+        return None
+    return " ".join(words)
+
+
+class SectionTreeBuilder:
+    """Open and close sections chunk by chunk, so ingestion needs no second pass"""
+
+    def __init__(self):
+        self._sections: List[Dict] = []
+        self._open: Optional[Dict] = None
+        self._child: Optional[Dict] = None
+        self.count = 0
+        self._open_section("Front matter", 0, 0)
+
+    def _open_section(self, title: str, chunk_id: int, page: int):
+        self._close_child()
+        if self._open is not None:
+            self._open["end"] = chunk_id
+        self._open = {"title": title, "start": chunk_id, "end": chunk_id, "pages": [page, page], "children": []}
+        self._sections.append(self._open)
+
+    def _close_child(self):
+        if self._child is not None:
+            self._child["end"] = self.count
+            self._child = None
+
+    def add(self, text: str, page: int, is_header: bool):
+        chunk_id = self.count
+        text = PAGE_HEADER_PATTERN.sub("", text)
+        title = _title(text, is_header)
+        if title is not None:
+            self._open_section(title, chunk_id, page)
+        else:
+            heading = HEADING_PATTERN.search(text)
+            if heading is not None:
+                title = heading.group(1).strip(" ,.-").title()
+                if self._child is None or self._child["title"] != title:
+                    self._close_child()
+                    self._child = {"title": title, "start": chunk_id, "end": chunk_id, "pages": [page, page], "children": []}
+                    self._open["children"].append(self._child)
+        self.count += 1
+        for section in (self._open, self._child):
+            if section is not None:
+                if section["start"] == chunk_id:
+                    section["pages"][0] = page
+                section["end"] = self.count
+                section["pages"][1] = page
+
+    def build(self) -> "SectionTree":
+        self._close_child()
+        self._open["end"] = self.count
+        sections = [section for section in self._sections if section["end"] > section["start"]]
+        return SectionTree(tuple(_section(section) for section in sections), self.count)
+
+    def write(self, path: Path) -> "SectionTree":
+        tree = self.build()
+        tree.write(path)
+        return tree
+
+
+def _section(data: Dict) -> Section:
+    first_page, last_page = data["pages"]
+    children = tuple(_section(child) for child in data.get("children", ()))
+    return Section(data["title"], data["start"], data["end"], first_page, last_page, children)
+
+
+def _data(section: Section) -> Dict:
+    return {
+        "title": section.title,
+        "start": section.start,
+        "end": section.end,
+        "pages": [section.first_page, section.last_page],
+        "children": [_data(child) for child in section.children],
+    }
+
+
+class SectionTree:
+    """Top-level sections and their children as half-open chunk id ranges"""
+
+    def __init__(self, sections: Tuple[Section, ...], count: int):
+        self.sections = sections
+        self.count = count
+
+    @classmethod
+    def build(cls, chunks) -> "SectionTree":
+        builder = SectionTreeBuilder()
+        for i in range(len(chunks)):
+            builder.add(chunks.text(i), chunks.page(i), bool(chunks.is_header[i]))
+        return builder.build()
+
+    @classmethod
+    def read(cls, path: Path) -> "SectionTree":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SECTIONS_VERSION:
+            raise ValueError(f"{path} has section tree version {data.get('version')}, expected {SECTIONS_VERSION}")
+        return cls(tuple(_section(section) for section in data["sections"]), data["chunks"])
+
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": SECTIONS_VERSION, "chunks": self.count, "sections": [_data(s) for s in self.sections]}, f, indent=2)
+
+    def walk(self) -> Iterator[Tuple[int, Section]]:
+        """(depth, section) in reading order"""
+        for section in self.sections:
+            yield 0, section
+            for child in section.children:
+                yield 1, child
+
+    def section_of(self, chunk_id: int) -> Optional[Section]:
+        """Innermost section holding the chunk"""
+        for section in self.sections:
+            if section.start <= chunk_id < section.end:
+                for child in section.children:
+                    if child.start <= chunk_id < child.end:
+                        return child
+                return section
+        return None
+
+    def partition(self, assign: Callable[[str], Optional[str]]) -> Dict[str, np.ndarray]:
+        """Sorted chunk ids per key, where assign maps a section title to a key or None
+
+        A child section's key takes precedence over its parent's for its own chunks.
+        """
+        owner = np.full(self.count, -1, dtype=np.int32)
+        keys: List[str] = []
+        for _, section in self.walk():
+            key = assign(section.title)
+            if key is None:
+                continue
+            if key not in keys:
+                keys.append(key)
+            owner[section.start:section.end] = keys.index(key)
+        return {key: np.flatnonzero(owner == i) for i, key in enumerate(keys)}
+
+
+def main():
+    from retrieval import open_chunk_store
+
+    parser = argparse.ArgumentParser(description="Build the section tree for a chunk store or JSON chunk list")
+    parser.add_argument("chunks_path", type=Path)
+    parser.add_argument("sections_path", type=Path)
+    args = parser.parse_args()
+
+    tree = SectionTree.build(open_chunk_store(args.chunks_path))
+    tree.write(args.sections_path)
+    for depth, section in tree.walk():
+        print(f"{'   ' * depth}{section.title} (chunks {section.start}-{section.end - 1}, pages {section.first_page}-{section.last_page})")
+    print(f"✅ Wrote {sum(1 for _ in tree.walk())} sections over {tree.count} chunks to {args.sections_path}")
+
+
+if __name__ == "__main__":
+    main()
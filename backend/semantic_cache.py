@@ -0,0 +1,129 @@
+# backend/semantic_cache.py
+"""Answers for near-duplicate questions, matched by embedding similarity
+
+Paraphrases such as "CS labs?" and "computer science lab facilities" miss
+an exact-string cache but embed close together. Entries are kept as rows
+of one preallocated matrix of unit vectors, so a lookup is a single
+matrix-vector product over at most max_entries rows. An answer is only
+served to a question that classifies to the same key (department and
+query type), so "CS labs" never answers "EE labs" however close their
+embeddings are.
+"""
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+import threading
+
+import numpy as np
+
+
+class CachedAnswer(NamedTuple):
+    result: Dict[str, Any]
+    # (chunk_id, score) of the passages behind the answer
+    hits: Tuple[Tuple[int, float], ...]
+    # Seconds the answer took to build, i.e. what a hit saves
+    cost: float
+
+
+class SemanticCache:
+    """Bounded LRU of answers looked up by cosine similarity within a key"""
+
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.9):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None
+        # Per slot: key id (-1 when empty), last use tick and the answer
+        self._keys = np.full(max_entries, -1, dtype=np.int32)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._answers: List[Optional[CachedAnswer]] = [None] * max_entries
+        self._key_ids: Dict[Hashable, int] = {}
+        self._size = 0
+        self._tick = 0
+        self._lock = threading.Lock()
+        # Bumped by invalidate(); answers built before that are not stored
+        self.generation = 0
+        self.counts = {"hits": 0, "misses": 0, "inserts": 0, "refreshed": 0, "evicted_lru": 0, "invalidated": 0}
+        self.saved_seconds = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def _best(self, vector: np.ndarray, key_id: int) -> Tuple[int, float]:
+        """Most similar slot holding the key, or (-1, -inf)"""
+        if self._size == 0 or self._vectors is None or self._vectors.shape[1] != len(vector):
+            return -1, float("-inf")
+        scores = self._vectors[:self._size] @ vector
+        scores[self._keys[:self._size] != key_id] = -np.inf
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+
+    def lookup(self, vector: np.ndarray, key: Hashable) -> Optional[CachedAnswer]:
+        vector = self._normalize(vector)
+        with self._lock:
+            key_id = self._key_ids.get(key)
+            slot, similarity = self._best(vector, key_id) if key_id is not None else (-1, float("-inf"))
+            if similarity < self.threshold:
+                self.counts["misses"] += 1
+                return None
+            self._tick += 1
+            self._last_used[slot] = self._tick
+            answer = self._answers[slot]
+            self.counts["hits"] += 1
+            self.saved_seconds += answer.cost
+            return answer
+
+    def put(self, vector: np.ndarray, key: Hashable, answer: CachedAnswer, generation: Optional[int] = None):
+        """Store an answer; a near-duplicate entry for the same key is replaced in place"""
+        vector = self._normalize(vector)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                self._size = 0
+            key_id = self._key_ids.setdefault(key, len(self._key_ids))
+
+            slot, similarity = self._best(vector, key_id)
+            if similarity >= self.threshold:
+                self.counts["refreshed"] += 1
+            elif self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+                self.counts["inserts"] += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.counts["evicted_lru"] += 1
+                self.counts["inserts"] += 1
+
+            self._tick += 1
+            self._vectors[slot] = vector
+            self._keys[slot] = key_id
+            self._last_used[slot] = self._tick
+            self._answers[slot] = answer
+
+    def invalidate(self):
+        """Drop every answer, e.g. after the knowledge base or index changed"""
+        with self._lock:
+            self.counts["invalidated"] += self._size
+            self._vectors = None
+            self._keys.fill(-1)
+            self._last_used.fill(0)
+            self._answers = [None] * self.max_entries
+            self._key_ids.clear()
+            self._size = 0
+            self.generation += 1
+
+    def stats(self) -> Dict:
+        lookups = self.counts["hits"] + self.counts["misses"]
+        return {
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hit_rate": round(self.counts["hits"] / lookups, 4) if lookups else 0.0,
+            **self.counts,
+            "saved_seconds": round(self.saved_seconds, 6),
+        }
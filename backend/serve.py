@@ -0,0 +1,160 @@
+# backend/serve.py
+"""Multi-worker production server
+
+    python serve.py --workers 4
+
+The parent imports the app, loads the encoder, index and chunk store once,
+freezes the garbage collector and binds the listening socket. It then forks
+the workers, which inherit the loaded data copy-on-write and accept on the
+shared socket. The index and binary chunk store are file-backed memory maps
+and live in the page cache once for all workers; gc.freeze() keeps the
+collector from writing to (and so un-sharing) the pages of every object
+loaded before the fork. Each worker adds only its event loop, request state
+and embedding cache. Workers run the warm-up queries themselves after the
+fork: torch and OpenMP thread pools started in the parent do not survive it.
+
+Metrics are kept per worker, so /metrics and /health describe whichever
+worker answered the scrape.
+
+After re-ingesting, send the parent SIGHUP: it reopens the indexes and
+replaces every worker, which also drops their cached answers.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from config import settings
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket):
+    """Serve on the inherited socket until the parent sends SIGTERM"""
+    # Children must not run the parent's signal handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    config = uvicorn.Config(app, lifespan="on", log_level="warning", access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Fork workers after preloading and replace any that die"""
+
+    def __init__(self, app, sock: socket.socket, workers: int, preload=None):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.preload = preload
+        self.children = {}
+        self.retiring = set()
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(self.app, self.sock)
+            finally:
+                os._exit(0)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, *args):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reload(self, *args):
+        """Reload the shared data, start fresh workers, then retire the old ones"""
+        if self.preload is not None:
+            gc.unfreeze()
+            self.preload()
+            gc.collect()
+            gc.freeze()
+        old = list(self.children)
+        self.retiring.update(old)
+        for _ in range(self.workers):
+            self.spawn()
+        for pid in old:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        print(f"✅ Reloaded, workers: {', '.join(str(pid) for pid in self.children if pid not in self.retiring)}")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.reload)
+        for _ in range(self.workers):
+            self.spawn()
+        print(f"✅ {self.workers} workers started: {', '.join(map(str, self.children))}")
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.children.pop(pid, None)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            if started is None or self.stopping:
+                continue
+            print(f"⚠️ Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            # Avoid a tight fork loop when workers crash on startup
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)
+            self.spawn()
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the UET agent with preloaded, forked workers")
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS or os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    import main as app_module
+
+    started = time.perf_counter()
+    # Load read-only data in the parent; the batcher, the warm-up and other
+    # event-loop state are left to each worker's app lifespan
+    app_module.agent.load()
+    gc.collect()
+    gc.freeze()
+    print(f"✅ Agent preloaded in {time.perf_counter() - started:.2f}s")
+
+    def reload():
+        try:
+            app_module.agent.reload_knowledge_base_file()
+        except Exception as e:
+            print(f"⚠️ Knowledge base reload failed, keeping the current version: {e}")
+        app_module.agent.reload_retrieval(warm_up=False)
+
+    sock = bind_socket(args.host, args.port)
+    print(f"🌐 Server running on http://{args.host}:{args.port} with {args.workers} workers")
+    Supervisor(app_module.app, sock, args.workers, preload=reload).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# backend/sessions.py
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+import sys
+import threading
+import time
+
+# Words that open a follow-up such as "and the admission requirements?"
+FOLLOW_UP_PREFIXES = ("and", "also", "what about", "how about", "same for", "then")
+
+# Per-entry bookkeeping not visible to sys.getsizeof: the OrderedDict hash
+# slot and linked-list node plus the (timestamp, context, size) value tuple
+_ENTRY_OVERHEAD = 104 + sys.getsizeof((0.0, None, 0)) + sys.getsizeof(0.0) + sys.getsizeof(1000)
+
+
+class SessionContext(NamedTuple):
+    department: str
+    query_type: str
+    # (chunk_id, score) of the passages retrieved for the last answer
+    hits: Tuple[Tuple[int, float], ...] = ()
+
+
+_CONTEXT_SIZE = sys.getsizeof(SessionContext("", ""))
+
+
+def is_follow_up(query: str, max_words: int = 8) -> bool:
+    """Short question continuing the previous one ("and the fees?")"""
+    words = query.lower().split()
+    if not words or len(words) > max_words:
+        return False
+    text = " ".join(words)
+    return any(text == prefix or text.startswith(prefix + " ") for prefix in FOLLOW_UP_PREFIXES)
+
+
+class SessionStore:
+    """In-process LRU of the last resolved context per session_id
+
+    Entries expire TTL seconds after their last use and the least recently
+    used ones are evicted once either the entry or the byte cap is reached.
+    Because entries are kept in last-use order, expired ones always sit at
+    the front and are swept in O(1) per write.
+    """
+
+    def __init__(self, max_sessions: int = 100_000, ttl: float = 1800.0, max_bytes: int = 96 * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, SessionContext, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.counts = {"hits": 0, "misses": 0, "expired": 0, "evicted_lru": 0, "evicted_ttl": 0, "evicted_memory": 0}
+        self.follow_ups = 0
+        self.reused_retrievals = 0
+
+    @staticmethod
+    def entry_size(session_id: str, context: SessionContext) -> int:
+        """Approximate bytes held by one entry"""
+        size = sys.getsizeof(session_id) + _CONTEXT_SIZE + _ENTRY_OVERHEAD
+        if context.hits:
+            size += sys.getsizeof(context.hits) + len(context.hits) * (sys.getsizeof((0, 0.0)) + 24)
+        return size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, session_id: Optional[str]) -> Optional[SessionContext]:
+        if not session_id:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.counts["misses"] += 1
+                return None
+            if now - entry[0] > self.ttl:
+                self._remove(session_id)
+                self.counts["expired"] += 1
+                return None
+            self._entries[session_id] = (now, entry[1], entry[2])
+            self._entries.move_to_end(session_id)
+            self.counts["hits"] += 1
+            return entry[1]
+
+    def put(self, session_id: Optional[str], context: SessionContext):
+        if not session_id:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+            size = self.entry_size(session_id, context)
+            self._entries[session_id] = (now, context, size)
+            self.bytes += size
+            self._evict(now)
+
+    def _remove(self, session_id: str):
+        self.bytes -= self._entries.pop(session_id)[2]
+
+    def _evict(self, now: float):
+        entries = self._entries
+        while entries:
+            session_id, (last_used, _, _) = next(iter(entries.items()))
+            if now - last_used > self.ttl:
+                reason = "evicted_ttl"
+            elif len(entries) > self.max_sessions:
+                reason = "evicted_lru"
+            elif self.bytes > self.max_bytes:
+                reason = "evicted_memory"
+            else:
+                break
+            self._remove(session_id)
+            self.counts[reason] += 1
+
+    def record_follow_up(self, reused_retrieval: bool):
+        self.follow_ups += 1
+        self.reused_retrievals += reused_retrieval
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.counts["hits"] + self.counts["misses"] + self.counts["expired"]
+        return {
+            "sessions": len(self._entries),
+            "bytes": self.bytes,
+            "hit_rate": round(self.counts["hits"] / lookups, 4) if lookups else 0.0,
+            **self.counts,
+            "follow_ups": self.follow_ups,
+            "reused_retrievals": self.reused_retrievals,
+        }
@@ -0,0 +1,303 @@
+# backend/vector_index.py
+"""Selectable vector index types
+
+    python vector_index.py sq8
+    python vector_index.py hnsw --param m=32 --param ef_search=64
+
+The flat index written by ingest.py stays the source of truth, since
+re-ingestion reuses its vectors. Other types are built from it into a
+sibling file, and a metadata sidecar (<index stem>_meta.json) records
+which one the agent should open:
+
+    flat   exact search over the memory-mapped float32 vectors (4 B/dim)
+    sq8    int8 scalar quantization, memory-mapped, no FAISS needed (1 B/dim)
+    ivf    FAISS IVF-Flat, probing nprobe of nlist clusters
+    hnsw   FAISS HNSW graph over float32 vectors
+    pq     FAISS product quantization (m bytes per vector)
+
+ivf, hnsw and pq need faiss-cpu.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from retrieval import FlatIndex, block_scores, load_flat_index, top_k
+
+INDEX_TYPES = ("flat", "sq8", "ivf", "hnsw", "pq")
+DEFAULT_PARAMS: Dict[str, Dict[str, Any]] = {
+    "flat": {},
+    "sq8": {},
+    "ivf": {"nlist": 0, "nprobe": 8},
+    "hnsw": {"m": 32, "ef_construction": 80, "ef_search": 64},
+    "pq": {"m": 48, "nbits": 8},
+}
+META_VERSION = 1
+
+_SQ8_MAGIC = b"UETSQ8V1"
+# magic, vector count, dimension, metric (0 = inner product, 1 = L2)
+_SQ8_HEADER = struct.Struct("<8sQQQ")
+_SQ8_BLOCK_ROWS = 16384
+
+
+def meta_path_for(index_path: Path) -> Path:
+    return index_path.with_name(index_path.stem + "_meta.json")
+
+
+class ScalarQuantizedIndex:
+    """Exhaustive search over per-dimension int8 codes
+
+    Each component is stored as round((x - min) / scale) with a per-dimension
+    min and scale, so x . q = codes . (scale * q) + min . q and only the
+    uint8 codes are scanned. Codes are read from a memory map in blocks to
+    keep the float temporaries small.
+    """
+
+    index_type = "sq8"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, dimension, metric = _SQ8_HEADER.unpack_from(self._mm)
+        if magic != _SQ8_MAGIC:
+            raise ValueError(f"{self.path} is not an sq8 index")
+
+        self.metric = "l2" if metric else "ip"
+        offset = _SQ8_HEADER.size
+        self.minimum = np.frombuffer(self._mm, dtype="<f4", count=dimension, offset=offset)
+        self.scale = np.frombuffer(self._mm, dtype="<f4", count=dimension, offset=offset + 4 * dimension)
+        offset += 8 * dimension
+        self.norms = np.frombuffer(self._mm, dtype="<f4", count=count, offset=offset)
+        offset += 4 * count
+        self.codes = np.frombuffer(self._mm, dtype=np.uint8, count=count * dimension, offset=offset).reshape(count, dimension)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.norms.nbytes + self.minimum.nbytes + self.scale.nbytes
+
+    @staticmethod
+    def write(path: Path, vectors: np.ndarray, metric: str):
+        minimum = vectors.min(axis=0).astype(np.float32)
+        scale = ((vectors.max(axis=0) - minimum) / 255.0).astype(np.float32)
+        scale[scale == 0] = 1.0
+
+        with open(path, "wb") as f:
+            f.write(_SQ8_HEADER.pack(_SQ8_MAGIC, len(vectors), vectors.shape[1], int(metric == "l2")))
+            f.write(minimum.tobytes())
+            f.write(scale.tobytes())
+            codes = []
+            norms = []
+            for start in range(0, len(vectors), _SQ8_BLOCK_ROWS):
+                block = np.asarray(vectors[start:start + _SQ8_BLOCK_ROWS], dtype=np.float32)
+                block_codes = np.clip(np.rint((block - minimum) / scale), 0, 255).astype(np.uint8)
+                decoded = block_codes * scale + minimum
+                norms.append((decoded ** 2).sum(axis=1).astype(np.float32))
+                codes.append(block_codes)
+            f.write(np.concatenate(norms).tobytes() if norms else b"")
+            for block_codes in codes:
+                f.write(block_codes.tobytes())
+
+    def _scores(self, queries: np.ndarray, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scores of every row, or of the given rows"""
+        scaled = (queries * self.scale).T.astype(np.float32)
+        offset = queries @ self.minimum
+        count = len(self.codes) if ids is None else len(ids)
+        scores = np.empty((len(queries), count), dtype=np.float32)
+        for start in range(0, count, _SQ8_BLOCK_ROWS):
+            rows = slice(start, start + _SQ8_BLOCK_ROWS) if ids is None else ids[start:start + _SQ8_BLOCK_ROWS]
+            block = self.codes[rows].astype(np.float32)
+            scores[:, start:start + len(block)] = (block @ scaled).T
+        scores += offset[:, None]
+        if self.metric == "l2":
+            norms = self.norms if ids is None else self.norms[ids]
+            scores = -((queries ** 2).sum(axis=1, keepdims=True) - 2 * scores + norms)
+        return scores
+
+    def search(self, queries: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return [top_k(row, k) for row in self._scores(queries)]
+
+    def search_ids(self, queries: np.ndarray, k: int, ids: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return [(scores, ids[top]) for scores, top in (top_k(row, k) for row in self._scores(queries, ids))]
+
+
+class FaissIndex:
+    """IVF, HNSW or PQ index searched through faiss"""
+
+    def __init__(self, path: Path, index_type: str, metric: str, params: Dict[str, Any]):
+        import faiss
+
+        self.path = Path(path)
+        self.index_type = index_type
+        self.metric = metric
+        self.index = faiss.read_index(str(self.path))
+        if index_type == "ivf":
+            self.index.nprobe = params["nprobe"]
+        elif index_type == "hnsw":
+            self.index.hnsw.efSearch = params["ef_search"]
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    @property
+    def nbytes(self) -> int:
+        return self.path.stat().st_size
+
+    def search(self, queries: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        distances, ids = self.index.search(np.ascontiguousarray(queries, dtype=np.float32), min(k, len(self)))
+        # faiss returns squared distances for L2; larger scores are better everywhere else
+        scores = distances if self.metric == "ip" else -distances
+        return list(zip(scores, ids))
+
+    def search_ids(self, queries: np.ndarray, k: int, ids: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Search among the given ids only, skipping the others through an IDSelector
+
+        IndexPQ takes no search parameters, so for pq the codes of the given
+        ids are decoded and scored a block at a time instead.
+        """
+        import faiss
+
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if self.index_type == "pq":
+            codes = faiss.rev_swig_ptr(self.index.codes.data(), self.index.codes.size())
+            codes = codes.reshape(len(self), self.index.code_size)
+            scores = np.empty((len(queries), len(ids)), dtype=np.float32)
+            for start in range(0, len(ids), _SQ8_BLOCK_ROWS):
+                block = self.index.sa_decode(codes[ids[start:start + _SQ8_BLOCK_ROWS]])
+                scores[:, start:start + len(block)] = block_scores(queries, block, self.metric)
+            return [(row_scores, ids[top]) for row_scores, top in (top_k(row, k) for row in scores)]
+
+        selector = faiss.IDSelectorBatch(ids)
+        if self.index_type == "ivf":
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=self.index.nprobe)
+        else:
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=self.index.hnsw.efSearch)
+        distances, found = self.index.search(queries, min(k, len(ids)), params=params)
+        scores = distances if self.metric == "ip" else -distances
+        return list(zip(scores, found))
+
+
+def _build_faiss(path: Path, vectors: np.ndarray, index_type: str, metric: str, params: Dict[str, Any]):
+    import faiss
+
+    x = np.ascontiguousarray(vectors, dtype=np.float32)
+    dimension = x.shape[1]
+    faiss_metric = faiss.METRIC_INNER_PRODUCT if metric == "ip" else faiss.METRIC_L2
+
+    if index_type == "ivf":
+        params["nlist"] = params["nlist"] or max(1, int(math.sqrt(len(x))))
+        quantizer = faiss.IndexFlat(dimension, faiss_metric)
+        index = faiss.IndexIVFFlat(quantizer, dimension, params["nlist"], faiss_metric)
+        index.train(x)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, params["m"], faiss_metric)
+        index.hnsw.efConstruction = params["ef_construction"]
+    else:
+        index = faiss.IndexPQ(dimension, params["m"], params["nbits"], faiss_metric)
+        index.train(x)
+
+    index.add(x)
+    faiss.write_index(index, str(path))
+
+
+def build_index(index_path: Path, index_type: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build the selected index type from the flat index and record it in the sidecar"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {', '.join(INDEX_TYPES)}")
+
+    index_path = Path(index_path)
+    vectors, metric = load_flat_index(index_path)
+    params = {**DEFAULT_PARAMS[index_type], **(params or {})}
+
+    started = time.perf_counter()
+    if index_type == "flat":
+        target = index_path
+    else:
+        suffix = ".bin" if index_type == "sq8" else ".index"
+        target = index_path.with_name(f"{index_path.stem}_{index_type}{suffix}")
+        tmp = target.with_name(target.name + ".tmp")
+        if index_type == "sq8":
+            ScalarQuantizedIndex.write(tmp, vectors, metric)
+        else:
+            _build_faiss(tmp, vectors, index_type, metric, params)
+        os.replace(tmp, target)
+
+    meta = {
+        "version": META_VERSION,
+        "type": index_type,
+        "file": target.name,
+        "metric": metric,
+        "dimension": int(vectors.shape[1]),
+        "count": int(vectors.shape[0]),
+        "params": params,
+        "build_seconds": round(time.perf_counter() - started, 3),
+        "bytes": target.stat().st_size,
+    }
+    meta_path = meta_path_for(index_path)
+    tmp_meta = meta_path.with_name(meta_path.name + ".tmp")
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_meta, meta_path)
+    return meta
+
+
+def read_meta(index_path: Path) -> Optional[Dict[str, Any]]:
+    meta_path = meta_path_for(Path(index_path))
+    if not meta_path.exists():
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != META_VERSION:
+        return None
+    return meta
+
+
+def open_vector_index(index_path: Path):
+    """Open the index type named in the sidecar, or the flat index without one"""
+    index_path = Path(index_path)
+    meta = read_meta(index_path)
+    if meta is None or meta["type"] == "flat":
+        vectors, metric = load_flat_index(index_path)
+        return FlatIndex(vectors, metric)
+
+    target = index_path.with_name(meta["file"])
+    if meta["type"] == "sq8":
+        index = ScalarQuantizedIndex(target)
+    else:
+        index = FaissIndex(target, meta["type"], meta["metric"], meta["params"])
+    if len(index) != meta["count"]:
+        raise ValueError(f"{target} has {len(index)} vectors but its metadata records {meta['count']}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a vector index type from the flat prospectus index")
+    parser.add_argument("type", choices=INDEX_TYPES)
+    parser.add_argument("--index", type=Path, default=None)
+    parser.add_argument("--param", action="append", default=[], help="index parameter as name=value, e.g. nprobe=16")
+    args = parser.parse_args()
+
+    from config import settings
+
+    params = {}
+    for item in args.param:
+        name, _, value = item.partition("=")
+        params[name] = int(value)
+
+    meta = build_index(args.index or settings.INDEX_PATH, args.type, params)
+    print(f"✅ Built {meta['type']} index {meta['file']} ({meta['count']} vectors, {meta['bytes']:,} bytes) in {meta['build_seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Startup time and RSS of the JSON chunk list vs the binary chunk store
+
+    python benchmarks/bench_chunkstore.py
+
+The shipped 263-chunk corpus is replicated to simulate more prospectuses.
+Each load runs in a fresh interpreter so RSS numbers are not polluted.
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from chunkstore import write_chunk_store
+
+SCALES = (1, 10, 100)
+
+
+def rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def child(kind: str, path: str):
+    import numpy  # noqa: F401  (imported before measuring so both loaders pay it equally)
+    from retrieval import ChunkStore
+    from chunkstore import BinaryChunkStore
+
+    before = rss_kb()
+    started = time.perf_counter()
+    store = ChunkStore.from_json(Path(path)) if kind == "json" else BinaryChunkStore(Path(path))
+    load_ms = (time.perf_counter() - started) * 1000
+    rss_delta = rss_kb() - before
+
+    started = time.perf_counter()
+    for chunk_id in (0, len(store) // 2, len(store) - 1):
+        store.text(chunk_id)
+    fetch_us = (time.perf_counter() - started) * 1e6 / 3
+
+    print(json.dumps({"load_ms": load_ms, "rss_kb": rss_delta, "fetch_us": fetch_us}))
+
+
+def measure(kind: str, path: Path) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", kind, str(path)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    with open(ROOT / "data" / "processed" / "faiss_index_chunks.json", "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    print(f"{'chunks':>8} {'format':>7} {'file KB':>9} {'load ms':>9} {'RSS +KB':>9} {'text() µs':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in SCALES:
+            corpus = chunks * scale
+            json_path = Path(tmp) / f"chunks_{scale}.json"
+            store_path = Path(tmp) / f"chunks_{scale}.bin"
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(corpus, f, indent=2)
+            write_chunk_store(store_path, corpus)
+
+            for kind, path in (("json", json_path), ("binary", store_path)):
+                result = measure(kind, path)
+                print(
+                    f"{len(corpus):>8} {kind:>7} {path.stat().st_size / 1024:>9.0f} "
+                    f"{result['load_ms']:>9.2f} {result['rss_kb']:>9} {result['fetch_us']:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,94 @@
+"""Cold start: time from process launch to liveness, first /chat and readiness
+
+    python benchmarks/bench_cold_start.py [--runs 3]
+
+Launches the API with uvicorn in a fresh process for each run and polls
+it. Background startup (the default) serves /chat from the knowledge base
+while the indexes and encoder load; blocking startup waits for them, and
+the warm-up, before accepting any request.
+"""
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND = ROOT / "backend"
+
+SERVER = """
+import sys
+import uvicorn
+from config import settings
+settings.BACKGROUND_STARTUP = {background}
+settings.KNOWLEDGE_BASE_WATCH_SECONDS = 0
+import main
+uvicorn.run(main.app, host="127.0.0.1", port={port}, log_level="warning")
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start(background: bool, timeout: float = 120.0):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVER.format(background=background, port=port)],
+        cwd=BACKEND, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    marks = {}
+    try:
+        with httpx.Client(timeout=5.0) as client:
+            while len(marks) < 3 and time.perf_counter() - started < timeout:
+                try:
+                    if "live" not in marks and client.get(f"{url}/health").status_code == 200:
+                        marks["live"] = time.perf_counter() - started
+                    if "chat" not in marks:
+                        response = client.post(f"{url}/chat", json={"message": "Computer science lab facilities"})
+                        if response.status_code == 200:
+                            marks["chat"] = time.perf_counter() - started
+                    if "ready" not in marks and client.get(f"{url}/ready").status_code == 200:
+                        marks["ready"] = time.perf_counter() - started
+                        marks["components"] = client.get(f"{url}/ready").json()["components"]
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait()
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=BACKEND, check=True, stdout=subprocess.DEVNULL)
+    print(f"📊 python -c 'import main': {time.perf_counter() - started:.2f}s")
+
+    for background in (True, False):
+        runs = [cold_start(background) for _ in range(args.runs)]
+        label = "background" if background else "blocking  "
+        summary = ", ".join(
+            f"{mark} {statistics.median(run[mark] for run in runs):.2f}s"
+            for mark in ("live", "chat", "ready")
+            if all(mark in run for run in runs)
+        )
+        print(f"📊 {label} startup (median of {args.runs}): {summary}")
+    for name, component in runs[-1].get("components", {}).items():
+        print(f"   {name:15s} {component['status']:8s} {component.get('seconds', 0):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Streamlit rerun time and session state size against chat length
+
+    python benchmarks/bench_frontend_history.py [--messages 10 --messages 100 --messages 1000]
+
+Each rerun of frontend/app.py redraws the chat history. This times reruns
+with streamlit.testing's AppTest for conversations of each length. The
+baseline is the original loop, which redrew every stored message with its
+markdown, source expander, warning and caption. The app draws one
+pre-rendered block for each message on the newest page and keeps at most
+HISTORY_MAX_MESSAGES messages. No backend is needed: the reruns have no
+pending question. Pickled session state size is reported even without
+streamlit.
+"""
+import argparse
+import pickle
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "frontend"))
+
+from history import ChatHistory
+
+APP_PATH = ROOT / "frontend" / "app.py"
+RESPONSE = {
+    "response": "## Computer Science Department\n\n**Lab Facilities:**\n- Advanced Computing Lab\n- Network Security Lab\n- AI Research Center",
+    "sources": ["UET Department Database", "UET Prospectus Page 41", "UET Prospectus Page 42"],
+    "is_department_related": True,
+    "meta": {"latency_ms": 84.0, "first_byte_ms": 12.0},
+}
+
+
+def legacy_app():
+    """The history loop as it was before blocks and pages"""
+    import streamlit as st
+
+    for message in st.session_state.messages:
+        role = message["role"]
+        with st.chat_message(role):
+            st.markdown(message["content"])
+            if role == "assistant" and message.get("sources"):
+                with st.expander("📚 Information Sources"):
+                    for source in message["sources"]:
+                        st.write(f"• {source}")
+            if role == "assistant" and not message.get("is_department_related", True):
+                st.warning("⚠️ Query was out of department scope")
+            if role == "assistant":
+                st.caption(f"⏱️ {message['meta']['latency_ms']:.0f} ms")
+
+
+def make_conversation(count: int):
+    """Raw message list and the app's bounded history for `count` messages"""
+    messages = []
+    # The defaults are the app's HISTORY_MAX_MESSAGES and HISTORY_PAGE_SIZE
+    history = ChatHistory()
+    for i in range(count // 2):
+        question = f"What are the lab facilities in Computer Science? ({i})"
+        response = {**RESPONSE, "response": f"{RESPONSE['response']}\n- Lab {i}", "sources": list(RESPONSE["sources"])}
+        messages.append({"role": "user", "content": question})
+        messages.append({"role": "assistant", "content": response["response"], "sources": response["sources"],
+                         "is_department_related": True, "meta": dict(response["meta"])})
+        history.add_user(question)
+        history.add_assistant(response)
+    return messages, history
+
+
+def rerun_ms(test) -> float:
+    test.run(timeout=120)
+    return min(timeit.Timer(lambda: test.run(timeout=120)).repeat(repeat=5, number=1)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, action="append", default=None)
+    args = parser.parse_args()
+
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError as e:
+        print(f"⚠️ streamlit unavailable ({e}); reporting session state size only")
+        AppTest = None
+
+    print(f"{'messages':>9}{'state KB before':>17}{'state KB after':>16}{'rerun ms before':>17}{'rerun ms after':>16}")
+    for count in args.messages or [10, 100, 1000]:
+        messages, history = make_conversation(count)
+        before_kb = len(pickle.dumps(messages)) / 1024
+        after_kb = len(pickle.dumps(history)) / 1024
+        before_ms = after_ms = float("nan")
+        if AppTest is not None:
+            legacy = AppTest.from_function(legacy_app)
+            legacy.session_state["messages"] = messages
+            before_ms = rerun_ms(legacy)
+            app = AppTest.from_file(str(APP_PATH))
+            app.session_state["history"] = history
+            app.session_state["history_pages"] = 1
+            after_ms = rerun_ms(app)
+        print(f"{count:>9}{before_kb:>17.1f}{after_kb:>16.1f}{before_ms:>17.1f}{after_ms:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Answer generation under bursts of identical questions, with and without coalescing
+
+    python benchmarks/bench_generation.py [--bursts 20] [--burst-size 16] [--latency 0.05] [--slots 2]
+
+Each burst sends burst-size copies of a few questions at once, as happens
+when a question goes round a class group. The echo backend stands in for
+the model: every generation holds one of --slots model slots for
+--latency seconds, like a model server with limited concurrency. With
+coalescing, each distinct prompt in a burst is generated once and shared.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from generation import EchoBackend, Generator
+
+QUESTIONS = [
+    ("What is the hostel fee?", "Hostel fee: $500 per semester (if applicable)"),
+    ("Computer science labs?", "Advanced Computing Lab with high-performance workstations"),
+    ("Admission requirements for civil engineering?", "Intermediate/FSC with minimum 60% marks"),
+]
+PASSAGES = [
+    (40, "Hostel accommodation is available on campus for male and female students. Rooms are allotted on merit.", 0.8),
+    (52, "The Department of Civil Engineering is one of the oldest departments in the country.", 0.6),
+    (11, "Vision and Mission. Chancellor's Message. Vice Chancellor's Message.", 0.2),
+]
+
+
+class SlottedBackend(EchoBackend):
+    """Echo backend that can only run `slots` generations at a time"""
+
+    def __init__(self, latency: float, slots: int):
+        super().__init__(latency)
+        self._slots = asyncio.Semaphore(slots)
+
+    async def stream(self, messages):
+        async with self._slots:
+            async for chunk in super().stream(messages):
+                yield chunk
+
+
+async def run_bursts(coalesce: bool, bursts: int, burst_size: int, latency: float, slots: int):
+    backend = SlottedBackend(latency, slots)
+    generator = Generator(backend, coalesce=coalesce)
+    prompts = [generator.prompt(question, knowledge, PASSAGES)[0] for question, knowledge in QUESTIONS]
+    latencies = []
+
+    async def ask(messages):
+        started = time.perf_counter()
+        await generator.generate(messages)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(bursts):
+        await asyncio.gather(*(ask(messages) for messages in prompts for _ in range(burst_size)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "backend_calls": backend.calls,
+        "seconds": elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slots", type=int, default=2)
+    args = parser.parse_args()
+
+    results = {}
+    for coalesce in (False, True):
+        results[coalesce] = result = asyncio.run(run_bursts(coalesce, args.bursts, args.burst_size, args.latency, args.slots))
+        label = "coalesced  " if coalesce else "independent"
+        print(
+            f"📊 {label} {result['requests']} requests, {result['backend_calls']:5d} model calls, "
+            f"{result['requests'] / result['seconds']:8.1f} req/s, "
+            f"p50 {result['p50_ms']:7.1f} ms, p95 {result['p95_ms']:7.1f} ms"
+        )
+    print(f"📊 Coalescing speedup: {results[False]['seconds'] / results[True]['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
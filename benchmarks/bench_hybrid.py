@@ -0,0 +1,92 @@
+"""Recall and latency of lexical-only, vector-only and hybrid retrieval
+
+    python benchmarks/bench_hybrid.py [--queries 200] [--k 3]
+
+Known-item queries are cut from the shipped prospectus chunks: a short
+phrase from the middle of a chunk, and the chunk's rarest exact tokens
+(course codes, amounts, names). A query counts as recalled when its source
+chunk is in the top k. Vector and hybrid modes need sentence-transformers
+and the shipped index; without them only the lexical numbers are printed.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from config import settings
+from lexical import LexicalIndex, build_lexical_index, reciprocal_rank_fusion, tokenize
+from mcp_agent import PAGE_HEADER_PATTERN
+from retrieval import RetrievalEngine, SentenceEncoder, open_chunk_store
+
+
+def known_item_queries(chunks, lexical_df, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    phrase, exact = [], []
+    candidates = [i for i in range(len(chunks)) if len(PAGE_HEADER_PATTERN.sub("", chunks.text(i)).split()) >= 40]
+    for chunk_id in rng.sample(candidates, min(count, len(candidates))):
+        words = PAGE_HEADER_PATTERN.sub("", chunks.text(chunk_id)).split()
+        start = rng.randrange(len(words) // 4, len(words) - 6)
+        phrase.append((" ".join(words[start:start + 6]), chunk_id))
+
+        terms = sorted(set(tokenize(" ".join(words))), key=lambda term: (lexical_df.get(term, 0), term))
+        exact.append((" ".join(terms[:2]), chunk_id))
+    return {"phrase": phrase, "exact tokens": exact}
+
+
+def evaluate(search, queries, k: int):
+    recalled = 0
+    started = time.perf_counter()
+    for query, chunk_id in queries:
+        recalled += chunk_id in search(query, k)
+    elapsed = time.perf_counter() - started
+    return recalled / len(queries), elapsed / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_TOP_K)
+    parser.add_argument("--candidates", type=int, default=settings.HYBRID_CANDIDATES)
+    args = parser.parse_args()
+
+    chunks = open_chunk_store(settings.CHUNK_STORE_PATH)
+    lexical_path = settings.LEXICAL_INDEX_PATH
+    if not lexical_path.exists():
+        build_lexical_index(lexical_path, (chunks.text(i) for i in range(len(chunks))))
+    lexical = LexicalIndex(lexical_path)
+
+    document_frequency = {}
+    for i in range(len(chunks)):
+        for term in set(tokenize(chunks.text(i))):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    query_sets = known_item_queries(chunks, document_frequency, args.queries)
+
+    modes = {"lexical": lambda query, k: [chunk_id for chunk_id, _ in lexical.search(query, k)]}
+    try:
+        engine = RetrievalEngine.open(settings.INDEX_PATH, settings.CHUNK_STORE_PATH, SentenceEncoder(settings.EMBEDDING_MODEL), cache_size=0)
+        engine.search("warm up", 1)
+    except Exception as e:
+        print(f"⚠️ Vector search unavailable ({e}); reporting lexical only")
+    else:
+        def hybrid(query, k):
+            vector_ids = [hit.chunk_id for hit in engine.search(query, args.candidates)]
+            lexical_ids = [chunk_id for chunk_id, _ in lexical.search(query, args.candidates)]
+            return [chunk_id for chunk_id, _ in reciprocal_rank_fusion([vector_ids, lexical_ids], k, settings.RRF_K)]
+
+        modes["vector"] = lambda query, k: [hit.chunk_id for hit in engine.search(query, k)]
+        modes["hybrid"] = hybrid
+
+    print(f"📊 {len(chunks)} chunks, {lexical.vocabulary_size} terms, recall@{args.k}")
+    print(f"{'queries':<14}{'mode':<10}{'recall':>8}{'µs/query':>11}")
+    for name, queries in query_sets.items():
+        for mode, search in modes.items():
+            recall, latency = evaluate(search, queries, args.k)
+            print(f"{name:<14}{mode:<10}{recall:>8.1%}{latency:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
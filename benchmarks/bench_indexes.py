@@ -0,0 +1,80 @@
+"""Recall, latency, build time and size of each vector index type
+
+    python benchmarks/bench_indexes.py [--scale 100] [--k 3]
+
+The shipped 263 prospectus vectors are expanded to a larger corpus by
+adding normalized Gaussian noise to copies (--scale copies per vector), to
+approximate a multi-year, multi-campus index. Queries are fresh noisy
+copies of random corpus vectors. Recall@k is measured against exact flat
+search. ivf, hnsw and pq are skipped when faiss-cpu is missing.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from config import settings
+from retrieval import FlatIndexWriter, load_flat_index
+from vector_index import INDEX_TYPES, build_index, open_vector_index
+
+
+def noisy_copies(vectors: np.ndarray, copies: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    repeated = np.repeat(vectors, copies, axis=0)
+    repeated = repeated + rng.normal(0.0, noise, repeated.shape).astype(np.float32)
+    return (repeated / np.linalg.norm(repeated, axis=1, keepdims=True)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_TOP_K)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base, _ = load_flat_index(settings.INDEX_PATH)
+    corpus = noisy_copies(np.asarray(base), args.scale, 0.03, rng)
+    queries = noisy_copies(corpus[rng.choice(len(corpus), args.queries)], 1, 0.03, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = Path(tmp) / "bench.index"
+        with FlatIndexWriter(index_path, corpus.shape[1]) as writer:
+            writer.add(corpus)
+
+        exact = None
+        print(f"📊 {len(corpus):,} vectors x {corpus.shape[1]} dims, {args.queries} queries, recall@{args.k} vs flat")
+        print(f"{'type':<6}{'recall':>8}{'µs/query':>10}{'batch µs/q':>12}{'build s':>9}{'size':>12}")
+        for index_type in INDEX_TYPES:
+            try:
+                meta = build_index(index_path, index_type)
+            except ImportError as e:
+                print(f"{index_type:<6} skipped ({e})")
+                continue
+            index = open_vector_index(index_path)
+            index.search(queries[:1], args.k)
+
+            started = time.perf_counter()
+            single = [index.search(query[None, :], args.k)[0][1] for query in queries]
+            single_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+            started = time.perf_counter()
+            index.search(queries, args.k)
+            batch_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+            if exact is None:
+                exact = single
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(exact, single)])
+            print(
+                f"{index_type:<6}{recall:>8.1%}{single_us:>10.1f}{batch_us:>12.1f}"
+                f"{meta['build_seconds']:>9.2f}{meta['bytes'] / 1024 / 1024:>10.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
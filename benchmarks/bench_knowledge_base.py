@@ -0,0 +1,94 @@
+"""Knowledge base reload time, and request latency while reloads run
+
+    python benchmarks/bench_knowledge_base.py [--reloads 50] [--seconds 2]
+
+Times a full reload (read the JSON file, freeze it, render every answer)
+and then serves process_query() from concurrent clients twice: once
+undisturbed and once while the knowledge base is rebuilt back to back on
+a worker thread and swapped in. Retrieval is off so the numbers isolate
+the knowledge base.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from config import settings
+from mcp_agent import MCPAgent
+
+QUERIES = [
+    "What are the lab facilities in Computer Science?",
+    "Admission requirements for electrical engineering",
+    "What is the fee structure?",
+    "Tell me about the architecture department",
+    "Tell me a joke",
+]
+
+
+async def serve(agent: MCPAgent, seconds: float, clients: int, reloading: bool):
+    latencies = []
+    reloads = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await agent.process_query(QUERIES[i % len(QUERIES)])
+            latencies.append(time.perf_counter() - started)
+            i += 1
+            # Yield like a real request between queries
+            await asyncio.sleep(0)
+
+    async def reloader():
+        nonlocal reloads
+        while time.perf_counter() < deadline:
+            await asyncio.get_running_loop().run_in_executor(None, agent.reload_knowledge_base_file)
+            reloads += 1
+
+    tasks = [client(i) for i in range(clients)] + ([reloader()] if reloading else [])
+    await asyncio.gather(*tasks)
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "reloads": reloads,
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        "max_us": latencies[-1] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reloads", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--clients", type=int, default=8)
+    args = parser.parse_args()
+
+    agent = MCPAgent({"DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS})
+    timings = []
+    for _ in range(args.reloads):
+        started = time.perf_counter()
+        agent.reload_knowledge_base_file()
+        timings.append(time.perf_counter() - started)
+    print(
+        f"📊 Reload: median {statistics.median(timings) * 1000:.2f} ms, max {max(timings) * 1000:.2f} ms "
+        f"({len(agent.department_info)} departments, {len(agent.responses)} answers)"
+    )
+
+    for reloading in (False, True):
+        result = asyncio.run(serve(agent, args.seconds, args.clients, reloading))
+        label = "during reloads" if reloading else "steady        "
+        print(
+            f"📊 Requests {label}: {result['requests']:7d} served, p50 {result['p50_us']:7.1f} µs, "
+            f"p99 {result['p99_us']:7.1f} µs, max {result['max_us']:8.1f} µs ({result['reloads']} reloads)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Compare the compiled QueryMatcher against the original substring classifiers
+
+    python benchmarks/bench_matcher.py
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from config import settings
+from matcher import QueryMatcher
+
+
+def legacy_classify(query: str):
+    """Guardrail + _identify_department + _identify_query_type before the matcher"""
+    query_lower = query.lower()
+    is_related = any(keyword in query_lower for keyword in settings.DEPARTMENT_KEYWORDS)
+    if not is_related:
+        return is_related, None, None
+
+    query_lower = query.lower()
+    if any(word in query_lower for word in ["computer", "cs", "software", "it", "programming"]):
+        department = "computer_science"
+    elif any(word in query_lower for word in ["electrical", "electronics", "power", "circuit"]):
+        department = "electrical_engineering"
+    elif any(word in query_lower for word in ["mechanical", "thermo", "manufacturing"]):
+        department = "mechanical_engineering"
+    elif any(word in query_lower for word in ["civil", "structural", "construction"]):
+        department = "civil_engineering"
+    elif any(word in query_lower for word in ["architecture", "building", "design"]):
+        department = "architecture"
+    else:
+        department = "general"
+
+    query_lower = query.lower()
+    if any(word in query_lower for word in ["lab", "facility", "equipment", "infrastructure"]):
+        query_type = "facilities"
+    elif any(word in query_lower for word in ["admission", "apply", "requirement", "eligibility"]):
+        query_type = "admission"
+    elif any(word in query_lower for word in ["course", "program", "subject", "curriculum"]):
+        query_type = "courses"
+    elif any(word in query_lower for word in ["fee", "tuition", "cost", "payment"]):
+        query_type = "fees"
+    elif any(word in query_lower for word in ["tell me about", "what is", "information about"]):
+        query_type = "description"
+    else:
+        query_type = "general"
+
+    return is_related, department, query_type
+
+
+def load_queries():
+    corpus = json.loads((ROOT / "tests" / "matcher_corpus.json").read_text(encoding="utf-8"))
+    queries = [case["query"] for case in corpus]
+    groups = json.loads((ROOT / "tests" / "test_queries.json").read_text(encoding="utf-8"))
+    for group in groups.values():
+        queries.extend(group)
+    return queries
+
+
+def main():
+    queries = load_queries()
+    build_start = timeit.default_timer()
+    matcher = QueryMatcher(settings.DEPARTMENT_KEYWORDS, settings.DEPARTMENT_ROUTES, settings.QUERY_TYPE_ROUTES)
+    build_ms = (timeit.default_timer() - build_start) * 1000
+
+    rounds = 2000
+    results = {}
+    for name, classify in (("legacy substring chains", legacy_classify), ("compiled matcher", matcher.match)):
+        timer = timeit.Timer(lambda: [classify(query) for query in queries])
+        best = min(timer.repeat(repeat=5, number=rounds))
+        results[name] = best / (rounds * len(queries)) * 1e6
+
+    print(f"📊 {len(queries)} queries, matcher built in {build_ms:.2f} ms")
+    for name, per_query_us in results.items():
+        print(f"  {name:<26} {per_query_us:7.2f} µs/query")
+    legacy, compiled = results.values()
+    print(f"  speedup: {legacy / compiled:.2f}x")
+
+    def classify(query: str):
+        # Like the legacy chains, a rejected query has no department or query type
+        match = matcher.match(query)
+        return tuple(match) if match.is_department_related else (False, None, None)
+
+    changed = [(query, legacy_classify(query), classify(query)) for query in queries]
+    changed = [(query, old, new) for query, old, new in changed if old != new]
+    admitted = sum(new[0] and not old[0] for _, old, new in changed)
+    rejected = sum(old[0] and not new[0] for _, old, new in changed)
+    print(f"🔍 {len(changed)} queries classified differently ({admitted} newly admitted, {rejected} newly rejected):")
+    for query, old, new in changed:
+        print(f"  - {query!r}: {old} -> {new}")
+
+
+if __name__ == "__main__":
+    main()
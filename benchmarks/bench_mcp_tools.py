@@ -0,0 +1,74 @@
+"""Latency of MCP tool calls: direct dispatch, in-process MCP and concurrency
+
+    python benchmarks/bench_mcp_tools.py [--calls 500]
+
+Measures the per-call cost of AgentTools.call (what /tools/call uses) and of
+the same call through mcp.Client(server), which runs the full protocol
+in memory. It then compares four prospectus searches issued one after
+another and gathered in one call_many(), with the agent loaded as the API
+loads it (batched searches when the encoder is available).
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from main import agent
+from mcp_server import AgentTools, build_server
+
+SEARCHES = [
+    ("search_prospectus", {"query": "hostel accommodation for students"}),
+    ("search_prospectus", {"query": "PhD scholarships"}),
+    ("search_prospectus", {"query": "electrical engineering laboratories"}),
+    ("search_prospectus", {"query": "fee refund policy"}),
+]
+
+
+async def per_call_us(call, calls: int) -> float:
+    await call()
+    started = time.perf_counter()
+    for _ in range(calls):
+        await call()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def run(calls: int):
+    from mcp import Client
+
+    await agent.initialize()
+    tools = AgentTools(agent)
+    lookup = {"department": "computer science", "topic": "admission"}
+
+    direct = await per_call_us(lambda: tools.call("department_lookup", lookup), calls)
+    async with Client(build_server(tools)) as client:
+        protocol = await per_call_us(lambda: client.call_tool("department_lookup", lookup), calls)
+    print(f"📊 department_lookup: direct {direct:8.1f} µs/call, in-process MCP {protocol:8.1f} µs/call")
+
+    rounds = max(calls // 20, 5)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for name, arguments in SEARCHES:
+            await tools.call(name, arguments)
+    serial = (time.perf_counter() - started) / rounds * 1000
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await tools.call_many(SEARCHES)
+    gathered = (time.perf_counter() - started) / rounds * 1000
+    print(f"📊 {len(SEARCHES)} searches: serial {serial:.2f} ms, gathered {gathered:.2f} ms")
+    await agent.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
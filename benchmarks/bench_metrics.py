@@ -0,0 +1,98 @@
+"""Overhead of the metrics instrumentation on the request path
+
+    python benchmarks/bench_metrics.py
+
+Times each primitive used on the hot path (timer pair plus histogram
+observation, counter increment, in-flight gauge, labelled child lookup) and
+adds them up per request the way /chat uses them. The budget is a few
+microseconds per request; a /metrics scrape is timed as well.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from config import settings
+from metrics import IN_FLIGHT, QUERIES, REGISTRY, REQUEST_SECONDS, STAGE_SECONDS
+from mcp_agent import MCPAgent
+
+ROUNDS = 200_000
+BUDGET_US = 5.0
+
+
+def per_call_ns(fn, rounds: int = ROUNDS) -> float:
+    fn()
+    started = time.perf_counter_ns()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter_ns() - started) / rounds
+
+
+def main():
+    histogram = STAGE_SECONDS.labels("bench")
+    counter = QUERIES.labels("bench")
+    gauge = IN_FLIGHT.labels("bench")
+    clock = time.perf_counter
+
+    def empty():
+        pass
+
+    def timed_stage():
+        started = clock()
+        histogram.observe(clock() - started)
+
+    def gauge_pair():
+        gauge.inc()
+        gauge.dec()
+
+    baseline = per_call_ns(empty)
+    costs = {
+        "timer + observe": per_call_ns(timed_stage) - baseline,
+        "counter inc": per_call_ns(counter.inc) - baseline,
+        "in-flight inc/dec": per_call_ns(gauge_pair) - baseline,
+        "labelled lookup": per_call_ns(lambda: REQUEST_SECONDS.labels("/chat", "POST")) - baseline,
+    }
+
+    # /chat: classify + render stages (retrieve, embed and search when the
+    # index is loaded), one outcome counter, middleware gauge, lookup and timer
+    stages = 5
+    per_request = (
+        stages * costs["timer + observe"]
+        + costs["counter inc"]
+        + costs["in-flight inc/dec"]
+        + costs["labelled lookup"]
+        + costs["timer + observe"]
+    )
+
+    agent = MCPAgent({
+        "DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS,
+        "DEPARTMENT_ROUTES": settings.DEPARTMENT_ROUTES,
+        "QUERY_TYPE_ROUTES": settings.QUERY_TYPE_ROUTES
+    })
+
+    async def queries(n: int):
+        for _ in range(n):
+            await agent.process_query("What are the lab facilities in Computer Science?")
+
+    started = time.perf_counter_ns()
+    asyncio.run(queries(20_000))
+    process_query_us = (time.perf_counter_ns() - started) / 20_000 / 1000
+
+    scrape_ms = per_call_ns(REGISTRY.render, 200) / 1e6
+
+    print(f"{'primitive':<22}{'ns/call':>10}")
+    for name, cost in costs.items():
+        print(f"{name:<22}{cost:>10.0f}")
+    print(f"\n📊 Estimated overhead per /chat request: {per_request / 1000:.2f} µs (budget {BUDGET_US} µs)")
+    print(f"📊 process_query (template answer): {process_query_us:.2f} µs per call")
+    print(f"📊 /metrics scrape: {scrape_ms:.2f} ms ({len(REGISTRY.render().splitlines())} lines)")
+    if per_request / 1000 > BUDGET_US:
+        print("⚠️ Instrumentation overhead is over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Cost of the query log on the request path and in the background flusher
+
+    python benchmarks/bench_query_log.py [--records 20000] [--batch-size 64 --batch-size 512]
+
+record() is what a request pays: a deque append. The flush, gzip plus an
+appending write on a worker thread, is timed per batch size together with
+the compressed bytes per record. The baseline is the simplest alternative,
+one synchronous JSON line appended to an open file per request.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from query_log import QueryLog, QueryRecord
+
+QUERIES = [
+    "What are the lab facilities in Computer Science?",
+    "Admission requirements for Electrical Engineering",
+    "Fee structure for Architecture program",
+    "How do I get into the civil engineering program?",
+    "Mechatronics degree courses",
+]
+
+
+def make_records(count: int):
+    return [
+        QueryRecord(round(time.time(), 3), f"session-{i % 97}", QUERIES[i % len(QUERIES)],
+                    "computer_science", "facilities", True, 12.345, i % 4 == 0)
+        for i in range(count)
+    ]
+
+
+def per_record_us(function, count: int, repeat: int = 5) -> float:
+    return min(timeit.Timer(function).repeat(repeat=repeat, number=1)) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, action="append", default=None)
+    args = parser.parse_args()
+    records = make_records(args.records)
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = QueryLog(directory, capacity=args.records)
+
+        def record_all():
+            for record in records:
+                log.record(record)
+            log._ring.clear()
+
+        print(f"📊 {args.records} records")
+        print(f"   record() on the request path: {per_record_us(record_all, len(records)):.3f} µs/record")
+
+        path = Path(directory) / "baseline.jsonl"
+
+        def append_each():
+            for record in records:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record._asdict()) + "\n")
+
+        print(f"   baseline, open + write per request: {per_record_us(append_each, len(records), 3):.3f} µs/record")
+
+        print(f"{'batch':>8}{'flush µs/record':>18}{'bytes/record':>15}")
+        for batch_size in args.batch_size or [64, 512, 4096]:
+            log = QueryLog(Path(directory) / f"batch-{batch_size}", capacity=batch_size)
+
+            async def flush_all():
+                for start in range(0, len(records), batch_size):
+                    for record in records[start:start + batch_size]:
+                        log.record(record)
+                    await log.flush()
+
+            seconds = min(timeit.Timer(lambda: asyncio.run(flush_all())).repeat(repeat=3, number=1))
+            bytes_per_record = log.counts["bytes"] / log.counts["written"]
+            print(f"{batch_size:>8}{seconds / len(records) * 1e6:>18.2f}{bytes_per_record:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
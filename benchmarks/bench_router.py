@@ -0,0 +1,115 @@
+"""Routing accuracy and per-query cost: keyword rules vs the embedding router
+
+    python benchmarks/bench_router.py [--threshold 0.3 --threshold 0.4] [--margin 0.03]
+
+Accuracy is measured on the labelled corpus in tests/routing_corpus.json
+for the original if/elif chains, the compiled keyword matcher behind
+_identify_department/_identify_query_type, and the embedding router at
+each threshold. The router's cost is its matrix product on query vectors
+that retrieval computes anyway; the encoder call is reported separately.
+The router needs sentence-transformers; without it only the keyword
+accuracy and the routing product on random vectors of the same shape are
+reported.
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from bench_matcher import legacy_classify
+from config import settings
+from matcher import GENERAL, QueryMatcher
+from retrieval import SentenceEncoder
+from router import EmbeddingRouter, read_prototypes
+
+
+class RandomVectors:
+    """Unit vectors of the model's dimension, for timing the routing product only"""
+
+    def __init__(self, dimension: int = 384):
+        self.rng = np.random.default_rng(0)
+        self.dimension = dimension
+
+    def encode(self, texts):
+        vectors = self.rng.standard_normal((len(texts), self.dimension)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def accuracy(predictions, corpus):
+    department = sum(p[0] == case["department"] for p, case in zip(predictions, corpus))
+    query_type = sum(p[1] == case["query_type"] for p, case in zip(predictions, corpus))
+    both = sum(tuple(p) == (case["department"], case["query_type"]) for p, case in zip(predictions, corpus))
+    return department / len(corpus), query_type / len(corpus), both / len(corpus)
+
+
+def per_query_us(function, count: int, number: int) -> float:
+    return min(timeit.Timer(function).repeat(repeat=5, number=number)) / (number * count) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, action="append", default=None)
+    parser.add_argument("--margin", type=float, default=settings.ROUTER_MARGIN)
+    args = parser.parse_args()
+
+    corpus = json.loads((ROOT / "tests" / "routing_corpus.json").read_text(encoding="utf-8"))
+    queries = [case["query"] for case in corpus]
+    matcher = QueryMatcher(settings.DEPARTMENT_KEYWORDS, settings.DEPARTMENT_ROUTES, settings.QUERY_TYPE_ROUTES)
+    departments, query_types = read_prototypes(settings.ROUTER_PROTOTYPES_PATH)
+    keyword_matches = [matcher.match(query) for query in queries]
+    in_scope = sum(match.is_department_related for match in keyword_matches)
+
+    try:
+        encoder = SentenceEncoder(settings.EMBEDDING_MODEL)
+    except Exception as e:
+        print(f"⚠️ Encoder unavailable ({e}); timing the routing product on random vectors")
+        encoder = None
+
+    print(f"📊 {len(corpus)} labelled questions ({in_scope} pass the keyword guardrail)")
+    print(f"{'router':<28}{'department':>11}{'type':>8}{'both':>8}{'µs/query':>10}")
+    legacy = [legacy_classify(query)[1:] for query in queries]
+    legacy = [(d or GENERAL, t or GENERAL) for d, t in legacy]
+    keyword_us = per_query_us(lambda: [matcher.match(q) for q in queries], len(queries), 200)
+    rows = [
+        ("if/elif chains", legacy, per_query_us(lambda: [legacy_classify(q) for q in queries], len(queries), 200)),
+        ("compiled keyword matcher", [m[1:] for m in keyword_matches], keyword_us),
+    ]
+
+    router = EmbeddingRouter(encoder or RandomVectors(), departments, query_types, margin=args.margin)
+    vectors = (encoder or RandomVectors()).encode(queries)
+
+    def route_batch():
+        router.route_many(vectors, keyword_matches)
+
+    def route_singles():
+        for vector, match in zip(vectors, keyword_matches):
+            router.route(vector, match)
+
+    batch_us = per_query_us(route_batch, len(queries), 200)
+    single_us = per_query_us(route_singles, len(queries), 20)
+    if encoder is not None:
+        for threshold in args.threshold or [settings.ROUTER_THRESHOLD]:
+            router.threshold = threshold
+            routed = router.route_many(vectors, keyword_matches)
+            # The router keeps the keyword match for the guardrail and as its fallback
+            rows.append((f"embedding router (t={threshold:g})", [m[1:] for m in routed], keyword_us + batch_us))
+
+    for name, predictions, cost in rows:
+        department, query_type, both = accuracy(predictions, corpus)
+        print(f"{name:<28}{department:>11.1%}{query_type:>8.1%}{both:>8.1%}{cost:>10.2f}")
+
+    print(f"📊 routing product over {len(router.prototypes)} prototypes: "
+          f"{batch_us:.2f} µs/query batched, {single_us:.2f} µs/query one at a time")
+    if encoder is not None:
+        encode_us = per_query_us(lambda: encoder.encode(queries), len(queries), 3)
+        print(f"   encoder (shared with retrieval, not added by routing): {encode_us:.0f} µs/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Latency and precision of department-scoped vs global search
+
+    python benchmarks/bench_scoped_search.py [--scale 1 --scale 100] [--k 10]
+
+Partitions come from the shipped section tree (or one built from the chunk
+store). Latency is measured on the shipped vectors, tiled --scale times to
+stand in for a larger prospectus, with queries cut from a department's own
+chunk vectors, so no encoder is needed. Precision@k is the share of hits
+that lie in the question's department sections, for questions built from
+each department name and the usual query types; vector precision needs
+sentence-transformers, BM25 precision is always printed.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from config import settings
+from knowledge_base import read_knowledge_base
+from lexical import LexicalIndex
+from retrieval import ChunkStore, RetrievalEngine, SentenceEncoder, load_flat_index, open_chunk_store
+from sections import SectionTree
+
+QUESTIONS = [
+    "{name} lab facilities",
+    "admission requirements for {name}",
+    "courses and programs offered by {name}",
+    "research areas of {name} faculty",
+]
+
+
+def load_partitions(chunks):
+    path = settings.SECTIONS_PATH
+    tree = SectionTree.read(path) if path.exists() else SectionTree.build(chunks)
+    return tree.partition(lambda title: settings.SECTION_DEPARTMENTS.get(title.lower()))
+
+
+def tiled_engine(vectors: np.ndarray, partitions, scale: int, rng):
+    """The vectors repeated scale times with a little noise, and matching partitions"""
+    count = len(vectors)
+    tiled = np.tile(vectors, (scale, 1)) + rng.normal(0, 0.01, (count * scale, vectors.shape[1])).astype(np.float32)
+    tiled /= np.linalg.norm(tiled, axis=1, keepdims=True)
+    chunks = ChunkStore(("",) * len(tiled), np.zeros(len(tiled), dtype=np.int32), np.zeros(len(tiled), dtype=bool))
+    engine = RetrievalEngine(tiled.astype(np.float32), chunks, encoder=None)
+    engine.set_partitions({
+        name: (ids[None, :] + count * np.arange(scale)[:, None]).ravel()
+        for name, ids in partitions.items()
+    })
+    return engine
+
+
+def time_search(search, queries, repeat: int = 3) -> float:
+    """Best-of-repeat microseconds per single-query search"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for query in queries:
+            search(query)
+        best = min(best, time.perf_counter() - started)
+    return best / len(queries) * 1e6
+
+
+def precision(search, questions, partitions, k: int) -> float:
+    inside = total = 0
+    for department, question in questions:
+        ids = search(question, k, department)
+        members = set(partitions[department].tolist())
+        inside += sum(chunk_id in members for chunk_id in ids)
+        total += len(ids)
+    return inside / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, action="append", default=None)
+    parser.add_argument("--k", type=int, default=settings.HYBRID_CANDIDATES)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    chunks = open_chunk_store(settings.CHUNK_STORE_PATH)
+    partitions = load_partitions(chunks)
+    sizes = ", ".join(f"{name} {len(ids)}" for name, ids in partitions.items())
+    print(f"📊 {len(chunks)} chunks; department partitions: {sizes}")
+
+    vectors, _ = load_flat_index(settings.INDEX_PATH)
+    vectors = np.array(vectors)
+    print(f"{'vectors':>9}{'scope':>12}{'µs/query':>11}")
+    for scale in args.scale or [1, 100]:
+        engine = tiled_engine(vectors, partitions, scale, rng)
+        for name, ids in partitions.items():
+            picks = rng.choice(ids, args.queries)
+            queries = vectors[picks] + rng.normal(0, 0.05, (args.queries, vectors.shape[1])).astype(np.float32)
+            scoped = time_search(lambda q: engine.search_vector(q, args.k, name), queries)
+            unscoped = time_search(lambda q: engine.search_vector(q, args.k), queries)
+            print(f"{len(engine.index):>9}{name[:11]:>12}{scoped:>11.1f}   global {unscoped:.1f} ({unscoped / scoped:.1f}x)")
+
+    departments = {department: info.get("name", "") for department, info in read_knowledge_base(settings.KNOWLEDGE_BASE_PATH).items()}
+    questions = [
+        (department, template.format(name=departments.get(department) or department.replace("_", " ")))
+        for department in partitions for template in QUESTIONS
+    ]
+    modes = {}
+    lexical = LexicalIndex(settings.LEXICAL_INDEX_PATH)
+    modes["bm25"] = lambda scope, q, k, d: [i for i, _ in lexical.search(q, k, partitions[d] if scope else None)]
+    try:
+        engine = RetrievalEngine.open(settings.INDEX_PATH, settings.CHUNK_STORE_PATH, SentenceEncoder(settings.EMBEDDING_MODEL))
+        engine.set_partitions(partitions)
+        modes["vector"] = lambda scope, q, k, d: [hit.chunk_id for hit in engine.search_vector(engine.embed(q), k, d if scope else None)]
+    except Exception as e:
+        print(f"⚠️ Vector search unavailable ({e}); reporting BM25 precision only")
+
+    print(f"📊 precision@{args.k} over {len(questions)} department questions")
+    for mode, search in modes.items():
+        scoped = precision(lambda q, k, d: search(True, q, k, d), questions, partitions, args.k)
+        unscoped = precision(lambda q, k, d: search(False, q, k, d), questions, partitions, args.k)
+        print(f"   {mode:<8} global {unscoped:6.1%}   scoped {scoped:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Hit rate and latency of the semantic answer cache
+
+    python benchmarks/bench_semantic_cache.py [--rounds 20]
+
+Replays groups of paraphrased questions ("CS labs?", "computer science lab
+facilities", ...) through MCPAgent.process_query with the cache off and on,
+and reports the hit rate and mean latency of each. This part needs
+sentence-transformers and the shipped index. Lookup and insert cost of a
+full cache is measured with random unit vectors either way.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from config import settings
+from mcp_agent import MCPAgent
+from semantic_cache import CachedAnswer, SemanticCache
+
+PARAPHRASES = [
+    ["CS labs?", "computer science lab facilities", "what labs does CS have", "labs in the computer science department"],
+    ["electrical engineering admission requirements", "how to get admission in EE", "EE eligibility criteria", "requirements to apply for electrical engineering"],
+    ["civil engineering fee structure", "how much is the tuition for civil", "civil department fees", "cost of studying civil engineering"],
+    ["mechanical engineering courses", "what programs does mechanical offer", "mechanical engineering curriculum", "courses in the mechanical department"],
+    ["architecture department labs", "facilities for architecture students", "architecture studios and labs", "what equipment does architecture have"],
+]
+
+
+def make_agent(cache: bool) -> MCPAgent:
+    return MCPAgent({
+        "DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS,
+        "DEPARTMENT_ROUTES": settings.DEPARTMENT_ROUTES,
+        "QUERY_TYPE_ROUTES": settings.QUERY_TYPE_ROUTES,
+        "RETRIEVAL_ENABLED": True,
+        "INDEX_PATH": settings.INDEX_PATH,
+        "CHUNKS_PATH": settings.CHUNKS_PATH,
+        "CHUNK_STORE_PATH": settings.CHUNK_STORE_PATH,
+        "LEXICAL_INDEX_PATH": settings.LEXICAL_INDEX_PATH,
+        "EMBEDDING_MODEL": settings.EMBEDDING_MODEL,
+        "RETRIEVAL_TOP_K": settings.RETRIEVAL_TOP_K,
+        # No embedding cache, so repeated questions pay for retrieval again
+        "EMBEDDING_CACHE_SIZE": 0,
+        "HYBRID_ENABLED": settings.HYBRID_ENABLED,
+        "HYBRID_CANDIDATES": settings.HYBRID_CANDIDATES,
+        "SEMANTIC_CACHE_ENABLED": cache,
+        "SEMANTIC_CACHE_SIZE": settings.SEMANTIC_CACHE_SIZE,
+        "SEMANTIC_CACHE_THRESHOLD": settings.SEMANTIC_CACHE_THRESHOLD,
+    })
+
+
+def replay(agent: MCPAgent, rounds: int) -> float:
+    """Mean seconds per query over the paraphrase workload"""
+    queries = [query for group in PARAPHRASES for query in group]
+
+    async def run():
+        samples = []
+        for _ in range(rounds):
+            for query in queries:
+                started = time.perf_counter()
+                await agent.process_query(query)
+                samples.append(time.perf_counter() - started)
+        return statistics.mean(samples)
+
+    return asyncio.run(run())
+
+
+def bench_cache_ops(entries: int, dimension: int = 384, lookups: int = 2000):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((entries + lookups, dimension)).astype(np.float32)
+    cache = SemanticCache(max_entries=entries, threshold=settings.SEMANTIC_CACHE_THRESHOLD)
+    answer = CachedAnswer({"response": "", "is_department_related": True, "sources": []}, (), 0.0)
+
+    started = time.perf_counter()
+    for i in range(entries):
+        cache.put(vectors[i], ("general", "general"), answer)
+    put_us = (time.perf_counter() - started) / entries * 1e6
+
+    started = time.perf_counter()
+    for vector in vectors[entries:]:
+        cache.lookup(vector, ("general", "general"))
+    lookup_us = (time.perf_counter() - started) / lookups * 1e6
+    print(f"📊 {entries:>5} entries: put {put_us:7.1f} µs, lookup {lookup_us:7.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for entries in (256, 1024, 4096):
+        bench_cache_ops(entries)
+
+    baseline = make_agent(cache=False)
+    baseline.load()
+    if baseline.retriever is None:
+        print(f"⚠️ Vector search unavailable ({baseline.retrieval_error}); skipping the paraphrase replay")
+        return
+    cached = make_agent(cache=True)
+    cached.load()
+
+    off = replay(baseline, args.rounds)
+    on = replay(cached, args.rounds)
+    stats = cached.answer_cache.stats()
+    print(f"📊 cache off: {off * 1000:.2f} ms/query")
+    print(
+        f"📊 cache on:  {on * 1000:.2f} ms/query, hit rate {stats['hit_rate']:.1%}, "
+        f"{stats['entries']} entries, {stats['saved_seconds']:.2f}s of retrieval saved"
+    )
+
+
+if __name__ == "__main__":
+    main()
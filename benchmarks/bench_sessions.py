@@ -0,0 +1,77 @@
+"""Memory footprint and speed of the session store at 100k sessions
+
+    python benchmarks/bench_sessions.py [--sessions 100000]
+
+Fills a SessionStore with contexts that carry three retrieved passages each
+(the default top-k). Allocated memory is measured with tracemalloc and
+compared with the store's own byte estimate, which is what the memory cap
+enforces. Put (including building the context) and get latencies are reported at
+full size.
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from sessions import SessionContext, SessionStore
+
+DEPARTMENTS = ("computer_science", "electrical_engineering", "mechanical_engineering", "civil_engineering", "architecture")
+QUERY_TYPES = ("facilities", "admission", "courses", "fees", "description")
+
+
+def make_context(rng: random.Random) -> SessionContext:
+    hits = tuple((rng.randrange(263), rng.random()) for _ in range(3))
+    return SessionContext(rng.choice(DEPARTMENTS), rng.choice(QUERY_TYPES), hits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    store = SessionStore(max_sessions=args.sessions, max_bytes=1 << 40)
+
+    # Session ids (uuid-like strings, as the frontend sends them) and contexts
+    # are allocated while tracing, since the store keeps both alive
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    ids = []
+    started = time.perf_counter()
+    for _ in range(args.sessions):
+        session_id = f"{rng.getrandbits(128):032x}-{rng.getrandbits(16):04x}"
+        ids.append(session_id)
+        store.put(session_id, make_context(rng))
+    fill_s = time.perf_counter() - started
+    allocated = tracemalloc.get_traced_memory()[0] - before - sys.getsizeof(ids)
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for session_id in ids[: args.sessions // 10]:
+        store.put(session_id, make_context(rng))
+    put_ns = (time.perf_counter() - started) / (args.sessions // 10) * 1e9
+
+    lookups = [rng.choice(ids) for _ in range(args.sessions)]
+    started = time.perf_counter()
+    for session_id in lookups:
+        store.get(session_id)
+    get_ns = (time.perf_counter() - started) / len(lookups) * 1e9
+
+    capped = SessionStore(max_sessions=args.sessions, max_bytes=store.bytes // 2)
+    for session_id in ids:
+        capped.put(session_id, make_context(rng))
+
+    print(f"📊 {args.sessions:,} sessions")
+    print(f"   measured:  {allocated / 1024 / 1024:8.1f} MB ({allocated / args.sessions:,.0f} B/session)")
+    print(f"   estimated: {store.bytes / 1024 / 1024:8.1f} MB ({store.bytes / args.sessions:,.0f} B/session)")
+    print(f"   fill {fill_s:.2f}s (traced), put {put_ns:,.0f} ns, get {get_ns:,.0f} ns")
+    print(f"   half-size byte cap keeps {len(capped):,} sessions ({capped.counts['evicted_memory']:,} evicted)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Throughput and memory of serve.py with 1, 2, 4 and 8 workers
+
+    python benchmarks/bench_workers.py [--duration 5] [--concurrency 64]
+
+Each configuration starts serve.py on a free port, drives POST /chat with a
+keep-alive async client for the given duration and then reads RSS, PSS and
+private memory of every worker from /proc/<pid>/smaps_rollup. PSS splits
+shared pages between the processes mapping them, so the PSS sum is the real
+footprint; with preloading, each extra worker should add little more than
+its private memory. The load generator runs on the same machine, so
+throughput only scales up to the cores left over for the workers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND = ROOT / "backend"
+QUERIES = [
+    "What are the lab facilities in Computer Science?",
+    "Admission requirements for Electrical Engineering",
+    "Fee structure for undergraduate programs",
+    "Tell me about the Civil Engineering department",
+    "What courses does Mechanical Engineering offer?",
+    "Who won the cricket match yesterday?",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memory_kb(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def worker_pids(parent: int) -> list:
+    pids = []
+    for task in os.listdir(f"/proc/{parent}/task"):
+        with open(f"/proc/{parent}/task/{task}/children") as f:
+            pids.extend(int(pid) for pid in f.read().split())
+    return pids
+
+
+async def wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url + "/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not become ready")
+
+
+async def drive(url: str, duration: float, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def user(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/chat", json={"message": QUERIES[i % len(QUERIES)]})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+                i += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(0.99 * (len(latencies) - 1))] * 1000 if latencies else 0.0
+    return {"rps": len(latencies) / elapsed, "p99_ms": p99, "errors": errors}
+
+
+def run(workers: int, duration: float, concurrency: int) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_ready(url))
+        load = asyncio.run(drive(url, duration, concurrency))
+        parent = memory_kb(server.pid)
+        children = [memory_kb(pid) for pid in worker_pids(server.pid)]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "workers": workers,
+        **load,
+        "parent_rss_mb": parent["rss"] / 1024,
+        "worker_rss_mb": sum(c["rss"] for c in children) / max(len(children), 1) / 1024,
+        "worker_private_mb": sum(c["private"] for c in children) / max(len(children), 1) / 1024,
+        "total_pss_mb": (parent["pss"] + sum(c["pss"] for c in children)) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    results = [run(n, args.duration, args.concurrency) for n in args.workers]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 {os.cpu_count()} CPUs, concurrency {args.concurrency}, {args.duration:.0f}s per run")
+    print(f"{'workers':>8}{'req/s':>10}{'p99 ms':>10}{'errors':>8}{'parent RSS':>12}{'worker RSS':>12}{'private':>10}{'total PSS':>11}")
+    for r in results:
+        print(
+            f"{r['workers']:>8}{r['rps']:>10,.0f}{r['p99_ms']:>10.1f}{r['errors']:>8}"
+            f"{r['parent_rss_mb']:>10.1f}MB{r['worker_rss_mb']:>10.1f}MB"
+            f"{r['worker_private_mb']:>8.1f}MB{r['total_pss_mb']:>9.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
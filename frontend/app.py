@@ -1,29 +1,31 @@
 # frontend/app.py
 import streamlit as st
-import requests
 from typing import Dict
 import time
+import uuid
+
+from client import AgentClient
+from history import ChatHistory, format_meta
 
 # Configuration
-API_URL = "http://localhost:8000/chat"
+API_BASE_URL = "http://localhost:8000"
+
+# Messages kept per session (older exchanges are summarized) and shown per page
+HISTORY_MAX_MESSAGES = 200
+HISTORY_PAGE_SIZE = 20
 
 # Initialize session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "history" not in st.session_state:
+    st.session_state.history = ChatHistory(HISTORY_MAX_MESSAGES, HISTORY_PAGE_SIZE)
+if "history_pages" not in st.session_state:
+    st.session_state.history_pages = 1
+# Sent with every question so the agent can resolve follow-ups in this chat
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
-def chat_with_agent(message: str) -> Dict:
-    """Send message to AI agent - with timeout"""
-    try:
-        response = requests.post(
-            API_URL,
-            json={"message": message},
-            timeout=5
-        )
-        return response.json()
-    except:
-        # Fallback response if API is down
-        return {
-            "response": """## UET Department Information
+# Shown when the backend cannot be reached
+FALLBACK_RESPONSE = {
+    "response": """## UET Department Information
 
 ### Computer Science Department
 **Lab Facilities:**
@@ -38,9 +40,98 @@ def chat_with_agent(message: str) -> Dict:
 - Mathematics background
 
 *This is a fallback response. The AI agent will provide more detailed information when connected.*""",
-            "is_department_related": True,
-            "sources": ["UET Information Database"]
-        }
+    "is_department_related": True,
+    "sources": ["UET Information Database"]
+}
+
+@st.cache_resource
+def get_client() -> AgentClient:
+    """One keep-alive connection pool and response cache per server process"""
+    return AgentClient(API_BASE_URL)
+
+def chat_with_agent(message: str) -> Dict:
+    """Send message to AI agent - cached, pooled and retried"""
+    result = get_client().chat(message, st.session_state.session_id)
+    response = dict(result.response if result.response is not None else FALLBACK_RESPONSE)
+    response["meta"] = {
+        "latency_ms": result.latency_ms,
+        "cached": result.cached,
+        "retries": result.retries,
+        "error": result.error
+    }
+    return response
+
+def render_meta(meta: Dict):
+    """Show how an answer was obtained"""
+    caption, error = format_meta(meta)
+    if caption:
+        st.caption(caption)
+    if error:
+        st.error(error)
+
+def render_history(history: ChatHistory):
+    """Draw the newest pages of the chat from their pre-rendered blocks"""
+    summary = history.summary()
+    if summary:
+        with st.expander("🗂️ Earlier in this chat"):
+            st.markdown(summary)
+    
+    pages = st.session_state.history_pages
+    visible, hidden = history.page(pages)
+    if hidden and st.button(f"⬆️ Show older messages ({hidden} hidden)", use_container_width=True):
+        st.session_state.history_pages = pages = pages + 1
+        visible, hidden = history.page(pages)
+    
+    for message in visible:
+        with st.chat_message(message["role"]):
+            st.markdown(message["block"])
+
+def render_streamed_response(message: str) -> Dict:
+    """Render the answer incrementally as sections arrive"""
+    client = get_client()
+    started = time.perf_counter()
+    placeholder = st.empty()
+    
+    session_id = st.session_state.session_id
+    response = client.cached(message, session_id)
+    if response is not None:
+        response = dict(response)
+        response["meta"] = {"latency_ms": (time.perf_counter() - started) * 1000, "cached": True}
+    else:
+        response = {"response": "", "sources": [], "is_department_related": True}
+        meta = {"latency_ms": 0.0, "first_byte_ms": None}
+        try:
+            for event, data in client.stream(message, session_id):
+                if event == "header":
+                    response["is_department_related"] = data["is_department_related"]
+                elif event == "section":
+                    if meta["first_byte_ms"] is None:
+                        meta["first_byte_ms"] = (time.perf_counter() - started) * 1000
+                    response["response"] += data["text"]
+                    placeholder.markdown(response["response"] + " ▌")
+                elif event == "sources":
+                    response["sources"] = data["sources"]
+            meta["latency_ms"] = (time.perf_counter() - started) * 1000
+            client.store(message, dict(response), session_id)
+            response["meta"] = meta
+        except Exception as e:
+            if response["response"]:
+                meta["latency_ms"] = (time.perf_counter() - started) * 1000
+                meta["error"] = f"stream interrupted: {e}"
+                response["meta"] = meta
+            else:
+                # Nothing arrived - use the regular endpoint (or its fallback)
+                response = chat_with_agent(message)
+    
+    if not response.get("is_department_related", True):
+        placeholder.empty()
+        st.warning("⚠️ **Out of Scope**")
+        st.info(response["response"])
+    else:
+        placeholder.markdown(response["response"])
+    render_meta(response.get("meta"))
+    
+    return response
 
 def main():
     st.set_page_config(
@@ -102,84 +193,53 @@ def main():
         ]
         
         for example in examples:
+            # The click's own rerun answers it below the history, like typed questions
             if st.button(f"💬 {example}", key=example, use_container_width=True):
-                # Add to chat
-                st.session_state.messages.append({
-                    "role": "user",
-                    "content": example
-                })
-                
-                # Get response
-                with st.spinner("Getting information..."):
-                    response = chat_with_agent(example)
-                    
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": response["response"],
-                        "sources": response.get("sources", []),
-                        "is_department_related": response.get("is_department_related", True)
-                    })
-                
-                st.rerun()
+                st.session_state.pending = example
         
         st.divider()
         
+        # Connection pool and cache counters for this server process
+        with st.expander("📡 Connection Stats"):
+            client_stats = get_client().stats
+            st.write(f"• Requests sent: {client_stats['requests']}")
+            st.write(f"• Cache hits: {client_stats['cache_hits']}")
+            st.write(f"• Retries: {client_stats['retries']}")
+            st.write(f"• Errors: {client_stats['errors']}")
+        
         if st.button("🗑️ Clear Chat History", type="secondary", use_container_width=True):
-            st.session_state.messages = []
-            st.rerun()
+            st.session_state.history.clear()
+            st.session_state.history_pages = 1
+            st.session_state.pop("pending", None)
+            # A cleared chat starts a new agent session
+            st.session_state.session_id = uuid.uuid4().hex
     
-    # Display chat
-    for message in st.session_state.messages:
-        role = message["role"]
-        
-        with st.chat_message(role):
-            st.markdown(message["content"])
-            
-            if role == "assistant" and message.get("sources"):
-                with st.expander("📚 Information Sources"):
-                    for source in message["sources"]:
-                        st.write(f"• {source}")
-            
-            if role == "assistant" and not message.get("is_department_related", True):
-                st.warning("⚠️ Query was out of department scope")
+    # Display chat - the existing history is drawn before any backend call
+    history = st.session_state.history
+    render_history(history)
     
     # Chat input
-    if prompt := st.chat_input("Ask about UET departments..."):
+    prompt = st.chat_input("Ask about UET departments...") or st.session_state.pop("pending", None)
+    if prompt:
         # Add user message
-        st.session_state.messages.append({
-            "role": "user",
-            "content": prompt
-        })
+        history.add_user(prompt)
         
         # Display user message immediately
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Get and display agent response
+        # Stream and display agent response
         with st.chat_message("assistant"):
-            with st.spinner("🔍 Searching department information..."):
-                response = chat_with_agent(prompt)
-                
-                # Display response
-                if not response.get("is_department_related", True):
-                    st.warning("⚠️ **Out of Scope**")
-                    st.info(response["response"])
-                else:
-                    st.markdown(response["response"])
-                
-                # Show sources
-                if response.get("sources"):
-                    with st.expander("📚 Sources"):
-                        for source in response["sources"]:
-                            st.write(f"• {source}")
+            response = render_streamed_response(prompt)
+            
+            # Show sources
+            if response.get("sources"):
+                with st.expander("📚 Sources"):
+                    for source in response["sources"]:
+                        st.write(f"• {source}")
         
         # Add assistant message to history
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": response["response"],
-            "sources": response.get("sources", []),
-            "is_department_related": response.get("is_department_related", True)
-        })
+        history.add_assistant(response)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,167 @@
+# frontend/client.py
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts - the read timeout applies between received bytes,
+# so slow but progressing answers are never cut off
+TIMEOUT = (3.05, 30)
+
+# Status codes worth retrying; anything else is returned to the caller
+RETRY_STATUSES = {502, 503, 504}
+
+
+# Openers of questions the agent answers from the session's previous one;
+# keep in step with FOLLOW_UP_PREFIXES in backend/sessions.py
+FOLLOW_UP_PREFIXES = ("and", "also", "what about", "how about", "same for", "then")
+
+
+def normalize_query(message: str) -> str:
+    return " ".join(message.lower().split())
+
+
+def is_follow_up(message: str, max_words: int = 8) -> bool:
+    """Short question continuing the previous one, whose answer depends on the session"""
+    text = normalize_query(message)
+    if not text or len(text.split()) > max_words:
+        return False
+    return any(text == prefix or text.startswith(prefix + " ") for prefix in FOLLOW_UP_PREFIXES)
+
+
+class ClientResult:
+    """Agent answer plus how it was obtained"""
+
+    __slots__ = ("response", "latency_ms", "cached", "attempts", "error")
+
+    def __init__(self, response: Optional[Dict], latency_ms: float, cached: bool = False, attempts: int = 0, error: Optional[str] = None):
+        self.response = response
+        self.latency_ms = latency_ms
+        self.cached = cached
+        self.attempts = attempts
+        self.error = error
+
+    @property
+    def retries(self) -> int:
+        return max(self.attempts - 1, 0)
+
+
+class AgentClient:
+    """Keep-alive HTTP client for the agent API with a TTL response cache
+
+    One instance is shared by every Streamlit session of the server process,
+    so the connection pool and the cache are guarded for concurrent use.
+    Answers are cached per session id, and follow-up questions are never
+    cached because the agent answers them from the session's context.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff: float = 0.25,
+        cache_ttl: float = 300.0,
+        cache_size: int = 256,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._cache: "OrderedDict[Tuple[Optional[str], str], Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "retries": 0, "errors": 0}
+
+    def cached(self, message: str, session_id: Optional[str] = None) -> Optional[Dict]:
+        """Cached answer for a query in a session, if still fresh"""
+        if is_follow_up(message):
+            return None
+        key = (session_id, normalize_query(message))
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, response = entry
+            if time.monotonic() - stored_at > self.cache_ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return response
+
+    def store(self, message: str, response: Dict, session_id: Optional[str] = None):
+        if is_follow_up(message):
+            return
+        key = (session_id, normalize_query(message))
+        with self._lock:
+            self._cache[key] = (time.monotonic(), response)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _post(self, path: str, message: str, session_id: Optional[str] = None, **kwargs) -> Tuple[requests.Response, int]:
+        """POST with exponential backoff on connection errors and 502/503/504"""
+        attempt = 0
+        while True:
+            attempt += 1
+            self.stats["requests"] += 1
+            try:
+                response = self.session.post(
+                    self.base_url + path,
+                    json={"message": message, "session_id": session_id},
+                    timeout=TIMEOUT,
+                    **kwargs
+                )
+                if response.status_code not in RETRY_STATUSES or attempt > self.max_retries:
+                    response.raise_for_status()
+                    return response, attempt
+                response.close()
+            except requests.RequestException as e:
+                if attempt > self.max_retries or not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                    e.attempts = attempt
+                    raise
+            self.stats["retries"] += 1
+            time.sleep(self.backoff * 2 ** (attempt - 1))
+
+    def chat(self, message: str, session_id: Optional[str] = None) -> ClientResult:
+        """Answer from the cache or from POST /chat"""
+        started = time.perf_counter()
+        response = self.cached(message, session_id)
+        if response is not None:
+            return ClientResult(response, (time.perf_counter() - started) * 1000, cached=True)
+
+        try:
+            http_response, attempts = self._post("/chat", message, session_id)
+            response = http_response.json()
+        except (requests.RequestException, ValueError) as e:
+            self.stats["errors"] += 1
+            return ClientResult(
+                None, (time.perf_counter() - started) * 1000, attempts=getattr(e, "attempts", 1), error=str(e)
+            )
+
+        self.store(message, response, session_id)
+        return ClientResult(response, (time.perf_counter() - started) * 1000, attempts=attempts)
+
+    def stream(self, message: str, session_id: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+        """Yield (event, data) pairs from the server-sent events of /chat/stream"""
+        http_response, _ = self._post("/chat/stream", message, session_id, stream=True)
+        with http_response:
+            event = "message"
+            for line in http_response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[5:].strip())
@@ -0,0 +1,106 @@
+# frontend/history.py
+"""Bounded chat history with pre-rendered message blocks
+
+Every message is rendered to one markdown block when it is added, so a
+Streamlit rerun draws a single element per visible message instead of
+rebuilding its markdown, source list, warning and caption. The view shows
+only the newest pages. Past max_messages the oldest exchanges are evicted
+and remembered as a short summary of the questions asked, which keeps
+session state from growing with the conversation.
+"""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+OUT_OF_SCOPE_NOTE = "⚠️ Query was out of department scope"
+
+
+def format_meta(meta: Optional[Dict]) -> Tuple[Optional[str], Optional[str]]:
+    """Caption describing how an answer was obtained, and its error if any"""
+    if not meta:
+        return None, None
+    parts = [f"⏱️ {meta['latency_ms']:.0f} ms"]
+    if meta.get("first_byte_ms") is not None:
+        parts.append(f"first section {meta['first_byte_ms']:.0f} ms")
+    if meta.get("cached"):
+        parts.append("cached")
+    if meta.get("retries"):
+        parts.append(f"{meta['retries']} retr{'y' if meta['retries'] == 1 else 'ies'}")
+    error = None
+    if meta.get("error"):
+        error = f"⚠️ Backend request failed, showing fallback information: {meta['error']}"
+    return " · ".join(parts), error
+
+
+def render_block(response: Dict) -> str:
+    """One markdown block with everything shown for an answer"""
+    lines = [response["response"]]
+    if response.get("sources"):
+        lines.append("📚 **Sources:** " + " · ".join(response["sources"]))
+    if not response.get("is_department_related", True):
+        lines.append(f"> {OUT_OF_SCOPE_NOTE}")
+    caption, error = format_meta(response.get("meta"))
+    if caption:
+        lines.append(f"*{caption}*")
+    if error:
+        lines.append(f"> {error}")
+    return "\n\n".join(lines)
+
+
+def short_question(text: str, width: int = 80) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+class ChatHistory:
+    """Messages of one chat session, capped at max_messages"""
+
+    def __init__(self, max_messages: int = 200, page_size: int = 20, summary_questions: int = 10):
+        self.max_messages = max_messages
+        self.page_size = page_size
+        self.messages: List[Dict] = []
+        self.evicted = 0
+        # Latest questions among the evicted messages, for the summary
+        self.earlier_questions: Deque[str] = deque(maxlen=summary_questions)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def add_user(self, content: str):
+        self._add({"role": "user", "content": content, "block": content})
+
+    def add_assistant(self, response: Dict):
+        # The block is all a rerun draws, so the parts it was built from are not kept
+        self._add({"role": "assistant", "block": render_block(response)})
+
+    def _add(self, message: Dict):
+        self.messages.append(message)
+        excess = len(self.messages) - self.max_messages
+        if excess > 0:
+            # Evict whole exchanges so the history never opens with an orphan answer
+            if excess < len(self.messages) and self.messages[excess]["role"] == "assistant":
+                excess += 1
+            for old in self.messages[:excess]:
+                if old["role"] == "user":
+                    self.earlier_questions.append(short_question(old["content"]))
+            del self.messages[:excess]
+            self.evicted += excess
+
+    def page(self, pages: int = 1) -> Tuple[List[Dict], int]:
+        """Newest `pages` pages of messages and how many older ones are hidden"""
+        shown = min(len(self.messages), pages * self.page_size)
+        return self.messages[len(self.messages) - shown:], len(self.messages) - shown
+
+    def summary(self) -> Optional[str]:
+        """Markdown note on the evicted messages, or None"""
+        if not self.evicted:
+            return None
+        lines = [f"{self.evicted} earlier messages were removed to keep this session fast."]
+        if self.earlier_questions:
+            lines.append("Latest questions among them:")
+            lines.extend(f"- {question}" for question in self.earlier_questions)
+        return "\n".join(lines)
+
+    def clear(self):
+        self.messages.clear()
+        self.evicted = 0
+        self.earlier_questions.clear()
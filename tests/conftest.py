@@ -0,0 +1,59 @@
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from mcp_agent import MCPAgent
+from retrieval import ChunkStore, RetrievalEngine
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words encoder standing in for sentence-transformers"""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.calls = 0
+        self.texts_encoded = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        self.texts_encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+@pytest.fixture
+def encoder():
+    return HashingEncoder()
+
+
+@pytest.fixture
+def chunks_path():
+    return ROOT / "data" / "processed" / "faiss_index_chunks.json"
+
+
+@pytest.fixture
+def retrieval_agent(chunks_path, encoder):
+    """Factory for an agent built from a config that searches the shipped chunks with the hashing encoder"""
+
+    def make(config):
+        chunks = ChunkStore.from_json(chunks_path)
+        agent = MCPAgent(config, encoder=encoder)
+        agent.retriever = RetrievalEngine(encoder.encode(chunks.texts), chunks, encoder)
+        return agent
+
+    return make
+
+
+@pytest.fixture
+def index_path():
+    return ROOT / "data" / "processed" / "faiss_index.index"
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from admission import Overloaded, StageLimiter
+
+
+def test_limiter_queues_then_sheds():
+    limiter = StageLimiter("search", limit=1, max_queue=1, timeout=0.1)
+
+    async def run():
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await limiter.acquire()
+        # The held slot passes straight to the waiter
+        limiter.release()
+        await waiting
+        with pytest.raises(Overloaded) as late:
+            await limiter.acquire()
+        limiter.release()
+        return full.value, late.value
+
+    full, late = asyncio.run(run())
+
+    assert (full.reason, full.status) == ("queue_full", 429)
+    assert (late.reason, late.status) == ("deadline", 503)
+    assert limiter.stats() == {
+        "limit": 1, "active": 0, "queued": 0, "max_queue": 1,
+        "admitted": 2, "waited": 1, "queue_full": 1, "deadline": 1,
+    }
+
+
+def test_saturated_search_degrades_to_template(retrieval_agent):
+    agent = retrieval_agent({
+        "DEPARTMENT_KEYWORDS": ["department", "lab"],
+        "RETRIEVAL_TOP_K": 2,
+        "ADMISSION_ENABLED": True,
+        "ADMISSION_LIMITS": {"search": 1},
+        "ADMISSION_QUEUE": {"search": 0},
+    })
+    search = agent.admission.stages["search"]
+    query = "Department of Civil Engineering labs"
+
+    async def run():
+        await search.acquire()
+        degraded, template = await agent.answer_query(query)
+        streamed = [event async for event in agent.stream_query(query)]
+        search.release()
+        return degraded, template, streamed, await agent.process_query(query)
+
+    degraded, template, streamed, full = asyncio.run(run())
+
+    assert "From the UET Prospectus" not in degraded["response"]
+    assert template == ("civil_engineering", "facilities")
+    assert streamed[-1] == ("sources", {"sources": degraded["sources"]})
+    assert "From the UET Prospectus" in full["response"]
+    assert search.counts["queue_full"] == 2
+
+
+def test_full_request_queue_answers_429(monkeypatch):
+    limiter = main.agent.admission.stages["request"]
+    monkeypatch.setattr(limiter, "limit", 1)
+    monkeypatch.setattr(limiter, "max_queue", 0)
+    monkeypatch.setattr(limiter, "active", 1)
+    client = TestClient(main.app)
+
+    response = client.post("/chat", json={"message": "fees for civil engineering"})
+
+    assert response.status_code == 429
+    assert response.json()["stage"] == "request"
+    assert response.headers["retry-after"] == "2"
+    assert client.get("/health").status_code == 200
@@ -0,0 +1,204 @@
+# tests/test_agent.py
+"""Per-stage performance benchmarks for MCPAgent and the /chat endpoint
+
+    cd tests
+    python test_agent.py                      # print the report
+    python test_agent.py --update-baseline    # record a new baseline
+    BENCH_COMPARE=1 python -m pytest test_agent.py    # fail on regressions
+
+Each stage is timed in isolation over a realistic query corpus (department,
+tricky and out-of-scope questions) and reported as ops/sec with p50/p95/p99
+latencies. The baseline in benchmark_baseline.json was recorded on one
+machine, so a plain pytest run only exercises and reports the stages. With
+BENCH_COMPARE=1 a stage fails when its throughput drops below baseline /
+BENCH_TOLERANCE (default 2.5). Set BENCH_UPDATE_BASELINE=1 to rewrite the
+baseline from a pytest run.
+"""
+from pathlib import Path
+from typing import Callable, Dict, List
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+import httpx
+import pytest
+
+from config import settings
+from mcp_agent import MCPAgent
+
+BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baseline.json"
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", "2.5"))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "200"))
+COMPARE = bool(os.environ.get("BENCH_COMPARE"))
+
+
+def load_corpus() -> List[str]:
+    """Questions from test_queries.json plus the matcher correctness corpus"""
+    tests_dir = Path(__file__).resolve().parent
+    groups = json.loads((tests_dir / "test_queries.json").read_text(encoding="utf-8"))
+    queries = [query for group in groups.values() for query in group]
+    corpus = json.loads((tests_dir / "matcher_corpus.json").read_text(encoding="utf-8"))
+    queries.extend(case["query"] for case in corpus)
+    return queries
+
+
+def summarize(samples_ns: List[int], elapsed: float) -> Dict[str, float]:
+    samples = sorted(samples_ns)
+
+    def percentile(p: float) -> float:
+        return samples[min(len(samples) - 1, int(p * len(samples)))] / 1000.0
+
+    return {
+        "ops_per_sec": round(len(samples) / elapsed, 1),
+        "p50_us": round(percentile(0.50), 2),
+        "p95_us": round(percentile(0.95), 2),
+        "p99_us": round(percentile(0.99), 2),
+    }
+
+
+def measure(fn: Callable, inputs: List, rounds: int) -> Dict[str, float]:
+    for args in inputs:
+        fn(*args)
+
+    samples = []
+    clock = time.perf_counter_ns
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for args in inputs:
+            start = clock()
+            fn(*args)
+            samples.append(clock() - start)
+    return summarize(samples, time.perf_counter() - started)
+
+
+async def measure_async(fn: Callable, inputs: List, rounds: int) -> Dict[str, float]:
+    for args in inputs:
+        await fn(*args)
+
+    samples = []
+    clock = time.perf_counter_ns
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for args in inputs:
+            start = clock()
+            await fn(*args)
+            samples.append(clock() - start)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def make_agent() -> MCPAgent:
+    return MCPAgent({
+        "DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS,
+        "DEPARTMENT_ROUTES": settings.DEPARTMENT_ROUTES,
+        "QUERY_TYPE_ROUTES": settings.QUERY_TYPE_ROUTES
+    })
+
+
+def bench_guardrail(agent, queries):
+    return measure(lambda query: agent.matcher.match(query).is_department_related, [(q,) for q in queries], ROUNDS)
+
+
+def bench_identify_department(agent, queries):
+    return measure(agent._identify_department, [(q,) for q in queries], ROUNDS)
+
+
+def bench_identify_query_type(agent, queries):
+    return measure(agent._identify_query_type, [(q,) for q in queries], ROUNDS)
+
+
+def bench_generate_response(agent, queries):
+    inputs = [(agent._identify_department(q), agent._identify_query_type(q), q) for q in queries]
+    return measure(agent._generate_response, inputs, ROUNDS)
+
+
+def bench_process_query(agent, queries):
+    return asyncio.run(measure_async(agent.process_query, [(q,) for q in queries], ROUNDS))
+
+
+def bench_chat_endpoint(agent, queries):
+    import main
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def chat(query):
+                response = await client.post("/chat", json={"message": query, "session_id": "bench"})
+                response.raise_for_status()
+
+            return await measure_async(chat, [(q,) for q in queries], max(ROUNDS // 10, 1))
+
+    return asyncio.run(run())
+
+
+STAGES = {
+    "guardrail": bench_guardrail,
+    "identify_department": bench_identify_department,
+    "identify_query_type": bench_identify_query_type,
+    "generate_response": bench_generate_response,
+    "process_query": bench_process_query,
+    "chat_endpoint": bench_chat_endpoint,
+}
+
+
+def run_stage(stage: str) -> Dict[str, float]:
+    return STAGES[stage](make_agent(), load_corpus())
+
+
+def load_baseline() -> Dict[str, Dict[str, float]]:
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+
+def save_baseline(results: Dict[str, Dict[str, float]]):
+    BASELINE_PATH.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+def format_report(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'stage':<22}{'ops/sec':>12}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}{'vs base':>10}"]
+    for stage, result in results.items():
+        base = baseline.get(stage, {}).get("ops_per_sec")
+        ratio = f"{result['ops_per_sec'] / base:.2f}x" if base else "-"
+        lines.append(
+            f"{stage:<22}{result['ops_per_sec']:>12,.0f}{result['p50_us']:>10.2f}"
+            f"{result['p95_us']:>10.2f}{result['p99_us']:>10.2f}{ratio:>10}"
+        )
+    return "\n".join(lines)
+
+
+@pytest.fixture(scope="module")
+def results():
+    collected: Dict[str, Dict[str, float]] = {}
+    yield collected
+    print("\n" + format_report(collected, load_baseline()))
+    if os.environ.get("BENCH_UPDATE_BASELINE") and len(collected) == len(STAGES):
+        save_baseline(collected)
+
+
+@pytest.mark.parametrize("stage", list(STAGES))
+def test_stage_performance(stage, results):
+    result = run_stage(stage)
+    results[stage] = result
+
+    base = load_baseline().get(stage)
+    if base is None or os.environ.get("BENCH_UPDATE_BASELINE"):
+        pytest.skip(f"no baseline for {stage}")
+    if not COMPARE:
+        pytest.skip("wall-clock baseline comparison is opt-in (BENCH_COMPARE=1)")
+    assert result["ops_per_sec"] >= base["ops_per_sec"] / TOLERANCE, (
+        f"{stage} regressed: {result['ops_per_sec']:,.0f} ops/sec "
+        f"vs baseline {base['ops_per_sec']:,.0f} (tolerance {TOLERANCE}x)"
+    )
+
+
+if __name__ == "__main__":
+    collected = {stage: run_stage(stage) for stage in STAGES}
+    print(format_report(collected, load_baseline()))
+    if "--update-baseline" in sys.argv:
+        save_baseline(collected)
+        print(f"📊 Baseline written to {BASELINE_PATH}")
@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_process_queries_matches_process_query(encoder, retrieval_agent):
+    agent = retrieval_agent({"DEPARTMENT_KEYWORDS": ["department", "lab", "fee"], "RETRIEVAL_TOP_K": 2})
+    queries = ["Civil department labs", "Tell me a joke", "Application fee for PhD", "Mechanical lab equipment"]
+    encoder.calls = encoder.texts_encoded = 0
+
+    batched = asyncio.run(agent.process_queries(queries))
+
+    assert encoder.calls == 1
+    assert encoder.texts_encoded == 3
+    single = [asyncio.run(agent.process_query(query)) for query in queries]
+    assert [result["response"] for result in batched] == [result["response"] for result in single]
+    assert batched[1]["is_department_related"] is False
+
+
+def test_batch_endpoint_streams_jsonl(monkeypatch):
+    monkeypatch.setattr(main.settings, "BULK_CHUNK_SIZE", 2)
+    client = TestClient(main.app)
+    body = "\n".join([
+        json.dumps({"message": "CS lab facilities", "session_id": "a"}),
+        json.dumps({"message": "Tell me a joke"}),
+        "not json",
+        json.dumps({"message": "Fee structure for civil"}),
+    ])
+
+    response = client.post("/chat/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[0]["session_id"] == "a" and lines[0]["is_department_related"] is True
+    assert lines[1]["is_department_related"] is False
+    assert "error" in lines[2]
+    assert "Fee Structure" in lines[3]["response"]
@@ -0,0 +1,42 @@
+import asyncio
+
+from batching import QueryBatcher
+from retrieval import RetrievalEngine
+
+
+def test_concurrent_queries_share_one_encode(index_path, chunks_path, encoder):
+    engine = RetrievalEngine.open(index_path, chunks_path, encoder)
+    queries = [f"question number {i} about fees" for i in range(8)]
+
+    async def run():
+        batcher = QueryBatcher(engine, top_k=3, window_ms=50.0, max_batch_size=8)
+        results = await asyncio.gather(*(batcher.search(query) for query in queries))
+        await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+
+    assert encoder.calls == 1
+    assert encoder.texts_encoded == 8
+    expected = [engine.search(query, 3) for query in queries]
+    assert [[hit.chunk_id for hit in hits] for hits in results] == [[hit.chunk_id for hit in hits] for hits in expected]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["full_flushes"] == 1
+    assert stats["batch_size_histogram"]["le_8"] == 1
+
+
+def test_window_flushes_partial_batch(index_path, chunks_path, encoder):
+    engine = RetrievalEngine.open(index_path, chunks_path, encoder)
+
+    async def run():
+        batcher = QueryBatcher(engine, top_k=2, window_ms=1.0, max_batch_size=32)
+        hits = await batcher.search("PhD scholarships")
+        await batcher.stop()
+        return batcher, hits
+
+    batcher, hits = asyncio.run(run())
+
+    assert len(hits) == 2
+    assert batcher.stats()["batch_size_histogram"]["le_1"] == 1
+    assert batcher.stats()["full_flushes"] == 0
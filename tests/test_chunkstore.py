@@ -0,0 +1,41 @@
+import numpy as np
+
+from chunkstore import BinaryChunkStore, convert_json, is_binary_store, write_chunk_store
+from retrieval import ChunkStore, RetrievalEngine, open_chunk_store
+
+
+def test_converted_store_matches_json(tmp_path, chunks_path):
+    store_path = tmp_path / "chunks.bin"
+
+    assert convert_json(chunks_path, store_path) == 263
+
+    binary = BinaryChunkStore(store_path)
+    json_store = ChunkStore.from_json(chunks_path)
+    assert len(binary) == len(json_store)
+    assert [binary.text(i) for i in range(len(binary))] == list(json_store.texts)
+    assert np.array_equal(binary.pages, json_store.pages)
+    assert np.array_equal(binary.is_header, json_store.is_header)
+
+
+def test_unicode_and_empty_store(tmp_path):
+    store_path = tmp_path / "chunks.bin"
+    write_chunk_store(store_path, [{"text": "Fee “Rs.” 2,200", "page": 18, "is_header": False}, {"text": "", "page": 19}])
+
+    store = BinaryChunkStore(store_path)
+    assert store.text(0) == "Fee “Rs.” 2,200"
+    assert store.text(1) == ""
+    assert store.page(1) == 19
+
+    write_chunk_store(tmp_path / "empty.bin", [])
+    assert len(BinaryChunkStore(tmp_path / "empty.bin")) == 0
+
+
+def test_engine_opens_either_format(tmp_path, index_path, chunks_path, encoder):
+    store_path = tmp_path / "chunks.bin"
+    convert_json(chunks_path, store_path)
+
+    assert is_binary_store(store_path) and not is_binary_store(chunks_path)
+    assert isinstance(open_chunk_store(store_path), BinaryChunkStore)
+    binary_engine = RetrievalEngine.open(index_path, store_path, encoder)
+    json_engine = RetrievalEngine.open(index_path, chunks_path, encoder)
+    assert binary_engine.search("civil engineering labs", 3) == json_engine.search("civil engineering labs", 3)
@@ -0,0 +1,107 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "frontend"))
+requests = pytest.importorskip("requests")
+
+from client import AgentClient
+
+
+class AgentHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    failures_left = 0
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        AgentHandler.requests_seen.append((self.path, body["message"], body.get("session_id")))
+        if AgentHandler.failures_left:
+            AgentHandler.failures_left -= 1
+            self._send(503, b"{}", "application/json")
+        elif self.path == "/chat/stream":
+            events = 'event: header\ndata: {"is_department_related": true}\n\nevent: section\ndata: {"text": "Hi"}\n\n'
+            self._send(200, events.encode(), "text/event-stream")
+        else:
+            payload = {"response": f"answer to {body['message']}", "is_department_related": True, "sources": []}
+            self._send(200, json.dumps(payload).encode(), "application/json")
+
+    def _send(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    AgentHandler.failures_left = 0
+    AgentHandler.requests_seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), AgentHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_repeated_questions_are_served_from_cache(server):
+    client = AgentClient(server)
+
+    first = client.chat("CS labs?")
+    second = client.chat("  cs LABS? ")
+
+    assert not first.cached and second.cached
+    assert second.response == first.response
+    assert len(AgentHandler.requests_seen) == 1
+
+
+def test_cache_is_per_session_and_skips_follow_ups(server):
+    client = AgentClient(server)
+
+    client.chat("CS labs?", "a")
+    client.chat("CS labs?", "b")
+    client.chat("and the fees?", "a")
+    second = client.chat("and the fees?", "a")
+
+    assert not second.cached
+    assert AgentHandler.requests_seen == [
+        ("/chat", "CS labs?", "a"), ("/chat", "CS labs?", "b"),
+        ("/chat", "and the fees?", "a"), ("/chat", "and the fees?", "a"),
+    ]
+
+
+def test_retries_are_reported(server):
+    AgentHandler.failures_left = 2
+    client = AgentClient(server, backoff=0.001)
+
+    result = client.chat("fee structure")
+
+    assert result.error is None
+    assert result.retries == 2
+    assert client.stats["retries"] == 2
+
+
+def test_errors_are_returned_not_swallowed(server):
+    AgentHandler.failures_left = 10
+    client = AgentClient(server, max_retries=1, backoff=0.001)
+
+    result = client.chat("fee structure")
+
+    assert result.response is None
+    assert "503" in result.error
+    assert result.attempts == 2
+    assert client.stats["errors"] == 1
+
+
+def test_stream_parses_events(server):
+    client = AgentClient(server)
+
+    assert list(client.stream("hello")) == [("header", {"is_department_related": True}), ("section", {"text": "Hi"})]
@@ -0,0 +1,105 @@
+import asyncio
+import re
+
+import pytest
+
+from generation import EchoBackend, Generator, count_tokens, pack_passages
+
+
+class FailingBackend:
+    name = "failing"
+
+    async def stream(self, messages):
+        yield "partial "
+        raise RuntimeError("model went away")
+
+
+def make_agent(retrieval_agent, backend):
+    agent = retrieval_agent({"DEPARTMENT_KEYWORDS": ["department", "lab"], "RETRIEVAL_TOP_K": 3, "GENERATION_BACKEND": "echo"})
+    agent.generator.backend = backend
+    return agent
+
+
+def test_packing_keeps_best_passages_within_budget():
+    passages = [(1, "a" * 400, 0.2), (2, "b" * 40, 0.9), (3, "c" * 400, 0.5), (4, "d" * 4, 0.1)]
+
+    packed, dropped = pack_passages(passages, budget=130)
+
+    # 0.9 and 0.5 fit; 0.2 does not, so it and everything below it is dropped
+    assert [page for page, _, _ in packed] == [2, 3]
+    assert dropped == 2
+    assert sum(count_tokens(text) + 4 for _, text, _ in packed) <= 130
+    assert pack_passages(passages, budget=0) == ([], 4)
+
+
+def test_identical_concurrent_prompts_share_one_generation():
+    backend = EchoBackend(latency=0.05)
+    generator = Generator(backend)
+    messages, _ = generator.prompt("hostel fee?", "Hostel fee: $500", [(7, "Hostels are on campus. More text.", 1.0)])
+    other, _ = generator.prompt("tuition?", "Tuition fee: $2,000", [])
+
+    async def burst():
+        streamed = [chunk async for chunk in generator.stream(messages)]
+        answers = await asyncio.gather(*(generator.generate(messages) for _ in range(9)), generator.generate(other))
+        return streamed, answers
+
+    streamed, answers = asyncio.run(burst())
+
+    assert answers[:9] == ["".join(streamed)] * 9
+    assert "Hostels are on campus. (p. 7)" in answers[0]
+    assert backend.calls == 3
+    assert generator.stats()["coalesced"] == 8
+    assert generator.stats()["in_flight"] == 0
+
+
+def test_generation_timeout_and_failures_are_counted():
+    generator = Generator(EchoBackend(latency=0.5), timeout=0.05)
+    messages, _ = generator.prompt("labs?", "", [])
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(generator.generate(messages))
+    assert generator.stats()["failures"] == 1
+
+
+def test_agent_generates_and_streams_over_passages(retrieval_agent):
+    agent = make_agent(retrieval_agent, EchoBackend())
+    query = "Department of Civil Engineering labs"
+
+    result = asyncio.run(agent.process_query(query))
+    events = asyncio.run(_collect(agent, query))
+
+    assert result["response"].startswith(f'Answer to "{query}"')
+    assert "From the UET Prospectus" in result["response"]
+    assert "template" not in result
+    assert "".join(data["text"] for event, data in events if event == "section") == result["response"]
+    assert events[-1] == ("sources", {"sources": result["sources"]})
+    assert len([event for event, _ in events if event == "section"]) > 2
+
+
+def test_generated_citations_use_prospectus_pages(retrieval_agent):
+    agent = make_agent(retrieval_agent, EchoBackend())
+    query = "Department of Civil Engineering labs"
+    hits = asyncio.run(agent.search(query))
+
+    messages, packed = agent._prompt(agent.matcher.match(query), query, hits)
+    answer = asyncio.run(agent.generator.generate(messages))
+
+    assert any(hit.page != hit.chunk_id for hit in packed)
+    assert {int(page) for page in re.findall(r"\[Page (\d+)\]", messages[-1]["content"])} == {hit.page for hit in packed}
+    assert {int(page) for page in re.findall(r"\(p\. (\d+)\)", answer)} == {hit.page for hit in packed}
+
+
+def test_agent_falls_back_to_template_when_generation_fails(retrieval_agent):
+    agent = make_agent(retrieval_agent, FailingBackend())
+    query = "Department of Civil Engineering labs"
+
+    result = asyncio.run(agent.process_query(query))
+    events = asyncio.run(_collect(agent, query))
+
+    assert result["response"].startswith("## Civil Engineering Department")
+    assert [event for event, _ in events][:3] == ["header", "section", "error"]
+    assert events[-1][0] == "sources"
+
+
+async def _collect(agent, query):
+    return [event async for event in agent.stream_query(query)]
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "frontend"))
+
+from history import OUT_OF_SCOPE_NOTE, ChatHistory
+
+
+def add_exchange(history, i, **response):
+    history.add_user(f"question {i}")
+    history.add_assistant({"response": f"answer {i}", **response})
+
+
+def test_blocks_are_rendered_once_with_sources_warning_and_meta():
+    history = ChatHistory()
+    add_exchange(history, 0, sources=["UET Prospectus Page 4"], meta={"latency_ms": 12.3, "cached": True})
+    add_exchange(history, 1, is_department_related=False, meta={"latency_ms": 5, "error": "timeout"})
+
+    user, answer, _, rejected = (m["block"] for m in history.messages)
+
+    assert user == "question 0"
+    assert answer == "answer 0\n\n📚 **Sources:** UET Prospectus Page 4\n\n*⏱️ 12 ms · cached*"
+    assert OUT_OF_SCOPE_NOTE in rejected and "timeout" in rejected
+
+
+def test_history_is_capped_by_whole_exchanges_and_summarized():
+    history = ChatHistory(max_messages=7, page_size=2, summary_questions=2)
+    for i in range(6):
+        add_exchange(history, i)
+
+    # Twelve messages capped at seven, rounded down to whole exchanges
+    assert len(history) == 6 and history.evicted == 6
+    assert history.messages[0]["content"] == "question 3"
+    assert history.summary().endswith("- question 1\n- question 2")
+
+    visible, hidden = history.page(2)
+    assert [m["block"] for m in visible] == ["question 4", "answer 4", "question 5", "answer 5"]
+    assert hidden == 2
+    assert history.page(10) == (history.messages, 0)
+
+    history.clear()
+    assert len(history) == 0 and history.summary() is None
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+
+from chunkstore import BinaryChunkStore
+from ingest import Ingestor, chunk_page, manifest_path_for
+from lexical import LexicalIndex
+from retrieval import ChunkStore, load_flat_index
+
+PAGES = [
+    (1, "Postgraduate Prospectus Spring 2025 www.uet.edu.pk 1"),
+    (2, "Departments"),
+    (3, "DEPARTMENT OF CIVIL ENGINEERING The Department of Civil Engineering is one of the oldest. " * 30),
+    (4, "Application fee is Rs. 2,200/-. The fee once remitted shall not be refunded."),
+]
+
+
+def build(tmp_path, encoder, pages, batch_size=2, max_chars=500):
+    ingestor = Ingestor(encoder, tmp_path / "index.index", tmp_path / "chunks.json", batch_size=batch_size, max_chars=max_chars)
+    return ingestor.run(iter(pages))
+
+
+def test_chunk_page_respects_max_chars():
+    chunks = chunk_page(PAGES[2][1].strip(), 500)
+
+    assert len(chunks) > 1
+    assert all(len(chunk["text"]) <= 500 for chunk in chunks)
+    assert not any(chunk["is_header"] for chunk in chunks)
+    assert chunk_page("Departments", 500) == [{"text": "Departments", "is_header": True}]
+
+
+def test_build_writes_loadable_index(tmp_path, encoder):
+    stats = build(tmp_path, encoder, PAGES)
+
+    vectors, metric = load_flat_index(tmp_path / "index.index")
+    chunks = ChunkStore.from_json(tmp_path / "chunks.json")
+    assert len(vectors) == len(chunks) == stats["chunks"]
+    assert stats["chunks_embedded"] == stats["chunks"]
+    assert np.allclose(vectors, encoder.encode(chunks.texts))
+    assert list(chunks.pages[:2]) == [1, 2]
+    assert bool(chunks.is_header[1])
+    assert json.loads((tmp_path / "chunks.json").read_text(encoding="utf-8"))[0]["page"] == 1
+
+
+def test_reingest_embeds_only_changed_pages(tmp_path, encoder):
+    build(tmp_path, encoder, PAGES)
+    first_vectors = np.array(load_flat_index(tmp_path / "index.index")[0])
+
+    edition = list(PAGES)
+    edition[3] = (4, "Application fee is Rs. 3,000/-. The fee once remitted shall not be refunded.")
+    stats = build(tmp_path, encoder, edition)
+
+    assert stats["pages_reused"] == 3
+    assert stats["chunks_embedded"] == 1
+    vectors, _ = load_flat_index(tmp_path / "index.index")
+    assert np.array_equal(vectors[:-1], first_vectors[:-1])
+    assert "3,000" in ChunkStore.from_json(tmp_path / "chunks.json").text(len(vectors) - 1)
+    manifest = json.loads(manifest_path_for(tmp_path / "index.index").read_text(encoding="utf-8"))
+    assert [page["page"] for page in manifest["pages"]] == [1, 2, 3, 4]
+
+
+def test_reingest_with_another_chunk_size_rebuilds_every_page(tmp_path, encoder):
+    build(tmp_path, encoder, PAGES)
+
+    stats = build(tmp_path, encoder, PAGES, max_chars=300)
+
+    assert stats["pages_reused"] == 0
+    assert stats["chunks_embedded"] == stats["chunks"]
+    assert all(len(text) <= 300 for text in ChunkStore.from_json(tmp_path / "chunks.json").texts)
+
+
+def test_build_writes_binary_store(tmp_path, encoder):
+    build(tmp_path, encoder, PAGES)
+
+    store = BinaryChunkStore(tmp_path / "chunks.bin")
+    assert store.texts == list(ChunkStore.from_json(tmp_path / "chunks.json").texts)
+
+
+def test_build_writes_lexical_index(tmp_path, encoder):
+    stats = build(tmp_path, encoder, PAGES)
+
+    index = LexicalIndex(tmp_path / "index_bm25.bin")
+    assert len(index) == stats["chunks"]
+    assert index.search("application fee refunded", 1)[0][0] == stats["chunks"] - 1
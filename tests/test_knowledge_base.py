@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import settings
+from knowledge_base import freeze
+from mcp_agent import MCPAgent
+
+
+def test_knowledge_base_is_loaded_read_only():
+    agent = MCPAgent({"DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS})
+
+    with open(settings.KNOWLEDGE_BASE_PATH, encoding="utf-8") as f:
+        database = json.load(f)
+    assert {key: {field: list(value) if isinstance(value, tuple) else value for field, value in info.items()}
+            for key, info in agent.department_info.items()} == database
+    assert agent.knowledge.version == 1
+    with pytest.raises(TypeError):
+        agent.department_info["general"]["fees"] = []
+    assert isinstance(agent.department_info["general"]["fees"], tuple)
+
+    with pytest.raises(ValueError):
+        freeze({"computer_science": {"name": "CS"}})
+    with pytest.raises(ValueError):
+        freeze({"general": {"fees": "free"}})
+
+
+def test_watcher_swaps_in_changed_file(tmp_path):
+    path = tmp_path / "knowledge_base.json"
+    database = {"general": {"fees": ["Tuition fee: $2,000 per semester"]}}
+    path.write_text(json.dumps(database), encoding="utf-8")
+    agent = MCPAgent({
+        "DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS,
+        "KNOWLEDGE_BASE_PATH": path,
+        "KNOWLEDGE_BASE_WATCH_SECONDS": 0.02,
+    })
+
+    async def run():
+        await agent.initialize()
+        before = agent.knowledge
+        path.write_text(json.dumps({"general": {"fees": ["Tuition fee: Rs. 150,000 per semester"]}}), encoding="utf-8")
+        await asyncio.sleep(0.3)
+        changed = await agent.process_query("what is the fee")
+        path.write_text("{not json", encoding="utf-8")
+        await asyncio.sleep(0.3)
+        await agent.shutdown()
+        return before, changed
+
+    before, changed = asyncio.run(run())
+
+    assert "Rs. 150,000" in changed["response"]
+    assert agent.knowledge.version == 2
+    # The superseded snapshot is untouched and a broken file keeps the live one
+    assert "$2,000" in before.responses.result(("general", "fees"))["response"]
+    assert agent.knowledge.source == str(path)
+
+
+def test_admin_reload_endpoint():
+    client = TestClient(main.app, client=("127.0.0.1", 50000))
+    version = main.agent.knowledge.version
+
+    info = client.post("/admin/knowledge-base/reload").json()
+
+    assert info["version"] == version + 1
+    assert info["departments"] == len(main.agent.department_info)
+    assert client.get("/admin/knowledge-base").json()["version"] == version + 1
+
+
+def test_admin_endpoints_need_a_token_or_loopback(monkeypatch):
+    remote = TestClient(main.app, client=("203.0.113.7", 50000))
+
+    assert remote.post("/admin/knowledge-base/reload").status_code == 403
+
+    monkeypatch.setattr(main.settings, "ADMIN_TOKEN", "secret")
+    assert remote.get("/admin/knowledge-base", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert TestClient(main.app, client=("127.0.0.1", 50000)).get("/admin/knowledge-base").status_code == 403
+    assert remote.get("/admin/knowledge-base", headers={"X-Admin-Token": "secret"}).status_code == 200
@@ -0,0 +1,83 @@
+import asyncio
+import math
+
+from lexical import LexicalIndex, build_lexical_index, reciprocal_rank_fusion, tokenize
+from mcp_agent import MCPAgent
+from retrieval import ChunkStore
+
+DOCS = [
+    "PhD in Computer Science admission requires an MS degree",
+    "Fee structure: admission fee 11,976 and registration fee 4,790",
+    "Civil engineering structural lab with concrete testing",
+    "Computer science labs and computer networks",
+]
+
+
+def brute_force_bm25(query, docs, k1=1.2, b=0.75):
+    tokenized = [tokenize(doc) for doc in docs]
+    average = sum(map(len, tokenized)) / len(tokenized)
+    scores = []
+    for tokens in tokenized:
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in doc for doc in tokenized)
+            tf = tokens.count(term)
+            if df and tf:
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / average))
+        scores.append(score)
+    return scores
+
+
+def test_search_matches_brute_force_bm25(tmp_path):
+    path = tmp_path / "bm25.bin"
+    build_lexical_index(path, DOCS)
+    index = LexicalIndex(path)
+
+    for query in ("computer science PhD", "admission fee 11,976", "concrete"):
+        expected = brute_force_bm25(query, DOCS)
+        for chunk_id, score in index.search(query, 4):
+            assert math.isclose(score, expected[chunk_id], rel_tol=1e-5)
+        assert index.search(query, 1)[0][0] == max(range(len(DOCS)), key=expected.__getitem__)
+
+    assert index.search("unknown words only", 3) == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4, 1]], k=2, rrf_k=60)
+
+    assert [chunk_id for chunk_id, _ in fused] == [1, 3]
+
+
+def test_agent_fuses_vector_and_lexical_hits(tmp_path, chunks_path, retrieval_agent):
+    chunks = ChunkStore.from_json(chunks_path)
+    path = tmp_path / "bm25.bin"
+    build_lexical_index(path, chunks.texts)
+
+    agent = retrieval_agent({"DEPARTMENT_KEYWORDS": ["fee", "department"], "RETRIEVAL_TOP_K": 3})
+    agent.lexical = LexicalIndex(path)
+
+    query = "admission fee 11,976 registration fee"
+    hits = asyncio.run(agent._retrieve(query))
+    lexical_top = agent.lexical.search(query, 1)[0][0]
+
+    assert len(hits) == 3
+    assert lexical_top in [hit.chunk_id for hit in hits]
+
+    batched = asyncio.run(agent.process_queries([query]))[0]
+    single = asyncio.run(agent.process_query(query))
+    assert batched["sources"] == single["sources"]
+
+
+def test_lexical_only_when_vectors_are_missing(tmp_path, chunks_path):
+    chunks = ChunkStore.from_json(chunks_path)
+    path = tmp_path / "bm25.bin"
+    build_lexical_index(path, chunks.texts)
+
+    agent = MCPAgent({"DEPARTMENT_KEYWORDS": ["fee"], "RETRIEVAL_TOP_K": 2})
+    agent._chunks = chunks
+    agent.lexical = LexicalIndex(path)
+    result = asyncio.run(agent.process_query("What is the registration fee?"))
+
+    assert "From the UET Prospectus" in result["response"]
+    assert len(result["sources"]) == 5
@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from config import settings
+from matcher import QueryMatch, QueryMatcher
+
+CORPUS = json.loads((Path(__file__).parent / "matcher_corpus.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return QueryMatcher(settings.DEPARTMENT_KEYWORDS, settings.DEPARTMENT_ROUTES, settings.QUERY_TYPE_ROUTES)
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[case["query"] for case in CORPUS])
+def test_corpus(matcher, case):
+    assert matcher.match(case["query"]) == QueryMatch(
+        case["is_department_related"], case["department"], case["query_type"]
+    )
+
+
+def test_short_keywords_need_word_boundaries(matcher):
+    assert matcher.match("physics lab with equipment").department == "general"
+    assert matcher.match("CS lab").department == "computer_science"
+
+
+def test_plural_and_prefix_forms(matcher):
+    assert matcher.match("list of departments").is_department_related
+    assert matcher.match("campus facilities").query_type == "facilities"
+    assert matcher.match("thermofluids research").department == "mechanical_engineering"
+
+
+def test_long_keywords_match_inflections(matcher):
+    assert matcher.match("applications and eligibility").query_type == "admission"
+    assert matcher.match("who applied last year").query_type == "admission"
+    assert matcher.match("architectural studios").department == "architecture"
+    # Short keywords stay whole words
+    assert not matcher.match("I feel fine").is_department_related
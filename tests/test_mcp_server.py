@@ -0,0 +1,104 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import settings
+from mcp_agent import MCPAgent
+from mcp_server import TOOL_SCHEMAS, AgentTools, ToolError, build_server
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+
+def make_tools() -> AgentTools:
+    return AgentTools(MCPAgent({"DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS}))
+
+
+def test_knowledge_base_tools_are_memoized():
+    tools = make_tools()
+
+    departments = asyncio.run(tools.call("list_departments"))
+    lookup = asyncio.run(tools.call("department_lookup", {"department": "computer science", "topic": "labs"}))
+    again = asyncio.run(tools.call("department_lookup", {"department": "computer science", "topic": "labs"}))
+    fees = asyncio.run(tools.call("fee_lookup", {"department": "civil_engineering"}))
+
+    assert {"id": "architecture", "name": "Architecture Department"} in departments["departments"]
+    assert lookup["department"] == "computer_science"
+    assert lookup["topic"] == "facilities"
+    assert "Advanced Computing Lab" in lookup["answer"]
+    assert again is lookup
+    assert any("Tuition fee" in fee for fee in fees["fees"])
+    with pytest.raises(ToolError):
+        asyncio.run(tools.call("department_lookup", {"department": "astrology"}))
+
+    tools.agent.reload_knowledge_base({**tools.agent.department_info})
+    assert asyncio.run(tools.call("department_lookup", {"department": "computer science", "topic": "labs"})) is not lookup
+
+
+def test_independent_calls_run_concurrently():
+    tools = make_tools()
+
+    async def slow_search(query, k=None):
+        await asyncio.sleep(0.2)
+        return []
+
+    tools.agent.search = slow_search
+    calls = [("search_prospectus", {"query": "hostel"}), ("search_prospectus", {"query": "scholarships"}), ("no_such_tool", {})]
+
+    started = time.perf_counter()
+    results = asyncio.run(tools.call_many(calls))
+
+    assert time.perf_counter() - started < 0.35
+    assert results[0] == {"query": "hostel", "passages": []}
+    assert "Unknown tool" in results[2]["error"]
+
+
+def test_mcp_server_in_process():
+    from mcp import Client
+
+    async def run():
+        async with Client(build_server(make_tools())) as client:
+            listed = await client.list_tools()
+            found = await client.call_tool("fee_lookup", {"department": "architecture"})
+            missing = await client.call_tool("department_lookup", {"department": "astrology"})
+            return listed, found, missing
+
+    listed, found, missing = asyncio.run(run())
+
+    schemas = {schema["name"]: schema["inputSchema"] for schema in TOOL_SCHEMAS}
+    assert {tool.name for tool in listed.tools} == set(schemas)
+    for tool in listed.tools:
+        assert set(tool.input_schema["properties"]) == set(schemas[tool.name]["properties"])
+        assert set(tool.input_schema.get("required", [])) == set(schemas[tool.name].get("required", []))
+    assert not found.is_error
+    assert "Hostel fee" in found.content[0].text
+    assert missing.is_error
+
+
+def test_mcp_server_over_stdio():
+    from mcp import Client, StdioServerParameters
+
+    async def run():
+        params = StdioServerParameters(command=sys.executable, args=["mcp_server.py"], cwd=str(BACKEND))
+        async with Client(params) as client:
+            return await client.call_tool("list_departments", {})
+
+    result = asyncio.run(run())
+    assert "computer_science" in result.content[0].text
+
+
+def test_tools_endpoint_runs_calls():
+    client = TestClient(main.app)
+
+    assert {tool["name"] for tool in client.get("/tools").json()["tools"]} == {schema["name"] for schema in TOOL_SCHEMAS}
+    response = client.post("/tools/call", json={"calls": [
+        {"name": "list_departments"},
+        {"name": "fee_lookup", "arguments": {"department": "unknown place"}},
+    ]})
+    results = response.json()["results"]
+    assert len(results[0]["departments"]) == 5
+    assert "error" in results[1]
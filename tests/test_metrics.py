@@ -0,0 +1,66 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from metrics import Histogram, Registry, STAGE_SECONDS
+from mcp_agent import MCPAgent
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.001, 0.01))
+    for value in (0.0005, 0.001, 0.005, 0.5):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [(0.001, 2), (0.01, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    registry.counter("demo_total", "Demo counter", ["kind"]).labels("a").inc(3)
+    registry.histogram("demo_seconds", "Demo histogram", buckets=(0.1,)).labels().observe(0.05)
+
+    text = registry.render()
+
+    assert "# TYPE demo_total counter" in text
+    assert 'demo_total{kind="a"} 3' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 1' in text
+    assert "demo_seconds_count 1" in text
+
+
+def test_agent_stages_and_fallbacks_are_counted(monkeypatch):
+    agent = MCPAgent({"DEPARTMENT_KEYWORDS": ["department", "lab"]})
+    classify = STAGE_SECONDS.labels("classify")
+    before = classify.count
+
+    asyncio.run(agent.process_query("Computer Science department labs"))
+    assert classify.count == before + 1
+
+    def broken(query):
+        raise RuntimeError("matcher failure")
+
+    monkeypatch.setattr(agent.matcher, "match", broken)
+    fallbacks = main.FALLBACKS.labels("process_query").value
+    asyncio.run(agent.process_query("Computer Science department labs"))
+    assert main.FALLBACKS.labels("process_query").value == fallbacks + 1
+
+
+def test_metrics_endpoint_and_health():
+    client = TestClient(main.app)
+    client.post("/chat", json={"message": "Electrical department admission"})
+    before = client.get("/health").json()["fallbacks"]
+    # A generation fallback still answers, so it does not count against reliability
+    main.FALLBACKS.labels("generation").inc()
+
+    metrics = client.get("/metrics")
+    health = client.get("/health").json()
+
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'uet_agent_stage_seconds_count{stage="classify"}' in metrics.text
+    assert 'uet_http_requests_in_flight{path="/metrics"} 1' in metrics.text
+    assert 'uet_http_request_seconds_count{path="/chat",method="POST"}' in metrics.text
+    assert health["reliability"].endswith("%")
+    assert health["queries"] >= 1
+    assert health["fallbacks"] == before
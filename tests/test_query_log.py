@@ -0,0 +1,68 @@
+import asyncio
+
+from query_log import FILE_PATTERN, QueryLog, QueryRecord, read_query_log
+
+
+def make_record(i: int) -> QueryRecord:
+    return QueryRecord(1700000000.0 + i, "s1", f"question {i}", "civil_engineering", "fees", True, 1.5, False)
+
+
+def test_flushes_append_gzip_members_and_rotate(tmp_path):
+    log = QueryLog(tmp_path, capacity=100, max_bytes=1, max_files=2)
+
+    async def run():
+        for batch in range(3):
+            for i in range(4):
+                log.record(make_record(batch * 4 + i))
+            assert await log.flush() == 4
+        await log.close()
+
+    asyncio.run(run())
+    files = sorted(tmp_path.glob(FILE_PATTERN))
+
+    # Every batch went over max_bytes, so each started a file; only two are kept
+    assert len(files) == 2 and log.counts["files"] == 3
+    assert [r["query"] for f in files for r in read_query_log(f)] == [f"question {i}" for i in range(4, 12)]
+    assert log.stats()["written"] == 12 and log.stats()["pending"] == 0
+
+
+def test_full_ring_drops_the_oldest_records(tmp_path):
+    log = QueryLog(tmp_path, capacity=3)
+    for i in range(5):
+        log.record(make_record(i))
+
+    asyncio.run(log.close())
+
+    assert log.counts["dropped"] == 2
+    records = read_query_log(next(tmp_path.glob(FILE_PATTERN)))
+    assert [r["query"] for r in records] == ["question 2", "question 3", "question 4"]
+
+
+def test_agent_logs_queries_and_flushes_on_shutdown(tmp_path, retrieval_agent):
+    agent = retrieval_agent({
+        "DEPARTMENT_KEYWORDS": ["department", "lab"],
+        "SEMANTIC_CACHE_ENABLED": True,
+        "QUERY_LOG_ENABLED": True,
+        "QUERY_LOG_DIR": tmp_path,
+        "QUERY_LOG_FLUSH_SECONDS": 60.0,
+    })
+    query = "Department of Civil Engineering labs"
+
+    async def run():
+        agent.query_log.start()
+        await agent.process_query(query, session_id="a")
+        await agent.process_query("Tell me a joke")
+        [event async for event in agent.stream_query(query, session_id="b")]
+        await agent.process_queries([query, "Tell me a joke"])
+        # Nothing reaches the disk until a flush
+        assert agent.query_log.pending == 5
+        await agent.shutdown()
+
+    asyncio.run(run())
+    records = read_query_log(next(tmp_path.glob(FILE_PATTERN)))
+
+    assert [(r["session_id"], r["is_department_related"], r["cache_hit"]) for r in records] == [
+        ("a", True, False), (None, False, False), ("b", True, True), (None, True, False), (None, False, False)
+    ]
+    assert records[0]["department"] == "civil_engineering" and records[0]["query_type"] == "facilities"
+    assert all(r["latency_ms"] >= 0 for r in records)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from mcp_agent import MCPAgent
+from responses import OUT_OF_SCOPE
+
+
+def make_agent():
+    return MCPAgent({"DEPARTMENT_KEYWORDS": ["department", "lab", "fee", "civil", "admission"]})
+
+
+def test_table_covers_every_department_and_query_type():
+    agent = make_agent()
+    departments = agent.matcher.departments + ["general"]
+    query_types = agent.matcher.query_types + ["general"]
+
+    assert len(agent.responses) == len(departments) * len(query_types) + 1
+    for department in departments:
+        for query_type in query_types:
+            assert agent.responses.result((department, query_type))["response"] == agent._generate_response(department, query_type, "")
+
+
+def test_body_splices_session_id():
+    agent = make_agent()
+    result, template = asyncio.run(agent.answer_query("Civil department labs"))
+
+    body = json.loads(agent.responses.body(template, 'user "7"'))
+
+    assert body == {
+        "response": result["response"],
+        "is_department_related": True,
+        "sources": result["sources"],
+        "session_id": 'user "7"',
+    }
+    assert json.loads(agent.responses.body(OUT_OF_SCOPE, None))["is_department_related"] is False
+
+
+def test_results_do_not_expose_the_template_key():
+    agent = make_agent()
+
+    assert "template" not in asyncio.run(agent.process_query("Civil department labs"))
+    assert all("template" not in result for result in asyncio.run(agent.process_queries(["admission", "Tell me a joke"])))
+
+
+def test_results_do_not_share_sources():
+    agent = make_agent()
+    first = asyncio.run(agent.process_query("admission"))
+    first["sources"].append("mutated")
+
+    assert "mutated" not in asyncio.run(agent.process_query("admission"))["sources"]
+
+
+def test_reload_knowledge_base_rebuilds_answers():
+    agent = make_agent()
+    database = dict(agent.department_info)
+    database["general"] = {**database["general"], "fees": ["Tuition fee: Rs. 150,000 per semester"]}
+
+    agent.reload_knowledge_base(database)
+
+    assert "Rs. 150,000" in asyncio.run(agent.process_query("fee for civil"))["response"]
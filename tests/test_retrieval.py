@@ -0,0 +1,57 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from mcp_agent import MCPAgent
+from retrieval import ChunkStore, RetrievalEngine, load_flat_index
+
+
+def test_flat_index_is_memory_mapped(index_path):
+    vectors, metric = load_flat_index(index_path)
+
+    assert isinstance(vectors, np.memmap)
+    assert vectors.shape == (263, 384)
+    assert metric == "ip"
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-4)
+
+
+def test_flat_index_matches_faiss(index_path):
+    faiss = pytest.importorskip("faiss")
+    vectors, _ = load_flat_index(index_path)
+    index = faiss.read_index(str(index_path))
+
+    assert np.array_equal(vectors, index.reconstruct_n(0, index.ntotal))
+
+
+def test_search_vector_returns_nearest_chunk(index_path, chunks_path, encoder):
+    engine = RetrievalEngine.open(index_path, chunks_path, encoder)
+
+    hits = engine.search_vector(np.asarray(engine.vectors[42]), 3)
+
+    assert [hit.chunk_id for hit in hits][0] == 42
+    assert hits[0].score == pytest.approx(1.0, abs=1e-4)
+    assert hits[0].page == engine.chunks.page(42)
+    assert hits[0].score >= hits[1].score >= hits[2].score
+
+
+def test_repeated_queries_skip_the_encoder(index_path, chunks_path, encoder):
+    engine = RetrievalEngine.open(index_path, chunks_path, encoder)
+
+    engine.search("PhD admission requirements", 3)
+    engine.search("  phd ADMISSION requirements ", 3)
+
+    assert encoder.calls == 1
+    assert engine.cache_hits == 1
+
+
+def test_process_query_cites_prospectus_pages(chunks_path, encoder):
+    chunks = ChunkStore.from_json(chunks_path)
+    vectors = encoder.encode(chunks.texts)
+    agent = MCPAgent({"DEPARTMENT_KEYWORDS": ["department", "lab"], "RETRIEVAL_TOP_K": 2}, encoder=encoder)
+    agent.retriever = RetrievalEngine(vectors, chunks, encoder)
+
+    result = asyncio.run(agent.process_query("Department of Computer Science lab facilities"))
+
+    assert "From the UET Prospectus" in result["response"]
+    assert sum(source.startswith("UET Prospectus Page") for source in result["sources"]) == 2
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from pathlib import Path
+
+from config import settings
+from matcher import GENERAL, QueryMatch, QueryMatcher
+from router import EmbeddingRouter, read_prototypes
+
+CORPUS = json.loads((Path(__file__).parent / "routing_corpus.json").read_text(encoding="utf-8"))
+
+DEPARTMENTS = {
+    "computer_science": ["computer science software", "programming and computing"],
+    "architecture": ["architecture design studio", "architecture degree planning"],
+}
+QUERY_TYPES = {
+    "fees": ["fee tuition cost", "expensive semester payment"],
+    "admission": ["admission apply eligibility", "admitted requirements"],
+}
+
+
+def test_prototypes_and_corpus_use_known_labels():
+    departments, query_types = read_prototypes(settings.ROUTER_PROTOTYPES_PATH)
+
+    assert set(departments) <= set(settings.DEPARTMENT_ROUTES) | {GENERAL}
+    assert set(query_types) <= set(settings.QUERY_TYPE_ROUTES) | {GENERAL}
+    for case in CORPUS:
+        assert case["department"] in set(settings.DEPARTMENT_ROUTES) | {GENERAL}, case
+        assert case["query_type"] in set(settings.QUERY_TYPE_ROUTES) | {GENERAL}, case
+
+
+def test_confident_embedding_overrides_keywords_in_batches(encoder):
+    matcher = QueryMatcher(settings.DEPARTMENT_KEYWORDS, settings.DEPARTMENT_ROUTES, settings.QUERY_TYPE_ROUTES)
+    router = EmbeddingRouter(encoder, DEPARTMENTS, QUERY_TYPES, threshold=0.1, margin=0.05)
+    queries = [
+        "is it expensive to get an architecture degree",  # "it" routes to computer_science by keyword
+        "department information please",                   # nothing to go on: keywords decide
+        "the weather today",                               # out of scope: never routed
+    ]
+
+    batch = router.match_many(queries, matcher)
+    singles = [router.route(encoder.encode([query])[0], matcher.match(query)) for query in queries]
+
+    assert matcher.match(queries[0]).department == "computer_science"
+    assert batch[0] == QueryMatch(True, "architecture", "fees")
+    assert batch[1] == matcher.match(queries[1])
+    assert batch[2] == matcher.match(queries[2])
+    assert batch == singles
+    assert router.stats()["queries"] == 4
+
+
+def test_agent_routes_with_the_retrieval_embedding(tmp_path, retrieval_agent):
+    path = tmp_path / "prototypes.json"
+    path.write_text(json.dumps({"departments": DEPARTMENTS, "query_types": QUERY_TYPES}), encoding="utf-8")
+    agent = retrieval_agent({
+        "DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS,
+        "ROUTER_ENABLED": True,
+        "ROUTER_PROTOTYPES_PATH": path,
+        "ROUTER_THRESHOLD": 0.1,
+        "ROUTER_MARGIN": 0.05,
+    })
+    agent._load_router()
+    query = "is it expensive to get an architecture degree"
+
+    result = asyncio.run(agent.process_query(query))
+    batched = asyncio.run(agent.process_queries([query]))[0]
+
+    assert agent.components["router"]["status"] == "loaded"
+    assert "Architecture" in result["response"] and "Fee" in result["response"]
+    # Routing, the answer cache and retrieval shared one embedding
+    assert agent.retriever.stats()["cache_misses"] == 1
+    assert agent.retriever.stats()["cache_hits"] == 1
+    assert batched["response"] == result["response"]
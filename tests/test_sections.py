@@ -0,0 +1,85 @@
+import asyncio
+
+import numpy as np
+
+from config import settings
+from lexical import LexicalIndex, build_lexical_index
+from retrieval import ChunkStore, RetrievalEngine
+from sections import SectionTree, SectionTreeBuilder
+from vector_index import ScalarQuantizedIndex
+
+CHUNKS = [
+    ("Postgraduate Prospectus 2024 www.uet.edu.pk 1 Vice Chancellor's message", 1, False),
+    ("Departments", 2, True),
+    ("DEPARTMENT OF CIVIL ENGINEERING Introduction The department offers", 3, False),
+    ("Structural engineering lab and concrete testing", 3, False),
+    ("subject requiring these pre-requisites.", 4, True),
+    ("DEPARTMENT OF COMPUTER SCIENCE Introduction", 5, False),
+]
+
+
+def test_builder_opens_sections_at_titles_and_headings(tmp_path):
+    builder = SectionTreeBuilder()
+    for text, page, is_header in CHUNKS:
+        builder.add(text, page, is_header)
+    tree = builder.write(tmp_path / "sections.json")
+
+    assert [(depth, s.title, s.start, s.end) for depth, s in tree.walk()] == [
+        (0, "Front matter", 0, 1),
+        (0, "Departments", 1, 6),
+        (1, "Department Of Civil Engineering", 2, 5),
+        (1, "Department Of Computer Science", 5, 6),
+    ]
+    assert tree.section_of(3).first_page == 3
+    assert SectionTree.read(tmp_path / "sections.json").sections == tree.sections
+
+    partitions = tree.partition(lambda title: {"Departments": "all", "Department Of Civil Engineering": "civil"}.get(title))
+    assert partitions["civil"].tolist() == [2, 3, 4]
+    assert partitions["all"].tolist() == [1, 5]
+
+
+def test_scoped_search_matches_brute_force_over_the_partition(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    chunks = ChunkStore(tuple(f"chunk {i}" for i in range(200)), np.zeros(200, dtype=np.int32), np.zeros(200, dtype=bool))
+    ids = np.arange(40, 120, 3)
+    queries = rng.standard_normal((4, 16)).astype(np.float32)
+    ScalarQuantizedIndex.write(tmp_path / "sq8.bin", vectors, "ip")
+
+    for index in (vectors, ScalarQuantizedIndex(tmp_path / "sq8.bin")):
+        engine = RetrievalEngine(index, chunks, encoder=None)
+        engine.set_partitions({"civil_engineering": ids})
+        for query, hits in zip(queries, engine.search_vectors(queries, 5, "civil_engineering")):
+            expected = ids[np.argsort(-(vectors[ids] @ query))[:5]]
+            assert set(hit.chunk_id for hit in hits) <= set(ids.tolist())
+            # sq8 scores are approximate, so allow for near ties swapping
+            assert len(set(hit.chunk_id for hit in hits) & set(expected.tolist())) >= 4
+
+    path = tmp_path / "bm25.bin"
+    build_lexical_index(path, ["civil lab", "civil fees", "computer lab", "civil lab tour"])
+    assert [chunk_id for chunk_id, _ in LexicalIndex(path).search("civil lab", 5, np.array([1, 2]))] == [1, 2]
+
+
+def test_agent_searches_the_department_sections(retrieval_agent):
+    agent = retrieval_agent({
+        "DEPARTMENT_KEYWORDS": settings.DEPARTMENT_KEYWORDS,
+        "RETRIEVAL_TOP_K": 3,
+        "SCOPED_SEARCH_ENABLED": True,
+        "SECTIONS_PATH": settings.SECTIONS_PATH,
+    })
+    agent._load_sections()
+    civil = set(agent.partitions["civil_engineering"].tolist())
+    design = next(s for _, s in agent.sections.walk() if s.title == "Department Of Product And Industrial Design")
+    query = "Department of Civil Engineering labs"
+
+    hits = asyncio.run(agent._retrieve(query, department="civil_engineering"))
+    single = asyncio.run(agent.process_query(query))
+    batched = asyncio.run(agent.process_queries([query, "computer science labs"]))
+
+    assert agent.components["sections"]["status"] == "loaded"
+    # Sections are assigned by title, not by keywords such as "design"
+    assert not set(range(design.start, design.end)) & set(agent.partitions["architecture"].tolist())
+    assert len(hits) == 3 and {hit.chunk_id for hit in hits} <= civil
+    assert batched[0]["sources"] == single["sources"]
+    # An unknown department searches every chunk
+    assert asyncio.run(agent._retrieve(query, department="textile")) == asyncio.run(agent._retrieve(query))
@@ -0,0 +1,70 @@
+import asyncio
+
+import numpy as np
+
+from semantic_cache import CachedAnswer, SemanticCache
+
+
+def unit(*components):
+    vector = np.zeros(8, dtype=np.float32)
+    for i, value in enumerate(components):
+        vector[i] = value
+    return vector / np.linalg.norm(vector)
+
+
+def answer(text):
+    return CachedAnswer({"response": text, "is_department_related": True, "sources": []}, ((0, 1.0),), 0.01)
+
+
+def test_lookup_needs_similarity_and_same_key():
+    cache = SemanticCache(max_entries=4, threshold=0.9)
+    cache.put(unit(1, 0.1), ("computer_science", "facilities"), answer("cs labs"))
+
+    assert cache.lookup(unit(1, 0.2), ("computer_science", "facilities")).result["response"] == "cs labs"
+    assert cache.lookup(unit(1, 0.2), ("electrical_engineering", "facilities")) is None
+    assert cache.lookup(unit(0.2, 1), ("computer_science", "facilities")) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.saved_seconds == 0.01
+
+
+def test_lru_eviction_and_invalidation():
+    cache = SemanticCache(max_entries=2, threshold=0.99)
+    key = ("civil_engineering", "fees")
+    cache.put(unit(1), key, answer("a"))
+    cache.put(unit(0, 1), key, answer("b"))
+    cache.lookup(unit(1), key)
+    cache.put(unit(0, 0, 1), key, answer("c"))
+
+    assert len(cache) == 2
+    assert cache.lookup(unit(0, 1), key) is None
+    assert cache.lookup(unit(1), key).result["response"] == "a"
+    assert cache.counts["evicted_lru"] == 1
+
+    generation = cache.generation
+    cache.invalidate()
+    assert len(cache) == 0
+    assert cache.lookup(unit(1), key) is None
+    # Answers built before the invalidation are not stored
+    cache.put(unit(1), key, answer("stale"), generation)
+    assert len(cache) == 0
+
+
+def test_agent_serves_paraphrase_from_cache(retrieval_agent):
+    agent = retrieval_agent({
+        "DEPARTMENT_KEYWORDS": ["department", "lab", "admission", "fee"],
+        "RETRIEVAL_TOP_K": 2,
+        "SEMANTIC_CACHE_ENABLED": True,
+    })
+
+    first = asyncio.run(agent.process_query("Civil Engineering department labs"))
+    again = asyncio.run(agent.process_query("civil engineering department labs please"))
+    other = asyncio.run(agent.process_query("Architecture department labs"))
+
+    assert again["response"] == first["response"]
+    assert "From the UET Prospectus" in again["response"]
+    assert other["response"] != first["response"]
+    assert agent.answer_cache.stats()["hits"] == 1
+
+    agent.reload_knowledge_base(agent.department_info)
+    assert len(agent.answer_cache) == 0
@@ -0,0 +1,76 @@
+import asyncio
+
+from sessions import SessionContext, SessionStore, is_follow_up
+
+
+CONFIG = {"DEPARTMENT_KEYWORDS": ["department", "lab", "admission", "fee"], "RETRIEVAL_TOP_K": 2}
+
+
+def test_lru_ttl_and_byte_cap(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("sessions.time.monotonic", lambda: clock[0])
+    store = SessionStore(max_sessions=2, ttl=60.0)
+    store.put("a", SessionContext("civil_engineering", "facilities"))
+    store.put("b", SessionContext("architecture", "courses"))
+    store.get("a")
+    store.put("c", SessionContext("architecture", "fees"))
+
+    assert store.get("b") is None
+    assert store.get("a").department == "civil_engineering"
+    assert store.counts["evicted_lru"] == 1
+
+    clock[0] += 61
+    assert store.get("a") is None
+    assert store.counts["expired"] == 1
+
+    capped = SessionStore(max_bytes=3 * SessionStore.entry_size("s0", SessionContext("general", "general")))
+    for i in range(10):
+        capped.put(f"s{i}", SessionContext("general", "general"))
+    assert len(capped) == 3
+    assert capped.counts["evicted_memory"] == 7
+    assert capped.bytes <= capped.max_bytes
+
+
+def test_follow_up_detection():
+    assert is_follow_up("and the admission requirements?")
+    assert is_follow_up("What about fees")
+    assert not is_follow_up("android phone prices")
+    assert not is_follow_up("and " + "word " * 10)
+
+
+def test_follow_up_reuses_department_and_passages(encoder, retrieval_agent):
+    agent = retrieval_agent(CONFIG)
+
+    first = asyncio.run(agent.process_query("Civil Engineering department labs", "s1"))
+    calls = encoder.calls
+    again = asyncio.run(agent.process_query("what about the labs there?", "s1"))
+
+    assert encoder.calls == calls
+    assert again["response"] == first["response"]
+
+    admission = asyncio.run(agent.process_query("and the admission requirements?", "s1"))
+    assert admission["response"].startswith("## Civil Engineering Department")
+    assert "Admission Requirements" in admission["response"]
+    assert agent.sessions.stats()["follow_ups"] == 2
+
+
+def test_general_question_mid_session_is_not_tied_to_the_last_department(retrieval_agent):
+    agent = retrieval_agent(CONFIG)
+    asyncio.run(agent.process_query("Computer Science department labs", "s1"))
+
+    general = asyncio.run(agent.process_query("Which departments does UET have?", "s1"))
+
+    assert general == asyncio.run(agent.process_query("Which departments does UET have?"))
+    assert "Computer Science Department" not in general["response"].splitlines()[0]
+    assert agent.sessions.stats()["follow_ups"] == 0
+
+
+def test_sessions_are_isolated(retrieval_agent):
+    agent = retrieval_agent(CONFIG)
+    asyncio.run(agent.process_query("Civil Engineering department labs", "s1"))
+
+    other = asyncio.run(agent.process_query("and the admission requirements?", "s2"))
+    unrelated = asyncio.run(agent.process_query("Tell me a joke", "s1"))
+
+    assert not other["response"].startswith("## Civil")
+    assert unrelated["is_department_related"] is False
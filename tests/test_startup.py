@@ -0,0 +1,66 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+import main
+from config import settings
+from mcp_agent import MCPAgent
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+HEAVY_MODULES = ("torch", "sentence_transformers", "faiss", "fitz", "mcp", "openai", "ollama")
+
+
+def test_importing_the_app_skips_heavy_dependencies():
+    probe = f"import sys, main; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+
+    loaded = subprocess.run([sys.executable, "-c", probe], cwd=BACKEND, capture_output=True, text=True, check=True)
+
+    assert loaded.stdout.strip() == ""
+
+
+def test_background_startup_loads_and_warms_up(encoder):
+    agent = MCPAgent({
+        "DEPARTMENT_KEYWORDS": ["department", "lab"],
+        "RETRIEVAL_ENABLED": True,
+        "INDEX_PATH": settings.INDEX_PATH,
+        "CHUNKS_PATH": settings.CHUNKS_PATH,
+        "CHUNK_STORE_PATH": settings.CHUNK_STORE_PATH,
+        "LEXICAL_INDEX_PATH": settings.LEXICAL_INDEX_PATH,
+        "HYBRID_ENABLED": True,
+        "WARMUP_ENABLED": True,
+    }, encoder=encoder)
+
+    async def run():
+        await agent.initialize(background=True)
+        early = agent.ready
+        await agent._startup
+        answer = await agent.process_query("Department of Civil Engineering labs")
+        await agent.shutdown()
+        return early, answer
+
+    early, answer = asyncio.run(run())
+
+    assert early is False
+    assert agent.ready
+    for component in ("knowledge_base", "chunk_store", "lexical_index", "encoder", "vector_index", "warm_up", "startup"):
+        assert agent.components[component]["status"] == "loaded", component
+    # Warm-up queries bypass the embedding cache
+    assert agent.retriever.stats()["cache_misses"] == 1
+    assert "From the UET Prospectus" in answer["response"]
+
+
+def test_readiness_is_separate_from_liveness(monkeypatch):
+    client = TestClient(main.app)
+    monkeypatch.setattr(main.agent, "ready", False)
+
+    assert client.get("/health").status_code == 200
+    assert client.get("/ready").status_code == 503
+
+    monkeypatch.setattr(main.agent, "ready", True)
+    monkeypatch.setattr(main.agent, "components", {"encoder": {"status": "failed", "seconds": 0.1, "error": "missing"}})
+    ready = client.get("/ready")
+    assert ready.status_code == 200
+    assert ready.json()["degraded"] is True
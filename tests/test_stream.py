@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def collect(agent, query):
+    return [event async for event in agent.stream_query(query)]
+
+
+def test_stream_sections_rebuild_the_full_answer(retrieval_agent):
+    agent = retrieval_agent({"DEPARTMENT_KEYWORDS": ["department", "lab"], "RETRIEVAL_TOP_K": 2})
+    query = "Department of Civil Engineering labs"
+
+    events = asyncio.run(collect(agent, query))
+    expected = asyncio.run(agent.process_query(query))
+
+    assert events[0] == ("header", {"is_department_related": True, "department": "civil_engineering", "query_type": "facilities"})
+    assert "".join(data["text"] for event, data in events if event == "section") == expected["response"]
+    assert events[-1] == ("sources", {"sources": expected["sources"]})
+
+
+def test_stream_endpoint_emits_sse():
+    client = TestClient(main.app)
+
+    response = client.post("/chat/stream", json={"message": "Tell me a joke", "session_id": "abc"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["header", "section", "sources", "done"]
+    assert events[0][1]["is_department_related"] is False
+    assert events[-1][1]["session_id"] == "abc"
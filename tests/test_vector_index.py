@@ -0,0 +1,82 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+
+from ingest import Ingestor
+from retrieval import FlatIndex, RetrievalEngine, SubsetIndex, load_flat_index
+from vector_index import ScalarQuantizedIndex, build_index, meta_path_for, open_vector_index
+
+
+@pytest.fixture
+def index_copy(tmp_path, index_path):
+    path = tmp_path / "faiss_index.index"
+    shutil.copy(index_path, path)
+    return path
+
+
+def recall_at(index, vectors, k):
+    exact = FlatIndex(vectors)
+    queries = np.asarray(vectors[::7])
+    found = 0
+    for (_, expected), (_, ids) in zip(exact.search(queries, k), index.search(queries, k)):
+        found += len(set(expected) & set(ids))
+    return found / (len(queries) * k)
+
+
+def test_without_sidecar_the_flat_index_is_opened(index_copy):
+    index = open_vector_index(index_copy)
+
+    assert isinstance(index, FlatIndex)
+    assert isinstance(index.vectors, np.memmap)
+
+
+def test_sq8_is_smaller_and_keeps_recall(index_copy):
+    meta = build_index(index_copy, "sq8")
+    index = open_vector_index(index_copy)
+    vectors, _ = load_flat_index(index_copy)
+
+    assert isinstance(index, ScalarQuantizedIndex)
+    assert meta["type"] == "sq8" and meta["count"] == 263
+    assert index.nbytes < vectors.nbytes / 3.5
+    assert recall_at(index, vectors, 3) >= 0.95
+
+
+def test_engine_and_stale_sidecar(index_copy, chunks_path, encoder):
+    build_index(index_copy, "sq8")
+    engine = RetrievalEngine.open(index_copy, chunks_path, encoder)
+    assert engine.stats()["index_type"] == "sq8"
+    assert engine.search_vector(np.asarray(load_flat_index(index_copy)[0][42]), 1)[0].chunk_id == 42
+
+    meta = json.loads(meta_path_for(index_copy).read_text(encoding="utf-8"))
+    meta["count"] = 10
+    meta_path_for(index_copy).write_text(json.dumps(meta), encoding="utf-8")
+    with pytest.raises(ValueError):
+        open_vector_index(index_copy)
+
+
+def test_reingest_rebuilds_the_selected_type(tmp_path, encoder):
+    pages = [(1, "Department of Civil Engineering labs"), (2, "Fee structure and admission")]
+    Ingestor(encoder, tmp_path / "index.index", tmp_path / "chunks.json", index_type="sq8").run(iter(pages))
+    Ingestor(encoder, tmp_path / "index.index", tmp_path / "chunks.json").run(iter(pages + [(3, "Hostel facilities")]))
+
+    index = open_vector_index(tmp_path / "index.index")
+    assert isinstance(index, ScalarQuantizedIndex)
+    assert len(index) == 3
+
+
+@pytest.mark.parametrize("index_type", ["ivf", "hnsw", "pq"])
+def test_faiss_index_types(index_copy, index_type):
+    pytest.importorskip("faiss")
+    build_index(index_copy, index_type, {"nbits": 4} if index_type == "pq" else None)
+    index = open_vector_index(index_copy)
+    vectors, _ = load_flat_index(index_copy)
+
+    assert index.index_type == index_type
+    assert recall_at(index, vectors, 3) >= 0.5
+
+    # A partition searches the same index, filtered to its ids
+    ids = np.arange(0, len(vectors), 2)
+    for scores, found in SubsetIndex(index, ids).search(np.array(vectors[1:5]), 3):
+        assert len(found) == 3 and set(found.tolist()) <= set(ids.tolist())